@@ -0,0 +1,225 @@
+"""
+Approximate Nearest-Neighbour Index Backends
+Pure NumPy inverted-file (IVF) index for campus-scale galleries, plus the
+factory used by the trainer and model registry to pick an index backend
+"""
+
+import os
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from embedding_index import EmbeddingIndex, l2_normalize, _top_k
+
+try:
+    from recognition_config import ANN_BACKEND, ANN_N_LISTS, ANN_N_PROBE, ANN_MIN_SAMPLES, ANN_RETRAIN_DRIFT
+except ImportError:
+    ANN_BACKEND = 'ivf'
+    ANN_N_LISTS = 0
+    ANN_N_PROBE = 8
+    ANN_MIN_SAMPLES = 5000
+    ANN_RETRAIN_DRIFT = 0.5
+
+
+def spherical_kmeans(vectors: np.ndarray, n_clusters: int, iterations: int = 10,
+                     sample_size: int = 256, seed: int = 0) -> np.ndarray:
+    """
+    Cluster unit-length vectors by cosine similarity.
+
+    Args:
+        vectors: Unit-length rows to cluster
+        n_clusters: Number of clusters
+        iterations: Lloyd iterations
+        sample_size: Training rows used per cluster (caps training cost)
+        seed: Random seed for initialization and sampling
+
+    Returns:
+        Unit-length cluster centroids, shaped (n_clusters, dim)
+    """
+    rng = np.random.default_rng(seed)
+    n_train = min(len(vectors), n_clusters * sample_size)
+    train = np.asarray(vectors[rng.choice(len(vectors), n_train, replace=False)], dtype=np.float32)
+    # k-means++ seeding: each further centroid is drawn in proportion to its
+    # distance from the ones chosen so far, so no cluster starts out empty-handed
+    centroids = np.empty((n_clusters, train.shape[1]), dtype=np.float32)
+    centroids[0] = train[rng.integers(n_train)]
+    distances = np.clip(1.0 - train @ centroids[0], 0.0, None).astype(np.float64)
+    for i in range(1, n_clusters):
+        total = distances.sum()
+        row = rng.choice(n_train, p=distances / total) if total > 0 else rng.integers(n_train)
+        centroids[i] = train[row]
+        distances = np.minimum(distances, np.clip(1.0 - train @ centroids[i], 0.0, None))
+    for _ in range(iterations):
+        assignments = (train @ centroids.T).argmax(axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, train)
+        counts = np.bincount(assignments, minlength=n_clusters)
+        empty = counts == 0
+        # Re-seed empty clusters with random training rows
+        sums[empty] = train[rng.choice(n_train, int(empty.sum()))]
+        centroids = l2_normalize(sums)
+    return centroids
+
+
+class IVFEmbeddingIndex(EmbeddingIndex):
+    """
+    Inverted-file index: rows are bucketed by their nearest k-means list
+    centroid and each query only scans the n_probe closest lists.
+
+    Galleries smaller than min_samples are not clustered and fall back to
+    exact search, as do queries whose probed lists hold fewer than k rows.
+    Rows added by replace_student() are assigned to the existing lists;
+    needs_retrain reports when the gallery has drifted far enough from the
+    one the lists were trained on to cluster again.
+    """
+
+    LIST_CENTROIDS_FILE = 'ivf_centroids.npy'
+    LIST_IDS_FILE = 'ivf_lists.npy'
+
+    backend = 'ivf'
+
+    def __init__(self, vectors: np.ndarray, codes: np.ndarray, classes: np.ndarray,
+                 n_neighbors: int = 3, centroid_shortlist: int = 0,
+                 n_lists: int = ANN_N_LISTS, n_probe: int = ANN_N_PROBE, min_samples: int = ANN_MIN_SAMPLES,
+                 list_centroids: Optional[np.ndarray] = None, list_ids: Optional[np.ndarray] = None,
+                 trained_samples: int = 0, retrain_drift: float = ANN_RETRAIN_DRIFT):
+        """
+        Args:
+            n_lists: Number of inverted lists; 0 picks about sqrt(samples)
+            n_probe: Lists scanned per query; higher = better recall, slower
+            min_samples: Below this many embeddings, search exactly
+            list_centroids: Previously trained list centroids (from load())
+            list_ids: Previously computed row -> list assignments (from load())
+            trained_samples: Gallery size the list centroids were trained on
+            retrain_drift: Relative change in gallery size after which
+                needs_retrain is set
+        """
+        super().__init__(vectors, codes, classes, n_neighbors=n_neighbors, centroid_shortlist=0)
+        self.n_lists = n_lists
+        self.n_probe = max(1, n_probe)
+        self.min_samples = min_samples
+        self.retrain_drift = retrain_drift
+        self.list_centroids = None
+        self.list_ids = None
+        self.trained_samples = 0
+        if list_centroids is not None and list_ids is not None and len(list_ids) == len(self):
+            self.list_centroids = np.asarray(list_centroids, dtype=np.float32)
+            self.list_ids = np.asarray(list_ids, dtype=np.int32)
+            self.trained_samples = trained_samples or len(self)
+        elif len(self) >= max(min_samples, 1):
+            n_lists = n_lists or int(np.sqrt(len(self)))
+            n_lists = max(1, min(n_lists, len(self)))
+            self.list_centroids = spherical_kmeans(self.vectors, n_lists)
+            self.list_ids = self._assign_lists(self.list_centroids)
+            self.trained_samples = len(self)
+        if self.list_ids is not None:
+            self.list_rows = np.argsort(self.list_ids, kind='stable')
+            self.list_offsets = np.searchsorted(self.list_ids[self.list_rows], np.arange(len(self.list_centroids) + 1))
+
+    def _assign_lists(self, list_centroids: np.ndarray, vectors: Optional[np.ndarray] = None,
+                      chunk_size: int = 8192) -> np.ndarray:
+        vectors = self.vectors if vectors is None else vectors
+        ids = np.empty(len(vectors), dtype=np.int32)
+        for start in range(0, len(vectors), chunk_size):
+            chunk = np.asarray(vectors[start:start + chunk_size], dtype=np.float32)
+            ids[start:start + chunk_size] = (chunk @ list_centroids.T).argmax(axis=1)
+        return ids
+
+    def _replaced_kwargs(self, keep: np.ndarray, added: np.ndarray, order: np.ndarray) -> Dict[str, object]:
+        kwargs = {'n_lists': self.n_lists, 'n_probe': self.n_probe, 'min_samples': self.min_samples,
+                  'retrain_drift': self.retrain_drift}
+        if not self.is_exact:
+            # Keep the trained lists; only the new rows are assigned to them
+            list_ids = np.concatenate([self.list_ids[keep], self._assign_lists(self.list_centroids, added)])
+            kwargs.update(list_centroids=self.list_centroids, list_ids=list_ids[order],
+                          trained_samples=self.trained_samples)
+        return kwargs
+
+    @property
+    def is_exact(self) -> bool:
+        """True when the gallery was too small to cluster and every search is exact."""
+        return self.list_centroids is None
+
+    @property
+    def needs_retrain(self) -> bool:
+        """True when rows were added or removed past retrain_drift since the lists were trained."""
+        if self.is_exact:
+            return False
+        return abs(len(self) - self.trained_samples) > self.retrain_drift * self.trained_samples
+
+    def retrained(self) -> 'IVFEmbeddingIndex':
+        """Copy of the index with freshly clustered lists (exact search if now below min_samples)."""
+        return type(self)(self.vectors, self.codes, self.classes_, n_neighbors=self.n_neighbors,
+                          n_lists=self.n_lists, n_probe=self.n_probe, min_samples=self.min_samples,
+                          retrain_drift=self.retrain_drift)
+
+    def search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        if self.is_exact:
+            return super().search(queries, k)
+        queries = l2_normalize(queries)
+        k = min(k, len(self))
+        probe = _top_k(queries @ self.list_centroids.T, min(self.n_probe, len(self.list_centroids)))
+        candidates = [
+            np.concatenate([self.list_rows[self.list_offsets[l]:self.list_offsets[l + 1]] for l in lists])
+            for lists in probe
+        ]
+        return self._search_candidates(queries, candidates, k)
+
+    def save(self, index_dir: str):
+        super().save(index_dir)
+        if self.is_exact:
+            # Don't let lists from an earlier, larger gallery be loaded with these rows
+            for name in (self.LIST_CENTROIDS_FILE, self.LIST_IDS_FILE):
+                path = os.path.join(index_dir, name)
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def _extra_arrays(self) -> Dict[str, np.ndarray]:
+        if self.is_exact:
+            return {}
+        return {self.LIST_CENTROIDS_FILE: self.list_centroids, self.LIST_IDS_FILE: self.list_ids}
+
+    def _extra_meta(self) -> Dict[str, object]:
+        return {} if self.is_exact else {'ivf_trained_samples': self.trained_samples}
+
+    @classmethod
+    def _load_extra_arrays(cls, index_dir: str) -> Dict[str, np.ndarray]:
+        centroids_path = os.path.join(index_dir, cls.LIST_CENTROIDS_FILE)
+        ids_path = os.path.join(index_dir, cls.LIST_IDS_FILE)
+        if not (os.path.exists(centroids_path) and os.path.exists(ids_path)):
+            return {}
+        return {'list_centroids': np.load(centroids_path), 'list_ids': np.load(ids_path),
+                'trained_samples': cls.read_meta(index_dir).get('ivf_trained_samples', 0)}
+
+
+INDEX_BACKENDS = {
+    EmbeddingIndex.backend: EmbeddingIndex,
+    IVFEmbeddingIndex.backend: IVFEmbeddingIndex,
+}
+
+
+def build_index(embeddings: np.ndarray, labels: np.ndarray, backend: str = ANN_BACKEND, **kwargs) -> EmbeddingIndex:
+    """
+    Build an index with the configured backend ('exact' or 'ivf').
+
+    Raises:
+        ValueError: If the backend is unknown
+    """
+    if backend not in INDEX_BACKENDS:
+        raise ValueError(f"Unknown index backend: {backend}")
+    return INDEX_BACKENDS[backend].build(embeddings, labels, **kwargs)
+
+
+def load_index(index_dir: str, **kwargs) -> EmbeddingIndex:
+    """
+    Load a saved index with the backend recorded in its header.
+
+    Raises:
+        FileNotFoundError: If no index has been saved in index_dir
+        ValueError: If the index format or backend is unsupported
+    """
+    meta = EmbeddingIndex.read_meta(index_dir)
+    backend = meta.get('backend', EmbeddingIndex.backend)
+    if backend not in INDEX_BACKENDS:
+        raise ValueError(f"Unknown index backend: {backend}")
+    return INDEX_BACKENDS[backend].load(index_dir, **kwargs)
@@ -0,0 +1,95 @@
+"""
+Embedding Index Benchmark
+Compares the approximate (IVF) index against exact search: recall@1 and
+queries per second, on a synthetic gallery or the saved models/face_index
+
+Usage:
+    python benchmark_index.py --students 2000 --per-student 50
+    python benchmark_index.py --index models/face_index --n-probe 4 8 16
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from ann_index import IVFEmbeddingIndex, load_index
+from embedding_index import EmbeddingIndex, l2_normalize
+
+try:
+    from recognition_config import ANN_N_LISTS, ANN_N_PROBE
+except ImportError:
+    ANN_N_LISTS = 0
+    ANN_N_PROBE = 8
+
+
+def synthetic_gallery(students: int, per_student: int, dim: int = 512, noise: float = 0.6, seed: int = 0):
+    """Random unit-length identities with per-sample noise, shaped like FaceNet embeddings."""
+    rng = np.random.default_rng(seed)
+    identities = l2_normalize(rng.standard_normal((students, dim)))
+    labels = np.repeat(np.array([f"S{i:06d}" for i in range(students)]), per_student)
+    samples = np.repeat(identities, per_student, axis=0)
+    samples += rng.standard_normal(samples.shape).astype(np.float32) * (noise / np.sqrt(dim))
+    return l2_normalize(samples), labels
+
+
+def make_queries(index: EmbeddingIndex, count: int, noise: float = 0.6, seed: int = 1) -> np.ndarray:
+    """Perturbed copies of random gallery rows, standing in for new camera frames."""
+    rng = np.random.default_rng(seed)
+    rows = rng.choice(len(index), min(count, len(index)), replace=False)
+    queries = np.asarray(index.vectors[rows], dtype=np.float32)
+    queries = queries + rng.standard_normal(queries.shape).astype(np.float32) * (noise / np.sqrt(queries.shape[1]))
+    return l2_normalize(queries)
+
+
+def time_search(index: EmbeddingIndex, queries: np.ndarray, batch_size: int):
+    """Run every query through index.search(); return (top-1 rows, queries per second)."""
+    top1 = np.empty(len(queries), dtype=np.int64)
+    started = time.perf_counter()
+    for start in range(0, len(queries), batch_size):
+        _, indices = index.search(queries[start:start + batch_size], 1)
+        top1[start:start + batch_size] = indices[:, 0]
+    elapsed = time.perf_counter() - started
+    return top1, len(queries) / elapsed if elapsed else float('inf')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark IVF recall and throughput against exact search')
+    parser.add_argument('--index', help='Saved index directory (default: synthetic gallery)')
+    parser.add_argument('--students', type=int, default=2000, help='Synthetic gallery students')
+    parser.add_argument('--per-student', type=int, default=50, help='Synthetic embeddings per student')
+    parser.add_argument('--queries', type=int, default=2000, help='Number of queries')
+    parser.add_argument('--batch-size', type=int, default=8, help='Queries per search call (faces per frame)')
+    parser.add_argument('--n-lists', type=int, default=ANN_N_LISTS, help='Inverted lists; 0 = sqrt(samples)')
+    parser.add_argument('--n-probe', type=int, nargs='+', default=[ANN_N_PROBE], help='Lists probed per query')
+    args = parser.parse_args()
+
+    if args.index:
+        saved = load_index(args.index)
+        # Whatever backend was saved, compare against a plain exact index over the same rows
+        exact = EmbeddingIndex(saved.vectors, saved.codes, saved.classes_, n_neighbors=saved.n_neighbors)
+    else:
+        print(f"Building synthetic gallery: {args.students} students x {args.per_student} embeddings")
+        embeddings, labels = synthetic_gallery(args.students, args.per_student)
+        exact = EmbeddingIndex.build(embeddings, labels)
+    queries = make_queries(exact, args.queries)
+
+    exact_top1, exact_qps = time_search(exact, queries, args.batch_size)
+    print(f"\nGallery: {len(exact)} embeddings, {len(exact.classes_)} students, {len(queries)} queries")
+    print(f"{'backend':<26}{'recall@1':>10}{'qps':>12}{'build s':>10}")
+    print(f"{'exact':<26}{1.0:>10.4f}{exact_qps:>12.1f}{'-':>10}")
+
+    started = time.perf_counter()
+    ivf = IVFEmbeddingIndex(exact.vectors, exact.codes, exact.classes_, n_neighbors=exact.n_neighbors,
+                            n_lists=args.n_lists, min_samples=0)
+    build_seconds = time.perf_counter() - started
+    for n_probe in args.n_probe:
+        ivf.n_probe = n_probe
+        ivf_top1, ivf_qps = time_search(ivf, queries, args.batch_size)
+        recall = float((ivf_top1 == exact_top1).mean())
+        name = f"ivf lists={len(ivf.list_centroids)} probe={n_probe}"
+        print(f"{name:<26}{recall:>10.4f}{ivf_qps:>12.1f}{build_seconds:>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
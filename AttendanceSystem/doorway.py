@@ -1,14 +1,14 @@
 import cv2
 import os
 import numpy as np
-from keras_facenet import FaceNet
 from sklearn.neighbors import KNeighborsClassifier
 import pickle
 from datetime import datetime
 import csv
+from model_registry import get_registry
 
-# Initialize FaceNet embedder
-embedder = FaceNet()
+# Use the process-wide FaceNet embedder
+embedder = get_registry().get_embedder()
 
 # Function to preprocess images
 def preprocess_image(image_path):
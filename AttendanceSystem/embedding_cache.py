@@ -0,0 +1,114 @@
+"""
+On-disk Face Embedding Cache
+Maps image content hashes to FaceNet embeddings so retraining only embeds
+new or changed images. Vectors are stored in a memory-mappable .npy file.
+"""
+
+import hashlib
+import os
+from typing import Optional
+
+import numpy as np
+
+
+class EmbeddingCache:
+    """Embedding cache keyed by image bytes, embedder version and preprocessing parameters."""
+
+    KEYS_FILE = 'keys.npy'
+    VECTORS_FILE = 'vectors.npy'
+
+    def __init__(self, cache_dir: str, namespace: str):
+        """
+        Open (or create) a cache directory.
+
+        Args:
+            cache_dir: Directory holding keys.npy and vectors.npy
+            namespace: Model version and preprocessing parameters; changing it
+                invalidates every cached embedding
+        """
+        self.cache_dir = cache_dir
+        self.namespace = namespace.encode('utf-8')
+        self._keys = np.empty((0,), dtype='S40')
+        self._vectors = None
+        self._index = {}
+        self._pending_keys = []
+        self._pending_vectors = []
+        self.hits = 0
+        self.misses = 0
+        self._open()
+
+    @property
+    def keys_path(self) -> str:
+        return os.path.join(self.cache_dir, self.KEYS_FILE)
+
+    @property
+    def vectors_path(self) -> str:
+        return os.path.join(self.cache_dir, self.VECTORS_FILE)
+
+    def _open(self):
+        """Load the key table and memory-map the vectors, if the cache exists."""
+        if not (os.path.exists(self.keys_path) and os.path.exists(self.vectors_path)):
+            return
+        try:
+            keys = np.load(self.keys_path)
+            vectors = np.load(self.vectors_path, mmap_mode='r')
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable embedding cache in {self.cache_dir}: {e}")
+            return
+        if len(keys) != len(vectors):
+            print(f"Ignoring inconsistent embedding cache in {self.cache_dir}")
+            return
+        self._keys = keys
+        self._vectors = vectors
+        self._index = {key: row for row, key in enumerate(keys.tolist())}
+
+    def key_for(self, data: bytes) -> bytes:
+        """Return the cache key for raw image file contents."""
+        return hashlib.sha1(self.namespace + b'\0' + data).hexdigest().encode('ascii')
+
+    def get(self, key: bytes) -> Optional[np.ndarray]:
+        """Return the cached embedding for a key, or None."""
+        row = self._index.get(key)
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        if row < len(self._keys):
+            return np.array(self._vectors[row])
+        return self._pending_vectors[row - len(self._keys)]
+
+    def put(self, key: bytes, embedding: np.ndarray):
+        """Add an embedding; it is written to disk on the next flush()."""
+        if key in self._index:
+            return
+        self._index[key] = len(self._keys) + len(self._pending_keys)
+        self._pending_keys.append(key)
+        self._pending_vectors.append(np.asarray(embedding, dtype=np.float32))
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def flush(self):
+        """Append pending embeddings to the on-disk cache."""
+        if not self._pending_keys:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        new_vectors = np.vstack(self._pending_vectors)
+        new_keys = np.array(self._pending_keys, dtype='S40')
+        if self._vectors is not None and len(self._vectors):
+            vectors = np.concatenate([np.asarray(self._vectors), new_vectors])
+            keys = np.concatenate([self._keys, new_keys])
+        else:
+            vectors, keys = new_vectors, new_keys
+        # Release the memory map before replacing the file underneath it
+        self._vectors = None
+        for path, array in ((self.vectors_path, vectors), (self.keys_path, keys)):
+            tmp_path = path + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                np.save(f, array)
+            os.replace(tmp_path, path)
+        self._pending_keys = []
+        self._pending_vectors = []
+        self._keys = np.empty((0,), dtype='S40')
+        self._index = {}
+        self._open()
@@ -0,0 +1,305 @@
+"""
+Face Embedding Index
+Exact nearest-neighbour search over L2-normalized FaceNet embeddings using a
+single matrix multiply, with per-student centroids for a fast first stage.
+Saved as plain .npy arrays plus a small JSON header instead of a pickle.
+"""
+
+import json
+import os
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+
+FORMAT_VERSION = 1
+
+
+def l2_normalize(vectors: np.ndarray) -> np.ndarray:
+    """Return float32 copies of the rows scaled to unit length."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        vectors = vectors[np.newaxis, :]
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def _top_k(similarities: np.ndarray, k: int) -> np.ndarray:
+    """Column indices of the k largest values per row, best first."""
+    if k < similarities.shape[1]:
+        part = np.argpartition(-similarities, k - 1, axis=1)[:, :k]
+    else:
+        part = np.tile(np.arange(similarities.shape[1]), (similarities.shape[0], 1))
+    order = np.argsort(-np.take_along_axis(similarities, part, axis=1), axis=1, kind='stable')
+    return np.take_along_axis(part, order, axis=1)
+
+
+class EmbeddingIndex:
+    """
+    Nearest-neighbour index over unit-length embeddings grouped by student.
+
+    Rows are stored sorted by student so each student's embeddings form one
+    contiguous block. Euclidean distance is derived from the dot product
+    (sqrt(2 - 2 cos)), which matches the previous KNeighborsClassifier
+    distances for FaceNet's already-normalized embeddings.
+    """
+
+    VECTORS_FILE = 'vectors.npy'
+    CODES_FILE = 'codes.npy'
+    CLASSES_FILE = 'classes.npy'
+    META_FILE = 'meta.json'
+
+    # Saved in meta.json so load_index() can pick the matching class
+    backend = 'exact'
+
+    def __init__(self, vectors: np.ndarray, codes: np.ndarray, classes: np.ndarray,
+                 n_neighbors: int = 3, centroid_shortlist: int = 0):
+        """
+        Wrap prepared arrays; use EmbeddingIndex.build() to create an index from raw embeddings.
+
+        Args:
+            vectors: Unit-length embeddings sorted by code, float32 or float16
+            codes: Row -> index into classes
+            classes: Sorted label table of student IDs
+            n_neighbors: Neighbours used for the majority vote
+            centroid_shortlist: Number of closest student centroids searched
+                exhaustively (approximate: a neighbour outside them is
+                missed); 0 searches every row
+        """
+        self.vectors = vectors
+        self.codes = np.asarray(codes, dtype=np.int32)
+        self.classes_ = np.asarray(classes)
+        self.n_neighbors = n_neighbors
+        self.centroid_shortlist = centroid_shortlist
+        self.offsets = np.searchsorted(self.codes, np.arange(len(self.classes_) + 1))
+        self.centroids = self._compute_centroids()
+
+    @classmethod
+    def build(cls, embeddings: np.ndarray, labels: np.ndarray, n_neighbors: int = 3,
+              dtype: str = 'float32', centroid_shortlist: int = 0, **kwargs) -> 'EmbeddingIndex':
+        """
+        Build an index from embeddings and their student labels.
+
+        Args:
+            embeddings: Array of face embeddings
+            labels: Array of corresponding student IDs
+            n_neighbors: Neighbours used for the majority vote
+            dtype: Storage precision, 'float32' or 'float16'
+            centroid_shortlist: See __init__
+            **kwargs: Extra constructor arguments for subclasses
+        """
+        labels = np.asarray(labels).astype(str)
+        if len(labels) == 0:
+            raise ValueError("Cannot build an index without embeddings")
+        classes, codes = np.unique(labels, return_inverse=True)
+        order = np.argsort(codes, kind='stable')
+        vectors = np.ascontiguousarray(l2_normalize(embeddings)[order], dtype=np.dtype(dtype))
+        return cls(vectors, codes[order], classes, n_neighbors=n_neighbors,
+                   centroid_shortlist=centroid_shortlist, **kwargs)
+
+    def replace_student(self, student_id: str, embeddings: np.ndarray = None) -> 'EmbeddingIndex':
+        """
+        Copy of the index with one student's rows replaced, without rebuilding it.
+
+        Args:
+            student_id: Student whose rows are replaced
+            embeddings: The student's new embeddings; None removes the student
+
+        Returns:
+            New index of the same type, storage precision and settings
+
+        Raises:
+            ValueError: If no embeddings would be left
+        """
+        keep = self.classes_[self.codes] != str(student_id)
+        added = np.empty((0, self.vectors.shape[1]), dtype=self.vectors.dtype)
+        if embeddings is not None and len(embeddings):
+            added = l2_normalize(embeddings).astype(self.vectors.dtype)
+        labels = np.concatenate([self.classes_[self.codes[keep]], np.array([str(student_id)] * len(added))])
+        if len(labels) == 0:
+            raise ValueError("Cannot build an index without embeddings")
+        classes, codes = np.unique(labels.astype(str), return_inverse=True)
+        order = np.argsort(codes, kind='stable')
+        vectors = np.ascontiguousarray(np.concatenate([np.asarray(self.vectors)[keep], added])[order])
+        return type(self)(vectors, codes[order], classes, n_neighbors=self.n_neighbors,
+                          centroid_shortlist=self.centroid_shortlist, **self._replaced_kwargs(keep, added, order))
+
+    def _replaced_kwargs(self, keep: np.ndarray, added: np.ndarray, order: np.ndarray) -> Dict[str, object]:
+        """Constructor arguments a subclass carries over to replace_student()'s copy."""
+        return {}
+
+    def _compute_centroids(self) -> np.ndarray:
+        sums = np.zeros((len(self.classes_), self.vectors.shape[1]), dtype=np.float32)
+        np.add.at(sums, self.codes, np.asarray(self.vectors, dtype=np.float32))
+        return l2_normalize(sums)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    @property
+    def n_samples_fit_(self) -> int:
+        return len(self.codes)
+
+    def search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find the k nearest stored embeddings for each query.
+
+        Returns:
+            Tuple of (distances, row indices), each shaped (n_queries, k)
+        """
+        queries = l2_normalize(queries)
+        k = min(k, len(self))
+        if self.centroid_shortlist and len(self.classes_) > self.centroid_shortlist:
+            return self._search_shortlisted(queries, k)
+        similarities = queries @ np.asarray(self.vectors, dtype=np.float32).T
+        indices = _top_k(similarities, k)
+        return self._to_distances(np.take_along_axis(similarities, indices, axis=1)), indices
+
+    def _search_shortlisted(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Search only the rows of the students whose centroids are closest to each query."""
+        nearest_classes = _top_k(queries @ self.centroids.T, self.centroid_shortlist)
+        candidates = [
+            np.concatenate([np.arange(self.offsets[c], self.offsets[c + 1]) for c in class_codes])
+            for class_codes in nearest_classes
+        ]
+        return self._search_candidates(queries, candidates, k)
+
+    def _search_candidates(self, queries: np.ndarray, candidates: List[np.ndarray], k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Exact search of each (normalized) query over its own candidate rows.
+        Queries with fewer than k candidates fall back to searching every row.
+        """
+        all_distances = np.empty((len(queries), k), dtype=np.float32)
+        all_indices = np.empty((len(queries), k), dtype=np.int64)
+        fallback = []
+        for i, rows in enumerate(candidates):
+            if len(rows) < k:
+                fallback.append(i)
+                continue
+            similarities = queries[i:i+1] @ np.asarray(self.vectors[rows], dtype=np.float32).T
+            top = _top_k(similarities, k)[0]
+            all_indices[i] = rows[top]
+            all_distances[i] = self._to_distances(similarities[0, top])
+        if fallback:
+            similarities = queries[fallback] @ np.asarray(self.vectors, dtype=np.float32).T
+            top = _top_k(similarities, k)
+            all_indices[fallback] = top
+            all_distances[fallback] = self._to_distances(np.take_along_axis(similarities, top, axis=1))
+        return all_distances, all_indices
+
+    @staticmethod
+    def _to_distances(similarities: np.ndarray) -> np.ndarray:
+        return np.sqrt(np.clip(2.0 - 2.0 * similarities, 0.0, None))
+
+    def kneighbors(self, X: np.ndarray, n_neighbors: int = None) -> Tuple[np.ndarray, np.ndarray]:
+        """KNeighborsClassifier-compatible neighbour query."""
+        return self.search(X, n_neighbors or self.n_neighbors)
+
+    def match(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Label and nearest distance for each query from one neighbour search.
+
+        The label is the majority vote of the k neighbours (ties go to the
+        lowest student ID, as in KNeighborsClassifier.predict).
+
+        Returns:
+            Tuple of (labels array, nearest distances array)
+        """
+        distances, indices = self.search(X, self.n_neighbors)
+        votes = np.apply_along_axis(np.bincount, 1, self.codes[indices], minlength=len(self.classes_))
+        return self.classes_[votes.argmax(axis=1)], distances[:, 0]
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        return self.match(X)[0]
+
+    def score(self, X: np.ndarray, y: np.ndarray, chunk_size: int = 1024) -> float:
+        """Mean accuracy of predict() on X, evaluated in chunks to bound memory."""
+        y = np.asarray(y).astype(str)
+        correct = 0
+        for start in range(0, len(X), chunk_size):
+            correct += int((self.predict(X[start:start + chunk_size]) == y[start:start + chunk_size]).sum())
+        return correct / len(X) if len(X) else 0.0
+
+    def save(self, index_dir: str):
+        """Write the index as .npy arrays plus a JSON header."""
+        os.makedirs(index_dir, exist_ok=True)
+        meta = {
+            'format_version': FORMAT_VERSION,
+            'backend': self.backend,
+            'dtype': str(self.vectors.dtype),
+            'metric': 'euclidean-unit',
+            'n_neighbors': self.n_neighbors,
+            'samples': len(self),
+            'students': len(self.classes_),
+        }
+        meta.update(self._extra_meta())
+        arrays = {self.VECTORS_FILE: self.vectors, self.CODES_FILE: self.codes, self.CLASSES_FILE: self.classes_}
+        arrays.update(self._extra_arrays())
+        for name, array in arrays.items():
+            path = os.path.join(index_dir, name)
+            with open(path + '.tmp', 'wb') as f:
+                np.save(f, array)
+            os.replace(path + '.tmp', path)
+        # The header is written last so a reader never sees it ahead of its arrays
+        meta_path = os.path.join(index_dir, self.META_FILE)
+        with open(meta_path + '.tmp', 'w') as f:
+            json.dump(meta, f, indent=2)
+        os.replace(meta_path + '.tmp', meta_path)
+
+    def _extra_arrays(self) -> Dict[str, np.ndarray]:
+        """Additional arrays a subclass needs saved, keyed by file name."""
+        return {}
+
+    def _extra_meta(self) -> Dict[str, object]:
+        """Additional header fields a subclass needs saved."""
+        return {}
+
+    @classmethod
+    def _load_extra_arrays(cls, index_dir: str) -> Dict[str, np.ndarray]:
+        """Constructor keyword arguments restored from the subclass's extra arrays."""
+        return {}
+
+    @classmethod
+    def read_meta(cls, index_dir: str) -> dict:
+        """
+        Read the JSON header of a saved index.
+
+        Raises:
+            FileNotFoundError: If no index has been saved in index_dir
+            ValueError: If the index was written by an unsupported format version
+        """
+        meta_path = os.path.join(index_dir, cls.META_FILE)
+        if not os.path.exists(meta_path):
+            raise FileNotFoundError(f"Embedding index not found: {index_dir}")
+        with open(meta_path) as f:
+            meta = json.load(f)
+        if meta.get('format_version') != FORMAT_VERSION:
+            raise ValueError(f"Unsupported embedding index version: {meta.get('format_version')}")
+        return meta
+
+    @classmethod
+    def exists(cls, index_dir: str) -> bool:
+        return os.path.exists(os.path.join(index_dir, cls.META_FILE))
+
+    @classmethod
+    def load(cls, index_dir: str, mmap: bool = False, centroid_shortlist: int = 0, **kwargs) -> 'EmbeddingIndex':
+        """
+        Load an index saved by save().
+
+        Args:
+            index_dir: Directory written by save()
+            mmap: Memory-map the vectors instead of reading them into RAM
+            **kwargs: Extra constructor arguments for subclasses
+
+        Raises:
+            FileNotFoundError: If no index has been saved in index_dir
+            ValueError: If the index was written by an unsupported format version
+        """
+        meta = cls.read_meta(index_dir)
+        kwargs.update(cls._load_extra_arrays(index_dir))
+        vectors = np.load(os.path.join(index_dir, cls.VECTORS_FILE), mmap_mode='r' if mmap else None)
+        codes = np.load(os.path.join(index_dir, cls.CODES_FILE))
+        classes = np.load(os.path.join(index_dir, cls.CLASSES_FILE))
+        return cls(vectors, codes, classes, n_neighbors=meta.get('n_neighbors', 3),
+                   centroid_shortlist=centroid_shortlist, **kwargs)
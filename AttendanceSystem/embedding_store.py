@@ -0,0 +1,99 @@
+"""
+Persisted Face Embedding Store
+Keeps every enrolled student's FaceNet embeddings on disk so the combined
+model can be updated one student at a time instead of re-embedding the whole dataset
+"""
+
+import os
+from typing import List
+
+import numpy as np
+
+
+class EmbeddingStore:
+    """Embeddings and their student labels, saved as NumPy arrays under the model directory."""
+
+    EMBEDDINGS_FILE = 'embeddings.npy'
+    LABELS_FILE = 'labels.npy'
+
+    def __init__(self, model_base_path: str = 'models'):
+        """
+        Initialize an empty store.
+
+        Args:
+            model_base_path: Directory the store is saved to and loaded from
+        """
+        self.model_base_path = model_base_path
+        self.embeddings = np.empty((0, 0), dtype=np.float32)
+        self.labels = np.empty((0,), dtype=str)
+
+    @property
+    def embeddings_path(self) -> str:
+        return os.path.join(self.model_base_path, self.EMBEDDINGS_FILE)
+
+    @property
+    def labels_path(self) -> str:
+        return os.path.join(self.model_base_path, self.LABELS_FILE)
+
+    def exists(self) -> bool:
+        """Return True if the store has been saved to disk."""
+        return os.path.exists(self.embeddings_path) and os.path.exists(self.labels_path)
+
+    def load(self) -> 'EmbeddingStore':
+        """Load the store from disk; a missing store loads as empty."""
+        if self.exists():
+            self.embeddings = np.load(self.embeddings_path)
+            self.labels = np.load(self.labels_path)
+        return self
+
+    def save(self):
+        """Write the store to disk, replacing the previous files atomically."""
+        os.makedirs(self.model_base_path, exist_ok=True)
+        for path, array in ((self.embeddings_path, self.embeddings), (self.labels_path, self.labels)):
+            tmp_path = path + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                np.save(f, array)
+            os.replace(tmp_path, path)
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def students(self) -> List[str]:
+        """Return the sorted list of student IDs in the store."""
+        return sorted(set(self.labels.tolist()))
+
+    def set_all(self, embeddings: np.ndarray, labels: np.ndarray):
+        """Replace the whole store contents."""
+        self.embeddings = np.asarray(embeddings, dtype=np.float32)
+        self.labels = np.asarray(labels).astype(str)
+
+    def add_student(self, student_id: str, embeddings: np.ndarray):
+        """
+        Add a student's embeddings, replacing any rows already stored for them.
+
+        Args:
+            student_id: Student identifier (e.g., REG001)
+            embeddings: Array of the student's face embeddings
+        """
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        self.remove_student(student_id)
+        if len(self.labels) == 0:
+            self.embeddings = embeddings
+            self.labels = np.array([student_id] * len(embeddings))
+        else:
+            self.embeddings = np.vstack([self.embeddings, embeddings])
+            self.labels = np.concatenate([self.labels, np.array([student_id] * len(embeddings))])
+
+    def remove_student(self, student_id: str) -> int:
+        """
+        Remove all rows for a student.
+
+        Returns:
+            Number of rows removed
+        """
+        keep = self.labels != student_id
+        removed = int(len(keep) - keep.sum())
+        if removed:
+            self.embeddings = self.embeddings[keep]
+            self.labels = self.labels[keep]
+        return removed
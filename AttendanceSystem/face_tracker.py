@@ -0,0 +1,174 @@
+"""
+Face Tracker
+Carries detected faces across frames with an IoU / centroid tracker so the
+FaceNet embedding only runs when a track is new, uncertain, or due for a
+periodic re-check; in between, the track keeps its last identity
+"""
+
+import itertools
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    from recognition_config import (
+        RECOGNITION_THRESHOLD,
+        TRACK_IOU_THRESHOLD,
+        TRACK_MAX_MISSES,
+        TRACK_REEMBED_INTERVAL,
+        TRACK_CONFIDENT_DISTANCE
+    )
+except ImportError:
+    RECOGNITION_THRESHOLD = 0.85
+    TRACK_IOU_THRESHOLD = 0.3
+    TRACK_MAX_MISSES = 5
+    TRACK_REEMBED_INTERVAL = 10
+    TRACK_CONFIDENT_DISTANCE = 0.7
+
+
+def box_iou(a: Sequence[int], b: Sequence[int]) -> float:
+    """Intersection over union of two (x, y, w, h) boxes."""
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    iw = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    ih = max(0, min(ay + ah, by + bh) - max(ay, by))
+    intersection = iw * ih
+    union = aw * ah + bw * bh - intersection
+    return intersection / union if union > 0 else 0.0
+
+
+class Track:
+    """One face followed across frames."""
+
+    def __init__(self, track_id: int, box: Tuple[int, int, int, int], frame_index: int):
+        self.track_id = track_id
+        self.box = box
+        self.student_id: Optional[str] = None
+        self.distance: Optional[float] = None
+        self.last_seen = frame_index
+        self.last_embedded: Optional[int] = None
+        self.misses = 0
+
+    @property
+    def center(self) -> Tuple[float, float]:
+        x, y, w, h = self.box
+        return x + w / 2.0, y + h / 2.0
+
+    @property
+    def match(self) -> Optional[Tuple[str, float]]:
+        """(student_id, distance) from the last embedding, or None if never recognized."""
+        if self.student_id is None:
+            return None
+        return self.student_id, self.distance
+
+
+class FaceTracker:
+    """
+    Greedy IoU tracker with a centroid-distance fallback for fast movement.
+
+    Call update() with each frame's detections, embed the tracks returned by
+    select_for_embedding(), and store the results with record_match().
+    """
+
+    def __init__(self, iou_threshold: float = TRACK_IOU_THRESHOLD, max_misses: int = TRACK_MAX_MISSES,
+                 reembed_interval: int = TRACK_REEMBED_INTERVAL,
+                 confident_distance: float = TRACK_CONFIDENT_DISTANCE,
+                 recognition_threshold: float = RECOGNITION_THRESHOLD):
+        """
+        Args:
+            iou_threshold: Minimum overlap for a detection to continue a track
+            max_misses: Frames a track survives without a matching detection
+            reembed_interval: Frames between re-embeddings of a settled track
+            confident_distance: Recognized tracks farther than this from their
+                match (but within recognition_threshold) are re-embedded every frame
+            recognition_threshold: Distance at which a face counts as unknown
+        """
+        self.iou_threshold = iou_threshold
+        self.max_misses = max_misses
+        self.reembed_interval = max(1, reembed_interval)
+        self.confident_distance = confident_distance
+        self.recognition_threshold = recognition_threshold
+        self.tracks: List[Track] = []
+        self.frame_index = 0
+        self.embedded_faces = 0
+        self.reused_faces = 0
+        self._ids = itertools.count(1)
+
+    def update(self, boxes: Sequence[Sequence[int]]) -> List[Track]:
+        """
+        Match this frame's detections to existing tracks.
+
+        Returns:
+            One track per detection, in the same order as boxes
+        """
+        self.frame_index += 1
+        boxes = [tuple(int(v) for v in box) for box in boxes]
+        assigned: List[Optional[Track]] = [None] * len(boxes)
+        free_tracks = set(range(len(self.tracks)))
+
+        # Best-overlapping pairs first
+        pairs = sorted(
+            ((box_iou(track.box, box), t, b) for t, track in enumerate(self.tracks) for b, box in enumerate(boxes)),
+            reverse=True
+        )
+        for iou, t, b in pairs:
+            if iou < self.iou_threshold:
+                break
+            if t in free_tracks and assigned[b] is None:
+                assigned[b] = self.tracks[t]
+                free_tracks.discard(t)
+
+        # Fast movers: nearest free track whose centre is within one face width
+        for b, box in enumerate(boxes):
+            if assigned[b] is not None or not free_tracks:
+                continue
+            cx, cy = box[0] + box[2] / 2.0, box[1] + box[3] / 2.0
+            t = min(free_tracks, key=lambda i: np.hypot(self.tracks[i].center[0] - cx, self.tracks[i].center[1] - cy))
+            tx, ty = self.tracks[t].center
+            if np.hypot(tx - cx, ty - cy) < max(box[2], box[3]):
+                assigned[b] = self.tracks[t]
+                free_tracks.discard(t)
+
+        for b, box in enumerate(boxes):
+            if assigned[b] is None:
+                assigned[b] = Track(next(self._ids), box, self.frame_index)
+                self.tracks.append(assigned[b])
+            assigned[b].box = box
+            assigned[b].last_seen = self.frame_index
+            assigned[b].misses = 0
+
+        for t in free_tracks:
+            self.tracks[t].misses += 1
+        self.tracks = [track for track in self.tracks if track.misses <= self.max_misses]
+        return assigned
+
+    def needs_embedding(self, track: Track) -> bool:
+        """True if the track is new, close to the recognition threshold, or due for a re-check."""
+        if track.last_embedded is None or track.distance is None:
+            return True
+        if self.confident_distance <= track.distance < self.recognition_threshold:
+            return True
+        return self.frame_index - track.last_embedded >= self.reembed_interval
+
+    def record_match(self, track: Track, student_id: str, distance: float):
+        """Store the identity from a fresh embedding on the track."""
+        track.student_id = student_id
+        track.distance = distance
+        track.last_embedded = self.frame_index
+
+    def select_for_embedding(self, tracks: List[Track]) -> List[Track]:
+        """Return the tracks that need embedding this frame; the rest reuse their identity."""
+        to_embed = [track for track in tracks if self.needs_embedding(track)]
+        self.embedded_faces += len(to_embed)
+        self.reused_faces += len(tracks) - len(to_embed)
+        return to_embed
+
+    def stats(self) -> dict:
+        total = self.embedded_faces + self.reused_faces
+        return {
+            'active_tracks': len(self.tracks),
+            'frames': self.frame_index,
+            'embedded_faces': self.embedded_faces,
+            'reused_faces': self.reused_faces,
+            'embedding_ratio': round(self.embedded_faces / total, 3) if total else None,
+        }
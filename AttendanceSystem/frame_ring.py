@@ -0,0 +1,119 @@
+"""
+Frame Ring Buffer
+Preallocated frame slots with sequence numbers shared by a camera producer
+and any number of stream consumers. Producers write frames in place and
+consumers read them without copying.
+"""
+
+import threading
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+class FrameRing:
+    """
+    Fixed set of reusable frame buffers.
+
+    A writer claim()s a free slot, fills it in place and publish()es it; the
+    slot then stays pinned as the latest frame until the next publish.
+    Readers pin the slot they read, so a slot is never overwritten while
+    anyone is still using it.
+    """
+
+    def __init__(self, slots: int = 8):
+        """
+        Args:
+            slots: Number of frame buffers; must cover the writer, frames
+                queued between stages, the latest frame and active readers
+        """
+        self._cond = threading.Condition()
+        self._buffers = [None] * slots
+        self._pins = [0] * slots
+        self._seq_slot = {}
+        self._next_slot = 0
+        self._write_seq = 0
+        self.latest_seq = 0
+        self.closed = False
+
+    def claim(self, shape: Tuple[int, ...], dtype=np.uint8) -> Tuple[int, np.ndarray]:
+        """
+        Reserve a free buffer for writing.
+
+        Returns:
+            Tuple of (sequence number, buffer to fill in place)
+        """
+        with self._cond:
+            n = len(self._buffers)
+            for offset in range(n):
+                slot = (self._next_slot + offset) % n
+                if self._pins[slot] == 0:
+                    break
+            else:
+                # Every slot is in use; grow rather than overwrite a frame someone is reading
+                self._buffers.append(None)
+                self._pins.append(0)
+                slot = n
+            self._next_slot = (slot + 1) % len(self._buffers)
+            buffer = self._buffers[slot]
+            if buffer is None or buffer.shape != tuple(shape) or buffer.dtype != dtype:
+                buffer = self._buffers[slot] = np.empty(shape, dtype=dtype)
+            self._write_seq += 1
+            for old_seq in [s for s, old_slot in self._seq_slot.items() if old_slot == slot]:
+                del self._seq_slot[old_seq]
+            self._seq_slot[self._write_seq] = slot
+            self._pins[slot] = 1
+            return self._write_seq, buffer
+
+    def publish(self, seq: int):
+        """Make a claimed frame the latest one; the writer's pin passes to the ring."""
+        with self._cond:
+            if seq not in self._seq_slot or seq <= self.latest_seq:
+                self._release(seq)
+                return
+            if self.latest_seq in self._seq_slot:
+                self._release(self.latest_seq)
+            self.latest_seq = seq
+            self._cond.notify_all()
+
+    def release(self, seq: int):
+        """Drop one pin on a frame (a claimed frame that was not published, or a finished read)."""
+        with self._cond:
+            self._release(seq)
+
+    def _release(self, seq: int):
+        slot = self._seq_slot.get(seq)
+        if slot is not None and self._pins[slot] > 0:
+            self._pins[slot] -= 1
+
+    def read_latest(self, after_seq: int = 0, timeout: Optional[float] = None) -> Tuple[Optional[int], Optional[np.ndarray]]:
+        """
+        Wait for a frame newer than after_seq and pin it. The caller must
+        release(seq) when done and must not modify the frame.
+
+        Returns:
+            Tuple of (sequence number, frame), or (None, None) on timeout or close
+        """
+        with self._cond:
+            if self.latest_seq <= after_seq and not self.closed:
+                self._cond.wait_for(lambda: self.latest_seq > after_seq or self.closed, timeout)
+            if self.latest_seq <= after_seq or self.latest_seq not in self._seq_slot:
+                return None, None
+            slot = self._seq_slot[self.latest_seq]
+            self._pins[slot] += 1
+            return self.latest_seq, self._buffers[slot]
+
+    def close(self):
+        """Wake every waiting reader; no more frames will be published."""
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            return {
+                'slots': len(self._buffers),
+                'pinned': sum(1 for pins in self._pins if pins),
+                'written': self._write_seq,
+                'latest_seq': self.latest_seq,
+            }
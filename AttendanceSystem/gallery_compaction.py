@@ -0,0 +1,203 @@
+"""
+Gallery Compaction
+Condenses each student's near-duplicate capture embeddings into a few
+prototypes for the serving index, and measures the accuracy cost of doing so
+
+Usage:
+    python gallery_compaction.py --prototypes 5
+    python gallery_compaction.py --prototypes 1 3 5 --method centroid
+"""
+
+from typing import Dict, Tuple
+
+import numpy as np
+
+from ann_index import spherical_kmeans
+from embedding_index import EmbeddingIndex, l2_normalize
+
+try:
+    from recognition_config import GALLERY_COMPACTION_METHOD, RECOGNITION_THRESHOLD, KNN_N_NEIGHBORS
+except ImportError:
+    GALLERY_COMPACTION_METHOD = 'medoids'
+    RECOGNITION_THRESHOLD = 0.85
+    KNN_N_NEIGHBORS = 3
+
+
+def kmeans_medoids(embeddings: np.ndarray, n_prototypes: int) -> np.ndarray:
+    """
+    Cluster one student's embeddings and keep the real embedding closest to
+    each cluster centre.
+
+    Returns:
+        Row indices of the chosen medoids
+    """
+    vectors = l2_normalize(embeddings)
+    centroids = spherical_kmeans(vectors, n_prototypes)
+    similarities = vectors @ centroids.T
+    assignments = similarities.argmax(axis=1)
+    medoids = []
+    for cluster in range(n_prototypes):
+        members = np.flatnonzero(assignments == cluster)
+        if len(members) == 0:
+            continue
+        medoids.append(members[similarities[members, cluster].argmax()])
+    return np.unique(medoids)
+
+
+def centroid_and_outliers(embeddings: np.ndarray, n_prototypes: int, min_distance: float = 0.3) -> np.ndarray:
+    """
+    Keep the student's mean embedding plus the embeddings farthest from every
+    prototype chosen so far (greedy farthest-point), stopping early once every
+    embedding is within min_distance of a prototype.
+
+    Returns:
+        Prototype vectors; the first row is the centroid
+    """
+    vectors = l2_normalize(embeddings)
+    prototypes = [l2_normalize(vectors.mean(axis=0))[0]]
+    nearest = np.sqrt(np.clip(2.0 - 2.0 * (vectors @ prototypes[0]), 0.0, None))
+    while len(prototypes) < n_prototypes:
+        farthest = int(nearest.argmax())
+        if nearest[farthest] < min_distance:
+            break
+        prototypes.append(vectors[farthest])
+        distance = np.sqrt(np.clip(2.0 - 2.0 * (vectors @ vectors[farthest]), 0.0, None))
+        nearest = np.minimum(nearest, distance)
+    return np.vstack(prototypes)
+
+
+def compact_gallery(embeddings: np.ndarray, labels: np.ndarray, n_prototypes: int,
+                    method: str = GALLERY_COMPACTION_METHOD) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Replace each student's embeddings with at most n_prototypes prototypes.
+
+    Args:
+        embeddings: Array of face embeddings
+        labels: Array of corresponding student IDs
+        n_prototypes: Prototypes kept per student
+        method: 'medoids' or 'centroid'
+
+    Returns:
+        Tuple of (prototype embeddings, labels)
+
+    Raises:
+        ValueError: If the method is unknown
+    """
+    if method not in ('medoids', 'centroid'):
+        raise ValueError(f"Unknown gallery compaction method: {method}")
+    embeddings = np.asarray(embeddings)
+    labels = np.asarray(labels).astype(str)
+    compact_embeddings = []
+    compact_labels = []
+    for student_id in np.unique(labels):
+        student_embeddings = embeddings[labels == student_id]
+        if len(student_embeddings) <= n_prototypes:
+            prototypes = student_embeddings
+        elif method == 'medoids':
+            prototypes = student_embeddings[kmeans_medoids(student_embeddings, n_prototypes)]
+        else:
+            prototypes = centroid_and_outliers(student_embeddings, n_prototypes)
+        compact_embeddings.append(prototypes)
+        compact_labels.extend([student_id] * len(prototypes))
+    return np.vstack(compact_embeddings), np.array(compact_labels)
+
+
+def split_holdout(labels: np.ndarray, holdout_fraction: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Hold out the last frames of each student's capture. Consecutive frames are
+    near-duplicates, so a random split would leak test frames into the gallery.
+
+    Returns:
+        Tuple of (gallery row indices, held-out row indices)
+    """
+    gallery_rows = []
+    holdout_rows = []
+    for student_id in np.unique(labels):
+        rows = np.flatnonzero(labels == student_id)
+        n_holdout = int(len(rows) * holdout_fraction)
+        if len(rows) < 2 or n_holdout == 0:
+            gallery_rows.append(rows)
+            continue
+        gallery_rows.append(rows[:-n_holdout])
+        holdout_rows.append(rows[-n_holdout:])
+    if not holdout_rows:
+        raise ValueError("Not enough embeddings per student to hold any out")
+    return np.concatenate(gallery_rows), np.concatenate(holdout_rows)
+
+
+def _evaluate_index(index: EmbeddingIndex, queries: np.ndarray, expected: np.ndarray,
+                    threshold: float) -> Dict[str, float]:
+    predicted, distances = index.match(queries)
+    correct = predicted == expected
+    return {
+        'gallery_size': len(index),
+        'accuracy': round(float(correct.mean()), 4),
+        # What the camera loop actually marks: right student and within the threshold
+        'accepted_accuracy': round(float((correct & (distances <= threshold)).mean()), 4),
+        'mean_distance': round(float(distances.mean()), 4),
+    }
+
+
+def evaluate_compaction(embeddings: np.ndarray, labels: np.ndarray, n_prototypes: int,
+                        method: str = GALLERY_COMPACTION_METHOD, n_neighbors: int = KNN_N_NEIGHBORS,
+                        holdout_fraction: float = 0.2, threshold: float = RECOGNITION_THRESHOLD) -> Dict[str, any]:
+    """
+    Compare a compacted gallery with the full gallery on held-out frames.
+
+    Both galleries are built from the same non-held-out embeddings and
+    searched exactly, so the difference is due to compaction alone.
+
+    Returns:
+        Dictionary with 'full' and 'compact' results and the accuracy change
+    """
+    labels = np.asarray(labels).astype(str)
+    embeddings = np.asarray(embeddings)
+    gallery_rows, holdout_rows = split_holdout(labels, holdout_fraction)
+    queries, expected = embeddings[holdout_rows], labels[holdout_rows]
+
+    full_index = EmbeddingIndex.build(embeddings[gallery_rows], labels[gallery_rows], n_neighbors=n_neighbors)
+    compact_X, compact_y = compact_gallery(embeddings[gallery_rows], labels[gallery_rows], n_prototypes, method)
+    compact_index = EmbeddingIndex.build(compact_X, compact_y, n_neighbors=min(n_neighbors, n_prototypes))
+
+    full = _evaluate_index(full_index, queries, expected, threshold)
+    compact = _evaluate_index(compact_index, queries, expected, threshold)
+    return {
+        'prototypes': n_prototypes,
+        'method': method,
+        'students': len(full_index.classes_),
+        'queries': len(queries),
+        'full': full,
+        'compact': compact,
+        'compression': round(full['gallery_size'] / compact['gallery_size'], 2),
+        'accuracy_change': round(compact['accuracy'] - full['accuracy'], 4),
+        'accepted_accuracy_change': round(compact['accepted_accuracy'] - full['accepted_accuracy'], 4),
+    }
+
+
+def main():
+    import argparse
+    from train import FaceRecognitionTrainer
+
+    parser = argparse.ArgumentParser(description='Evaluate per-student prototype galleries against the full gallery')
+    parser.add_argument('--prototypes', type=int, nargs='+', default=[5], help='Prototypes per student')
+    parser.add_argument('--method', choices=['medoids', 'centroid'], default=GALLERY_COMPACTION_METHOD)
+    parser.add_argument('--holdout', type=float, default=0.2, help='Fraction of each capture held out as queries')
+    parser.add_argument('--dataset', default='dataset', help='Student dataset directory')
+    parser.add_argument('--models', default='models', help='Model directory')
+    args = parser.parse_args()
+
+    trainer = FaceRecognitionTrainer(dataset_base_path=args.dataset, model_base_path=args.models)
+    embeddings, labels = trainer.collect_embeddings()
+
+    print(f"{'method':<10}{'protos':>7}{'gallery':>10}{'x smaller':>10}{'accuracy':>10}{'change':>9}{'accepted':>10}{'change':>9}")
+    for n_prototypes in args.prototypes:
+        report = evaluate_compaction(embeddings, labels, n_prototypes, method=args.method, holdout_fraction=args.holdout)
+        full, compact = report['full'], report['compact']
+        print(f"{'full':<10}{'-':>7}{full['gallery_size']:>10}{1.0:>10.1f}{full['accuracy']:>10.4f}{'':>9}{full['accepted_accuracy']:>10.4f}{'':>9}")
+        print(f"{args.method:<10}{n_prototypes:>7}{compact['gallery_size']:>10}{report['compression']:>10.1f}"
+              f"{compact['accuracy']:>10.4f}{report['accuracy_change']:>+9.4f}"
+              f"{compact['accepted_accuracy']:>10.4f}{report['accepted_accuracy_change']:>+9.4f}")
+
+
+if __name__ == '__main__':
+    main()
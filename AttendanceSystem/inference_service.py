@@ -0,0 +1,146 @@
+"""
+Out-of-process Face Recognition
+Runs the embedder and index in separate worker processes so recognition
+scales across cores and does not compete with web requests for the GIL.
+Face crops are handed over through shared-memory buffers; only the labels
+and distances travel back through the pipe.
+"""
+
+import atexit
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import resource_tracker, shared_memory, util
+from queue import Queue
+from typing import List, Tuple
+
+import numpy as np
+
+from model_registry import RecognitionModelRegistry
+from recognition import FACE_SIZE, RecognitionWorkerPool
+
+try:
+    from recognition_config import INFERENCE_PROCESSES, INFERENCE_MAX_FACES
+except ImportError:
+    INFERENCE_PROCESSES = 2
+    INFERENCE_MAX_FACES = 16
+
+
+FACE_SHAPE = (FACE_SIZE[1], FACE_SIZE[0], 3)
+
+# Worker process state
+_worker_registry = None
+_worker_generation = None
+_worker_buffers = {}
+
+
+def _init_worker(model_base_path: str, n_neighbors: int, embedder_factory, threads_per_process: int):
+    """Load the embedder and index once per worker process."""
+    global _worker_registry
+    # Keep each process's math libraries from claiming every core
+    for var in ('OMP_NUM_THREADS', 'TF_NUM_INTRAOP_THREADS'):
+        os.environ.setdefault(var, str(threads_per_process))
+    _worker_registry = RecognitionModelRegistry(model_base_path, n_neighbors=n_neighbors,
+                                                embedder_factory=embedder_factory)
+    _worker_registry.get_embedder()
+    util.Finalize(None, _close_buffers, exitpriority=10)
+
+
+def _close_buffers():
+    """Detach the worker from the parent's shared-memory buffers on exit."""
+    while _worker_buffers:
+        _, shm = _worker_buffers.popitem()
+        shm.close()
+
+
+def _recognize_shared(buffer_name: str, count: int, generation: int) -> Tuple[List[str], List[float]]:
+    """Embed and match the first count faces of a shared-memory buffer."""
+    global _worker_generation
+    if generation != _worker_generation:
+        if _worker_generation is not None:
+            # The parent reloaded the model (e.g. after an enrollment)
+            _worker_registry.reload()
+        _worker_generation = generation
+    shm = _worker_buffers.get(buffer_name)
+    if shm is None:
+        shm = _worker_buffers[buffer_name] = shared_memory.SharedMemory(name=buffer_name)
+        # The parent owns and unlinks the segment; don't track it here as well
+        resource_tracker.unregister(shm._name, 'shared_memory')
+    faces = np.ndarray((count,) + FACE_SHAPE, dtype=np.uint8, buffer=shm.buf)
+    embeddings = _worker_registry.get_embedder().embeddings(list(faces))
+    labels, distances = _worker_registry.get_model().match(embeddings)
+    return [str(label) for label in labels], [float(distance) for distance in distances]
+
+
+class ProcessRecognitionPool(RecognitionWorkerPool):
+    """
+    RecognitionWorkerPool whose embedding runs in a pool of worker processes.
+
+    Sessions are still scheduled round-robin by the parent; each dispatching
+    thread owns one shared-memory buffer sized for max_faces crops, copies a
+    frame's faces into it and sends only the buffer name to a worker process.
+    """
+
+    def __init__(self, registry: RecognitionModelRegistry, processes: int = INFERENCE_PROCESSES,
+                 max_faces: int = INFERENCE_MAX_FACES):
+        """
+        Args:
+            registry: Parent-process registry; its model path and reloads are
+                mirrored by the workers. The parent never loads the embedder
+                or index itself
+            processes: Number of worker processes
+            max_faces: Faces per shared-memory buffer; larger frames are sent in chunks
+        """
+        super().__init__(registry, workers=processes)
+        self.max_faces = max(1, max_faces)
+        # TensorFlow is not fork-safe, so workers always start fresh interpreters
+        self.executor = ProcessPoolExecutor(
+            max_workers=processes,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(registry.model_base_path, registry.n_neighbors, registry.embedder_factory,
+                      max(1, (os.cpu_count() or 1) // processes)),
+        )
+        self._buffers = Queue()
+        self._all_buffers = []
+        for _ in range(processes):
+            shm = shared_memory.SharedMemory(create=True, size=self.max_faces * int(np.prod(FACE_SHAPE)))
+            self._all_buffers.append(shm)
+            self._buffers.put(shm)
+        self._closed = False
+        self._close_lock = threading.Lock()
+        atexit.register(self.close)
+
+    def _recognize(self, face_images: List[np.ndarray]) -> List[Tuple[str, float]]:
+        generation = self.registry.stats()['reload_count']
+        shm = self._buffers.get()
+        try:
+            faces = np.ndarray((self.max_faces,) + FACE_SHAPE, dtype=np.uint8, buffer=shm.buf)
+            results = []
+            for start in range(0, len(face_images), self.max_faces):
+                chunk = face_images[start:start + self.max_faces]
+                for i, face in enumerate(chunk):
+                    faces[i] = face
+                labels, distances = self.executor.submit(_recognize_shared, shm.name, len(chunk), generation).result()
+                results.extend(zip(labels, distances))
+            return results
+        finally:
+            self._buffers.put(shm)
+
+    def close(self):
+        """Stop the worker processes and free the shared memory."""
+        with self._close_lock:
+            if self._closed:
+                return
+            self._closed = True
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        for shm in self._all_buffers:
+            shm.close()
+            try:
+                shm.unlink()
+            except FileNotFoundError:
+                pass
+
+    def stats(self):
+        return dict(super().stats(), mode='process', processes=self.pool.workers, max_faces=self.max_faces)
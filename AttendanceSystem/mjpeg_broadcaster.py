@@ -0,0 +1,228 @@
+"""
+MJPEG Broadcaster
+Encodes each new frame of a FrameRing once and fans the bytes out to every
+connected viewer. Viewers that cannot keep up are throttled individually
+(lower frame rate, then lower JPEG quality) instead of slowing the others.
+Viewers can be plain threads (stream()) or asyncio tasks (astream()).
+"""
+
+import asyncio
+import threading
+import time
+import weakref
+from typing import AsyncIterator, Dict, Iterator, Optional
+
+import cv2
+
+from frame_ring import FrameRing
+from pipeline import DropOldestQueue
+
+try:
+    from recognition_config import STREAM_JPEG_QUALITY, STREAM_LOW_JPEG_QUALITY, STREAM_MAX_FPS, STREAM_MIN_FPS
+except ImportError:
+    STREAM_JPEG_QUALITY = 80
+    STREAM_LOW_JPEG_QUALITY = 50
+    STREAM_MAX_FPS = 30
+    STREAM_MIN_FPS = 2
+
+
+MJPEG_CONTENT_TYPE = 'multipart/x-mixed-replace; boundary=frame'
+
+# Seconds of delivery history used to decide whether a viewer is keeping up
+ADAPT_WINDOW_SECONDS = 2.0
+
+
+def mjpeg_part(jpeg: bytes) -> bytes:
+    """Wrap JPEG bytes as one part of a multipart/x-mixed-replace stream."""
+    return b'--frame\r\nContent-Type: image/jpeg\r\n\r\n' + jpeg + b'\r\n'
+
+
+class Subscriber:
+    """One viewer: a one-frame mailbox plus its own frame rate and quality."""
+
+    def __init__(self, max_fps: float = STREAM_MAX_FPS):
+        self.mailbox = DropOldestQueue(maxsize=1)
+        self.max_fps = max_fps
+        self.low_quality = False
+        self.last_sent = 0.0
+        self.sent = 0
+        self._window_started = time.time()
+        self._window_put = 0
+        self._window_dropped = 0
+
+    def wants_frame(self, now: float) -> bool:
+        return now - self.last_sent >= 1.0 / self.max_fps
+
+    def push(self, part: Optional[bytes]):
+        """Hand a part (or None for end of stream) to the viewer."""
+        self.mailbox.put(part)
+
+    def deliver(self, part: bytes, now: float):
+        dropped_before = self.mailbox.dropped
+        self.push(part)
+        self.last_sent = now
+        self.sent += 1
+        self._window_put += 1
+        self._window_dropped += self.mailbox.dropped - dropped_before
+        if now - self._window_started >= ADAPT_WINDOW_SECONDS:
+            self._adapt()
+            self._window_started, self._window_put, self._window_dropped = now, 0, 0
+
+    def _adapt(self):
+        """Halve the frame rate of a viewer that misses frames; recover gradually when it keeps up."""
+        missed = self._window_dropped / self._window_put if self._window_put else 0.0
+        if missed > 0.3:
+            if self.max_fps <= STREAM_MIN_FPS * 2:
+                self.low_quality = True
+            self.max_fps = max(STREAM_MIN_FPS, self.max_fps / 2)
+        elif missed < 0.05 and self.max_fps < STREAM_MAX_FPS:
+            self.low_quality = False
+            self.max_fps = min(STREAM_MAX_FPS, self.max_fps * 1.5)
+
+    def stats(self) -> Dict[str, float]:
+        return {'fps_cap': round(self.max_fps, 1), 'low_quality': self.low_quality,
+                'sent': self.sent, 'skipped': self.mailbox.dropped}
+
+
+class AsyncSubscriber(Subscriber):
+    """Viewer served by an event loop: each pushed part sets an asyncio.Event instead of waking a thread."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, max_fps: float = STREAM_MAX_FPS):
+        super().__init__(max_fps)
+        self.loop = loop
+        self.ready = asyncio.Event()
+
+    def push(self, part: Optional[bytes]):
+        super().push(part)
+        try:
+            self.loop.call_soon_threadsafe(self.ready.set)
+        except RuntimeError:
+            # The viewer's event loop has already shut down
+            pass
+
+
+class MjpegBroadcaster:
+    """Per-ring encoder thread that pushes each new frame to all subscribers."""
+
+    def __init__(self, ring: FrameRing, quality: int = STREAM_JPEG_QUALITY,
+                 low_quality: int = STREAM_LOW_JPEG_QUALITY):
+        self.ring = ring
+        self.quality = quality
+        self.low_quality = low_quality
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._watched = threading.Condition(self._lock)
+        self._thread = None
+        self.encoded = {'normal': 0, 'low': 0}
+
+    def subscribe(self, subscriber: Optional[Subscriber] = None) -> Subscriber:
+        subscriber = subscriber or Subscriber()
+        with self._lock:
+            self._subscribers.add(subscriber)
+            self._watched.notify()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+        if self.ring.closed:
+            subscriber.push(None)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def stream(self) -> Iterator[bytes]:
+        """Multipart MJPEG chunks for one viewer; ends when the session's ring is closed."""
+        subscriber = self.subscribe()
+        try:
+            while True:
+                part = subscriber.mailbox.get(timeout=1.0)
+                if part is None:
+                    if self.ring.closed:
+                        return
+                    continue
+                yield part
+        finally:
+            self.unsubscribe(subscriber)
+
+    async def astream(self) -> AsyncIterator[bytes]:
+        """Async version of stream() for ASGI; a waiting viewer holds no thread."""
+        subscriber = self.subscribe(AsyncSubscriber(asyncio.get_running_loop()))
+        try:
+            while True:
+                # Clear before checking so a part pushed in between still wakes us
+                subscriber.ready.clear()
+                part = subscriber.mailbox.get(timeout=0)
+                if part is not None:
+                    yield part
+                    continue
+                if self.ring.closed:
+                    return
+                try:
+                    await asyncio.wait_for(subscriber.ready.wait(), timeout=1.0)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self.unsubscribe(subscriber)
+
+    def _encode(self, frame, quality: int) -> Optional[bytes]:
+        ret, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+        return mjpeg_part(buffer.tobytes()) if ret else None
+
+    def _run(self):
+        seq = 0
+        while True:
+            with self._lock:
+                # Without viewers, wait for one instead of reading (and pinning) every new frame
+                while not self._subscribers and not self.ring.closed:
+                    self._watched.wait(timeout=1.0)
+                    # The viewer that wakes us gets the latest frame right away
+                    seq = 0
+            new_seq, frame = self.ring.read_latest(after_seq=seq, timeout=1.0)
+            if frame is None:
+                if self.ring.closed:
+                    break
+                continue
+            seq = new_seq
+            now = time.time()
+            with self._lock:
+                due = [s for s in self._subscribers if s.wants_frame(now)]
+            try:
+                parts = {}
+                # Each quality level is encoded at most once per frame, and only for viewers due one
+                for low in {s.low_quality for s in due}:
+                    parts[low] = self._encode(frame, self.low_quality if low else self.quality)
+                    self.encoded['low' if low else 'normal'] += 1
+            finally:
+                self.ring.release(seq)
+            for subscriber in due:
+                if parts.get(subscriber.low_quality) is not None:
+                    subscriber.deliver(parts[subscriber.low_quality], now)
+        # Session stopped: end every open stream
+        with self._lock:
+            for subscriber in self._subscribers:
+                subscriber.push(None)
+            self._thread = None
+
+    def stats(self):
+        with self._lock:
+            subscribers = [s.stats() for s in self._subscribers]
+        return {'viewers': len(subscribers), 'encoded': dict(self.encoded), 'subscribers': subscribers}
+
+
+_broadcasters = weakref.WeakKeyDictionary()
+_broadcasters_lock = threading.Lock()
+
+
+def get_broadcaster(ring: FrameRing) -> MjpegBroadcaster:
+    """Return the broadcaster for a ring, creating it on first use."""
+    with _broadcasters_lock:
+        broadcaster = _broadcasters.get(ring)
+        if broadcaster is None:
+            broadcaster = _broadcasters[ring] = MjpegBroadcaster(ring)
+        return broadcaster
+
+
+def existing_broadcaster(ring: FrameRing) -> Optional[MjpegBroadcaster]:
+    with _broadcasters_lock:
+        return _broadcasters.get(ring)
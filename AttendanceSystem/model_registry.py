@@ -0,0 +1,253 @@
+"""
+Process-wide Face Recognition Model Registry
+Owns the FaceNet embedder and the combined embedding index so every camera session,
+trainer and script in a worker process shares a single loaded copy
+"""
+
+import os
+import pickle
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+
+from ann_index import build_index, load_index
+from embedding_index import EmbeddingIndex
+
+try:
+    from recognition_config import KNN_N_NEIGHBORS, INDEX_DTYPE, INDEX_CENTROID_SHORTLIST
+except ImportError:
+    KNN_N_NEIGHBORS = 3
+    INDEX_DTYPE = 'float32'
+    INDEX_CENTROID_SHORTLIST = 0
+
+
+DEFAULT_MODEL_BASE_PATH = str(Path(__file__).resolve().parent / 'models')
+
+# keras_facenet's default FaceNet() weights; part of every embedding cache key
+EMBEDDER_MODEL_VERSION = 'facenet-20180402-114759'
+
+# Directory under the model path holding the saved EmbeddingIndex
+INDEX_DIR_NAME = 'face_index'
+
+
+def _current_rss_bytes() -> Optional[int]:
+    """Return the resident set size of this process in bytes, if it can be determined."""
+    try:
+        import psutil
+        return psutil.Process(os.getpid()).memory_info().rss
+    except ImportError:
+        pass
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def load_legacy_embeddings(models_path: Path):
+    """
+    Collect embeddings and labels from a legacy face_model.pkl or per-student models.
+
+    Raises:
+        FileNotFoundError: If no trained models exist
+        ValueError: If no trained faces could be collected
+    """
+    combined_model_file = models_path / 'face_model.pkl'
+    if combined_model_file.exists():
+        with open(combined_model_file, 'rb') as f:
+            data = pickle.load(f)
+        # data expected to be a dict with 'knn', 'embeddings' and 'labels' keys
+        if isinstance(data, dict) and len(data.get('labels', [])):
+            return np.asarray(data['embeddings']), np.asarray(data['labels'])
+        knn = data.get('knn') if isinstance(data, dict) else data
+        if hasattr(knn, '_fit_X'):
+            return np.asarray(knn._fit_X), knn.classes_[knn._y]
+
+    # Fall back to old per-student scan
+    if not models_path.exists():
+        raise FileNotFoundError('No trained models found')
+    all_embeddings = []
+    all_labels = []
+    for student_dir in models_path.iterdir():
+        if student_dir.is_dir():
+            model_file = student_dir / 'face_model.pkl'
+            if model_file.exists():
+                with open(model_file, 'rb') as f:
+                    student_model = pickle.load(f)
+                    if hasattr(student_model, '_fit_X'):
+                        all_embeddings.extend(student_model._fit_X)
+                        all_labels.extend([student_dir.name] * len(student_model._fit_X))
+    if not all_embeddings:
+        raise ValueError('No trained faces found')
+    return np.array(all_embeddings), np.array(all_labels)
+
+
+class RecognitionModelRegistry:
+    """Lazily load and cache the embedder and combined recognition model."""
+
+    def __init__(self, model_base_path: str = DEFAULT_MODEL_BASE_PATH, n_neighbors: int = KNN_N_NEIGHBORS,
+                 embedder_factory=None):
+        """
+        Initialize the registry. Nothing is loaded until first use.
+
+        Args:
+            model_base_path: Directory containing the face index or legacy models
+            n_neighbors: Neighbours used when building an index from legacy models
+            embedder_factory: Callable returning the embedder; defaults to keras_facenet.FaceNet
+        """
+        self.model_base_path = model_base_path
+        self.n_neighbors = n_neighbors
+        self.embedder_factory = embedder_factory
+        self._lock = threading.RLock()
+        self._embedder = None
+        self._model = None
+        self._stats = {
+            'embedder_loaded': False,
+            'embedder_load_seconds': None,
+            'embedder_memory_bytes': None,
+            'model_loaded': False,
+            'model_load_seconds': None,
+            'model_memory_bytes': None,
+            'model_samples': 0,
+            'model_labels': 0,
+            'model_backend': None,
+            'model_loaded_at': None,
+            'reload_count': 0,
+            'warmup_seconds': None,
+        }
+
+    def get_embedder(self):
+        """
+        Return the shared FaceNet embedder, loading it on first use.
+
+        Raises:
+            ImportError: If keras_facenet is not installed
+        """
+        if self._embedder is not None:
+            return self._embedder
+        with self._lock:
+            if self._embedder is None:
+                factory = self.embedder_factory
+                if factory is None:
+                    try:
+                        from keras_facenet import FaceNet
+                    except ImportError:
+                        print("ERROR: keras_facenet not installed. Install with: pip install keras-facenet")
+                        raise
+                    factory = FaceNet
+                rss_before = _current_rss_bytes()
+                started = time.perf_counter()
+                embedder = factory()
+                self._stats['embedder_load_seconds'] = round(time.perf_counter() - started, 3)
+                rss_after = _current_rss_bytes()
+                if rss_before is not None and rss_after is not None:
+                    self._stats['embedder_memory_bytes'] = rss_after - rss_before
+                self._stats['embedder_loaded'] = True
+                self._embedder = embedder
+                print(f"FaceNet embedder loaded in {self._stats['embedder_load_seconds']}s")
+        return self._embedder
+
+    def get_model(self):
+        """
+        Return the shared EmbeddingIndex, loading it on first use.
+
+        Raises:
+            FileNotFoundError: If no trained models exist
+            ValueError: If no trained faces could be collected
+        """
+        if self._model is not None:
+            return self._model
+        with self._lock:
+            if self._model is None:
+                self._model = self._load_model()
+        return self._model
+
+    def model_available(self) -> bool:
+        """True if an index or legacy models exist on disk; nothing is loaded."""
+        models_path = Path(self.model_base_path)
+        if EmbeddingIndex.exists(str(models_path / INDEX_DIR_NAME)) or (models_path / 'face_model.pkl').exists():
+            return True
+        return models_path.is_dir() and any((student_dir / 'face_model.pkl').exists()
+                                            for student_dir in models_path.iterdir() if student_dir.is_dir())
+
+    def _load_model(self):
+        """
+        Load the embedding index, converting a legacy pickled KNN model or
+        per-student models into an index when no index has been saved yet.
+        """
+        rss_before = _current_rss_bytes()
+        started = time.perf_counter()
+
+        models_path = Path(self.model_base_path)
+        index_dir = models_path / INDEX_DIR_NAME
+        if EmbeddingIndex.exists(str(index_dir)):
+            model = load_index(str(index_dir), centroid_shortlist=INDEX_CENTROID_SHORTLIST)
+        else:
+            embeddings, labels = load_legacy_embeddings(models_path)
+            model = build_index(embeddings, labels, n_neighbors=self.n_neighbors,
+                                dtype=INDEX_DTYPE, centroid_shortlist=INDEX_CENTROID_SHORTLIST)
+
+        self._stats['model_load_seconds'] = round(time.perf_counter() - started, 3)
+        rss_after = _current_rss_bytes()
+        if rss_before is not None and rss_after is not None:
+            self._stats['model_memory_bytes'] = rss_after - rss_before
+        self._stats['model_loaded'] = True
+        self._stats['model_loaded_at'] = time.time()
+        self._stats['model_samples'] = len(model)
+        self._stats['model_labels'] = len(model.classes_)
+        self._stats['model_backend'] = 'exact' if getattr(model, 'is_exact', True) else model.backend
+        return model
+
+    def reload(self):
+        """
+        Drop the cached model and load the current one from disk.
+
+        A model that was never loaded in this process (e.g. the parent of
+        out-of-process workers, which only watch reload_count) stays unloaded
+        until first use, as does an empty gallery after the last student was
+        removed.
+
+        Returns:
+            The reloaded model, or None if it was left unloaded
+        """
+        with self._lock:
+            loaded = self._model is not None
+            self._model = None
+            self._stats['model_loaded'] = False
+            self._stats['reload_count'] += 1
+            if not loaded or not self.model_available():
+                return None
+            return self.get_model()
+
+    def warmup(self):
+        """Load the embedder and run one dummy embedding so the first frame is not slow."""
+        embedder = self.get_embedder()
+        started = time.perf_counter()
+        embedder.embeddings([np.zeros((160, 160, 3), dtype=np.uint8)])
+        self._stats['warmup_seconds'] = round(time.perf_counter() - started, 3)
+        try:
+            self.get_model()
+        except (FileNotFoundError, ValueError):
+            # No enrolled students yet; the model is loaded on first session instead
+            pass
+
+    def stats(self) -> Dict[str, any]:
+        """Return load time and memory figures for the loaded components."""
+        return dict(self._stats, process_memory_bytes=_current_rss_bytes())
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry(model_base_path: str = DEFAULT_MODEL_BASE_PATH) -> RecognitionModelRegistry:
+    """Return the registry for this process, creating it on first call."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = RecognitionModelRegistry(model_base_path=model_base_path)
+    return _registry
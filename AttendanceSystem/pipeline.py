@@ -0,0 +1,190 @@
+"""
+Pipeline Building Blocks
+Bounded drop-oldest queues, per-stage latency counters and a fair shared
+worker pool used to connect the stages of attendance camera sessions
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Dict, Optional
+
+
+class DropOldestQueue:
+    """
+    Thread-safe bounded queue that never blocks the producer: when full, the
+    oldest item is discarded to make room. A maxsize of 1 keeps only the latest item.
+    """
+
+    def __init__(self, maxsize: int = 1, on_drop=None):
+        """
+        Args:
+            maxsize: Items kept before the oldest is discarded
+            on_drop: Called with each discarded item (e.g. to release its buffer)
+        """
+        self.maxsize = max(1, maxsize)
+        self.on_drop = on_drop
+        self._items = deque()
+        self._cond = threading.Condition()
+        self.put_count = 0
+        self.dropped = 0
+
+    def put(self, item: Any):
+        dropped = None
+        with self._cond:
+            if len(self._items) >= self.maxsize:
+                dropped = self._items.popleft()
+                self.dropped += 1
+            self._items.append(item)
+            self.put_count += 1
+            self._cond.notify()
+        if dropped is not None and self.on_drop is not None:
+            self.on_drop(dropped)
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Any]:
+        """Return the oldest item, or None if nothing arrived within timeout."""
+        with self._cond:
+            if not self._items:
+                self._cond.wait(timeout)
+            if not self._items:
+                return None
+            return self._items.popleft()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def stats(self) -> Dict[str, int]:
+        return {'size': len(self._items), 'maxsize': self.maxsize, 'put': self.put_count, 'dropped': self.dropped}
+
+
+class StageStats:
+    """Count and latency of one pipeline stage."""
+
+    # Weight of the newest sample in the moving average
+    SMOOTHING = 0.1
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.count = 0
+        self.last = 0.0
+        self.average = 0.0
+        self.peak = 0.0
+
+    def record(self, seconds: float):
+        with self._lock:
+            self.count += 1
+            self.last = seconds
+            self.average = seconds if self.count == 1 else self.average + self.SMOOTHING * (seconds - self.average)
+            self.peak = max(self.peak, seconds)
+
+    def time(self) -> '_StageTimer':
+        """Context manager that records the duration of its block."""
+        return _StageTimer(self)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                'count': self.count,
+                'last_ms': round(self.last * 1000, 1),
+                'avg_ms': round(self.average * 1000, 1),
+                'max_ms': round(self.peak * 1000, 1),
+            }
+
+
+class _StageTimer:
+    def __init__(self, stage: StageStats):
+        self.stage = stage
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.stage.record(time.perf_counter() - self.started)
+        return False
+
+
+class FairWorkerPool:
+    """
+    Fixed set of worker threads shared by many producers (e.g. camera sessions).
+
+    Each producer has its own job queue and workers take one job per producer
+    in turn, so a busy camera cannot starve the others.
+    """
+
+    def __init__(self, workers: int = 1, name: str = 'worker'):
+        self._cond = threading.Condition()
+        self._jobs: Dict[Any, deque] = {}
+        self._ready = deque()  # producers with pending jobs, in service order
+        self.queue_wait = StageStats()
+        self.run_time = StageStats()
+        self.completed = 0
+        self.failed = 0
+        self.workers = max(1, workers)
+        for i in range(self.workers):
+            threading.Thread(target=self._work, name=f"{name}-{i}", daemon=True).start()
+
+    def submit(self, key: Any, fn, *args) -> Future:
+        """Queue fn(*args) on behalf of producer key and return its Future."""
+        future = Future()
+        with self._cond:
+            jobs = self._jobs.setdefault(key, deque())
+            if not jobs:
+                self._ready.append(key)
+            jobs.append((future, fn, args, time.perf_counter()))
+            self._cond.notify()
+        return future
+
+    def discard(self, key: Any):
+        """Cancel a producer's pending jobs and forget it."""
+        with self._cond:
+            for future, _, _, _ in self._jobs.pop(key, ()):
+                future.cancel()
+            if key in self._ready:
+                self._ready.remove(key)
+
+    def pending(self) -> int:
+        with self._cond:
+            return sum(len(jobs) for jobs in self._jobs.values())
+
+    def _next_job(self):
+        with self._cond:
+            while not self._ready:
+                self._cond.wait()
+            key = self._ready.popleft()
+            jobs = self._jobs[key]
+            job = jobs.popleft()
+            if jobs:
+                # Back of the line until every other producer has had a turn
+                self._ready.append(key)
+            else:
+                del self._jobs[key]
+            return job
+
+    def _work(self):
+        while True:
+            future, fn, args, queued_at = self._next_job()
+            if not future.set_running_or_notify_cancel():
+                continue
+            self.queue_wait.record(time.perf_counter() - queued_at)
+            started = time.perf_counter()
+            try:
+                result = fn(*args)
+            except Exception as e:
+                self.failed += 1
+                future.set_exception(e)
+            else:
+                self.completed += 1
+                future.set_result(result)
+            self.run_time.record(time.perf_counter() - started)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'workers': self.workers,
+            'pending': self.pending(),
+            'completed': self.completed,
+            'failed': self.failed,
+            'queue_wait': self.queue_wait.stats(),
+            'run_time': self.run_time.stats(),
+        }
@@ -0,0 +1,95 @@
+"""
+Batched Face Recognition Helpers
+Embeds every face crop of a frame in one FaceNet call and matches them all
+with a single nearest-neighbour query
+"""
+
+from typing import List, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from pipeline import FairWorkerPool
+
+try:
+    from recognition_config import EMBEDDING_WORKERS
+except ImportError:
+    EMBEDDING_WORKERS = 1
+
+
+FACE_SIZE = (160, 160)
+
+
+def prepare_face(rgb_frame: np.ndarray, box: Sequence[int]) -> np.ndarray:
+    """
+    Crop a detected face from an RGB frame and prepare it for FaceNet.
+
+    Args:
+        rgb_frame: Full camera frame in RGB order
+        box: Face rectangle as (x, y, w, h)
+
+    Returns:
+        160x160 RGB face image with min-max lighting normalization
+    """
+    x, y, w, h = box
+    face_img = rgb_frame[y:y+h, x:x+w]
+    face_img_normalized = cv2.normalize(face_img, None, 0, 255, cv2.NORM_MINMAX)
+    return cv2.resize(face_img_normalized, FACE_SIZE)
+
+
+def recognize_faces(embedder, model, face_images: List[np.ndarray]) -> List[Tuple[str, float]]:
+    """
+    Embed and match all faces of one frame in a single batch.
+
+    Args:
+        embedder: FaceNet embedder
+        model: EmbeddingIndex from the model registry
+        face_images: Faces prepared with prepare_face()
+
+    Returns:
+        List of (student_id, nearest distance) in the same order as face_images
+    """
+    if not face_images:
+        return []
+    embeddings = embedder.embeddings(face_images)
+    labels, distances = model.match(embeddings)
+    return [(str(label), float(distance)) for label, distance in zip(labels, distances)]
+
+
+class RecognitionWorkerPool:
+    """
+    Embedding workers shared by every camera session in the process.
+
+    Sessions submit the faces of a frame under their own key; the workers
+    serve sessions round-robin. The model is fetched from the registry on
+    every job, so a reload after enrollment is picked up by running sessions.
+    """
+
+    def __init__(self, registry, workers: int = EMBEDDING_WORKERS):
+        """
+        Args:
+            registry: RecognitionModelRegistry holding the embedder and index
+            workers: Number of embedding threads
+        """
+        self.registry = registry
+        self.pool = FairWorkerPool(workers, name='recognition')
+
+    def _recognize(self, face_images: List[np.ndarray]) -> List[Tuple[str, float]]:
+        return recognize_faces(self.registry.get_embedder(), self.registry.get_model(), face_images)
+
+    def submit(self, key, face_images: List[np.ndarray]):
+        """Queue one frame's faces for session key; returns a Future of recognize_faces() output."""
+        return self.pool.submit(key, self._recognize, face_images)
+
+    def recognize(self, key, face_images: List[np.ndarray], timeout: float = None) -> List[Tuple[str, float]]:
+        """Recognize one frame's faces on the shared workers and wait for the result."""
+        if not face_images:
+            return []
+        return self.submit(key, face_images).result(timeout)
+
+    def release(self, key):
+        """Drop a stopped session's pending work."""
+        self.pool.discard(key)
+
+    def stats(self):
+        return dict(self.pool.stats(), mode='thread')
@@ -20,6 +20,50 @@ FACE_DETECTION_MIN_SIZE = (80, 80)  # Minimum face size in pixels
 # KNN classifier parameters
 KNN_N_NEIGHBORS = 3  # Number of neighbors to consider (3-5 recommended)
 
+# Embedding index parameters
+INDEX_DTYPE = 'float32'  # 'float16' halves index memory at a small precision cost
+INDEX_CENTROID_SHORTLIST = 0  # 0 = exact; N > 0 only searches the N students with the closest centroids (approximate, faster)
+
+# Approximate nearest-neighbour (IVF) parameters
+ANN_BACKEND = 'ivf'  # 'ivf' = inverted-file approximate search, 'exact' = always search every embedding
+ANN_N_LISTS = 0  # Inverted lists (k-means clusters); 0 = about sqrt(number of embeddings)
+ANN_N_PROBE = 8  # Lists searched per face; higher = better recall, lower throughput
+ANN_MIN_SAMPLES = 5000  # Galleries smaller than this always use exact search
+ANN_RETRAIN_DRIFT = 0.5  # Re-cluster the lists once enrollments/removals change the gallery size by this fraction
+
+# Face tracking parameters (the camera loop only embeds new or uncertain faces)
+TRACK_IOU_THRESHOLD = 0.3  # Minimum box overlap for a detection to continue a track
+TRACK_MAX_MISSES = 5  # Frames a track survives without a matching detection
+TRACK_REEMBED_INTERVAL = 10  # Frames between re-embeddings of a confidently recognized face
+TRACK_CONFIDENT_DISTANCE = 0.7  # Matches between this and RECOGNITION_THRESHOLD are re-embedded every frame
+
+# Attendance session pipeline parameters
+PIPELINE_EVENT_QUEUE_SIZE = 256  # Pending attendance/unknown events before the oldest is dropped
+EMBEDDING_WORKERS = 1  # Embedding threads shared by all cameras (TensorFlow already uses several cores per call)
+INFERENCE_MODE = 'thread'  # 'thread' = embed inside the web process, 'process' = separate worker processes
+INFERENCE_PROCESSES = 2  # Worker processes when INFERENCE_MODE = 'process' (each loads its own FaceNet)
+INFERENCE_MAX_FACES = 16  # Faces per shared-memory buffer sent to a worker process
+MAX_CAMERA_SESSIONS = 8  # Concurrent attendance cameras per server process
+ADMISSION_MAX_CPU_LOAD = 0.9  # Refuse new cameras above this CPU utilisation (0-1)
+ADMISSION_MAX_QUEUE_WAIT_MS = 250  # Refuse new cameras while faces wait longer than this for an embedding worker
+ATTENDANCE_COOLDOWN_SECONDS = 10  # Ignore further sightings of a student this long after recording their check-in/out
+WRITE_BEHIND_BATCH_SIZE = 20  # Write buffered check-ins/check-outs once this many are waiting
+WRITE_BEHIND_INTERVAL_MS = 500  # ...or once the oldest has waited this long
+
+# Live video feed parameters
+STREAM_JPEG_QUALITY = 80  # JPEG quality of the MJPEG feeds
+STREAM_LOW_JPEG_QUALITY = 50  # Quality sent to viewers that cannot keep up even at a low frame rate
+STREAM_MAX_FPS = 30  # Frame rate cap per viewer
+STREAM_MIN_FPS = 2  # Slow viewers are throttled down to this frame rate
+
+# Gallery compaction parameters
+GALLERY_PROTOTYPES = 0  # Embeddings kept per student in the serving gallery; 0 = keep all (3-5 recommended)
+GALLERY_COMPACTION_METHOD = 'medoids'  # 'medoids' = k-means medoids, 'centroid' = centroid plus outliers
+
+# Training throughput parameters
+EMBEDDING_BATCH_SIZE = 32  # Images per FaceNet call when training (32-64 recommended on CPU)
+DECODE_WORKERS = 4  # Threads reading and decoding dataset images
+
 # Camera settings recommendations
 """
 For better face recognition accuracy:
@@ -1,39 +1,107 @@
 """
 Enhanced Face Recognition Training Module for Web Integration
-Trains a KNN classifier on face embeddings using FaceNet
+Builds a nearest-neighbour embedding index over FaceNet face embeddings
 """
 
 import cv2
 import os
 import numpy as np
 import pickle
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Tuple, List, Dict
 
+from ann_index import ANN_BACKEND, build_index, load_index
+from embedding_cache import EmbeddingCache
+from embedding_index import EmbeddingIndex
+from embedding_store import EmbeddingStore
+from gallery_compaction import compact_gallery, evaluate_compaction
+from model_registry import EMBEDDER_MODEL_VERSION, INDEX_DIR_NAME, get_registry, load_legacy_embeddings
+
+
+# Bump whenever preprocess_image changes so cached embeddings are recomputed
+PREPROCESSING_VERSION = 'minmax-normalize|bgr2rgb'
+
+try:
+	from recognition_config import EMBEDDING_BATCH_SIZE, DECODE_WORKERS, INDEX_DTYPE, GALLERY_PROTOTYPES
+except ImportError:
+	EMBEDDING_BATCH_SIZE = 32
+	DECODE_WORKERS = 4
+	INDEX_DTYPE = 'float32'
+	GALLERY_PROTOTYPES = 0
+
 
 class FaceRecognitionTrainer:
 	"""Train face recognition models for attendance system."""
 	
-	def __init__(self, dataset_base_path: str = 'dataset', model_base_path: str = 'models'):
+	def __init__(self, dataset_base_path: str = 'dataset', model_base_path: str = 'models',
+				 batch_size: int = EMBEDDING_BATCH_SIZE, decode_workers: int = DECODE_WORKERS,
+				 gallery_prototypes: int = GALLERY_PROTOTYPES):
 		"""
 		Initialize the trainer.
 		
 		Args:
 			dataset_base_path: Base directory for student face datasets
 			model_base_path: Base directory for trained models
+			batch_size: Number of images sent to the embedder per call
+			decode_workers: Threads used to read and decode images
+			gallery_prototypes: Embeddings per student kept in the serving index
+				(0 keeps all); the embedding store always keeps every embedding
 		"""
 		self.dataset_base_path = dataset_base_path
 		self.model_base_path = model_base_path
+		self.batch_size = max(1, batch_size)
+		self.decode_workers = max(1, decode_workers)
+		self.gallery_prototypes = max(0, gallery_prototypes)
 		os.makedirs(self.dataset_base_path, exist_ok=True)
 		os.makedirs(self.model_base_path, exist_ok=True)
-		
-		# Import FaceNet embedder
-		try:
-			from keras_facenet import FaceNet
-			self.embedder = FaceNet()
-		except ImportError:
-			print("ERROR: keras_facenet not installed. Install with: pip install keras-facenet")
-			raise
+		self._embedder = None
+		self.embedding_cache = EmbeddingCache(
+			os.path.join(self.model_base_path, 'embedding_cache'),
+			namespace=f"{EMBEDDER_MODEL_VERSION}|{PREPROCESSING_VERSION}"
+		)
+		self._stats_lock = threading.Lock()
+		self.reset_stage_stats()
+	
+	def reset_stage_stats(self):
+		"""Clear the per-stage timing counters reported by throughput_stats()."""
+		self._stage_stats = {
+			stage: {'images': 0, 'seconds': 0.0}
+			for stage in ('read', 'decode', 'preprocess', 'embed')
+		}
+		self.embedding_cache.hits = 0
+		self.embedding_cache.misses = 0
+	
+	def _record_stage(self, stage: str, images: int, seconds: float):
+		with self._stats_lock:
+			self._stage_stats[stage]['images'] += images
+			self._stage_stats[stage]['seconds'] += seconds
+	
+	def throughput_stats(self) -> Dict[str, Dict[str, float]]:
+		"""
+		Return images processed, seconds spent and images per second for each
+		stage since the last reset_stage_stats(). Decode, read and preprocess
+		seconds are summed across worker threads.
+		"""
+		stats = {}
+		for stage, counters in self._stage_stats.items():
+			seconds = counters['seconds']
+			stats[stage] = {
+				'images': counters['images'],
+				'seconds': round(seconds, 3),
+				'images_per_second': round(counters['images'] / seconds, 1) if seconds > 0 else None,
+			}
+		stats['cache'] = {'hits': self.embedding_cache.hits, 'misses': self.embedding_cache.misses}
+		return stats
+	
+	@property
+	def embedder(self):
+		"""Process-wide FaceNet embedder, loaded on first use."""
+		if self._embedder is None:
+			self._embedder = get_registry().get_embedder()
+		return self._embedder
 	
 	def preprocess_image(self, image_path: str) -> np.ndarray:
 		"""
@@ -48,10 +116,30 @@ class FaceRecognitionTrainer:
 		Raises:
 			ValueError: If image cannot be loaded
 		"""
-		img = cv2.imread(image_path)
-		if img is None:
+		try:
+			with open(image_path, 'rb') as f:
+				data = f.read()
+		except OSError:
 			raise ValueError(f"Could not load image: {image_path}")
+		return self.decode_image(data, image_path)
+	
+	def decode_image(self, data: bytes, image_path: str = '<bytes>') -> np.ndarray:
+		"""
+		Decode and preprocess encoded image bytes (see preprocess_image).
 		
+		Raises:
+			ValueError: If the bytes are not a readable image
+		"""
+		return self.normalize_image(self._decode_bytes(data, image_path))
+	
+	def _decode_bytes(self, data: bytes, image_path: str) -> np.ndarray:
+		img = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+		if img is None:
+			raise ValueError(f"Could not load image: {image_path}")
+		return img
+	
+	def normalize_image(self, img: np.ndarray) -> np.ndarray:
+		"""Apply lighting normalization to a decoded BGR image and convert it to RGB."""
 		# Apply lighting normalization
 		img_normalized = cv2.normalize(img, None, 0, 255, cv2.NORM_MINMAX)
 		
@@ -63,6 +151,9 @@ class FaceRecognitionTrainer:
 		"""
 		Load all face images for a student and extract embeddings.
 		
+		Embeddings of images seen before are read from the embedding cache;
+		call self.embedding_cache.flush() afterwards to persist new ones.
+		
 		Args:
 			student_id: Student identifier (e.g., REG001)
 			
@@ -90,21 +181,36 @@ class FaceRecognitionTrainer:
 		
 		print(f"Loading {len(image_files)} images for {student_id}...")
 		
-		for image_name in image_files:
-			image_path = os.path.join(student_dir, image_name)
-			try:
-				img = self.preprocess_image(image_path)
-				
-				# Extract embedding using FaceNet
-				embedding = self.embedder.embeddings([img])[0]
-				embeddings.append(embedding)
-				labels.append(student_id)
-				
-				print(f"  ✓ Processed {image_name}")
-				
-			except Exception as e:
-				print(f"  ✗ Error processing {image_name}: {str(e)}")
+		# Read, hash and decode in background threads; cached images skip decoding
+		image_paths = [os.path.join(student_dir, name) for name in image_files]
+		with ThreadPoolExecutor(max_workers=self.decode_workers) as pool:
+			loaded = list(pool.map(self._load_image, image_paths))
+		
+		results = [None] * len(image_files)
+		pending = []
+		for i, (image_name, item) in enumerate(zip(image_files, loaded)):
+			if isinstance(item, Exception):
+				results[i] = item
+			elif item[1] is not None:
+				results[i] = item[1]
+			else:
+				pending.append(i)
+		
+		# Embed cache misses in batches to amortize TensorFlow dispatch overhead
+		for start in range(0, len(pending), self.batch_size):
+			batch = pending[start:start + self.batch_size]
+			for i, embedding in zip(batch, self._embed_batch([loaded[i][2] for i in batch])):
+				results[i] = embedding
+				if not isinstance(embedding, Exception):
+					self.embedding_cache.put(loaded[i][0], embedding)
+		
+		for image_name, result in zip(image_files, results):
+			if isinstance(result, Exception):
+				print(f"  ✗ Error processing {image_name}: {str(result)}")
 				continue
+			embeddings.append(result)
+			labels.append(student_id)
+			print(f"  ✓ Processed {image_name}")
 		
 		if len(embeddings) < 5:
 			raise ValueError(
@@ -115,6 +221,56 @@ class FaceRecognitionTrainer:
 		print(f"Successfully loaded {len(embeddings)} embeddings\n")
 		return np.array(embeddings), np.array(labels)
 	
+	def _load_image(self, image_path: str):
+		"""
+		Read one dataset image and look it up in the embedding cache.
+		
+		Returns:
+			Tuple of (cache key, cached embedding or None, preprocessed image or
+			None), or the exception raised while loading
+		"""
+		try:
+			started = time.perf_counter()
+			with open(image_path, 'rb') as f:
+				data = f.read()
+			cache_key = self.embedding_cache.key_for(data)
+			self._record_stage('read', 1, time.perf_counter() - started)
+			with self._stats_lock:
+				embedding = self.embedding_cache.get(cache_key)
+			if embedding is not None:
+				return cache_key, embedding, None
+			
+			started = time.perf_counter()
+			img = self._decode_bytes(data, image_path)
+			self._record_stage('decode', 1, time.perf_counter() - started)
+			
+			started = time.perf_counter()
+			img = self.normalize_image(img)
+			self._record_stage('preprocess', 1, time.perf_counter() - started)
+			return cache_key, None, img
+		except Exception as e:
+			return e
+	
+	def _embed_batch(self, images: List[np.ndarray]) -> List:
+		"""
+		Embed a batch of preprocessed images with one FaceNet call.
+		
+		Falls back to one call per image if the batch fails, so a single bad
+		image only loses its own embedding. Failed entries are exceptions.
+		"""
+		started = time.perf_counter()
+		try:
+			embeddings = list(self.embedder.embeddings(images))
+		except Exception:
+			embeddings = []
+			for img in images:
+				try:
+					embeddings.append(self.embedder.embeddings([img])[0])
+				except Exception as e:
+					embeddings.append(e)
+		self._record_stage('embed', len(images), time.perf_counter() - started)
+		return embeddings
+	
 	def train_knn_classifier(self, embeddings: np.ndarray, labels: np.ndarray, n_neighbors: int = 3):
 		"""
 		Train a KNN classifier on face embeddings.
@@ -164,7 +320,9 @@ class FaceRecognitionTrainer:
 			# Load dataset
 			print("STEP 1: Loading Dataset")
 			print("-" * 60)
+			self.reset_stage_stats()
 			X, y = self.load_dataset(student_id)
+			self.embedding_cache.flush()
 			
 			# Train classifier
 			print("STEP 2: Training Classifier")
@@ -199,7 +357,8 @@ class FaceRecognitionTrainer:
 				'student_id': student_id,
 				'model_path': model_path,
 				'samples': len(X),
-				'accuracy': float(accuracy)
+				'accuracy': float(accuracy),
+				'throughput': self.throughput_stats()
 			}
 			
 		except Exception as e:
@@ -234,45 +393,299 @@ class FaceRecognitionTrainer:
 
 	def train_all(self, n_neighbors: int = 3) -> Dict[str, any]:
 		"""
-		Train a single combined KNN classifier for all students found under dataset_base_path
-		and save it to models/face_model.pkl (single file, no subdirectories).
+		Build a single combined embedding index for all students found under
+		dataset_base_path and save it to models/face_index/.
 		"""
 		try:
 			print("=" * 60)
 			print("STARTING TRAINING FOR ALL STUDENTS")
 			print("=" * 60 + "\n")
 			# Iterate all student folders
-			student_dirs = sorted([d for d in os.listdir(self.dataset_base_path) if os.path.isdir(os.path.join(self.dataset_base_path, d))])
-			all_embeddings = []
-			all_labels = []
-			for sid in student_dirs:
+			self.reset_stage_stats()
+			X, y = self._embed_all_datasets()
+			# Build and save combined index
+			index, combined_path = self._save_combined_model(X, y, n_neighbors=n_neighbors)
+			# Persist embeddings so later enrollments only embed the new student
+			store = EmbeddingStore(self.model_base_path)
+			store.set_all(X, y)
+			store.save()
+			accuracy = index.score(X, y)
+			return {'success': True, 'model_path': combined_path, 'samples': len(X), 'gallery_samples': len(index), 'unique_labels': len(set(y)), 'accuracy': float(accuracy), 'throughput': self.throughput_stats()}
+		except Exception as e:
+			error_msg = str(e)
+			print(f"\n✗ TRAINING ALL FAILED: {error_msg}\n")
+			return {'success': False, 'error': error_msg}
+
+	def _embed_all_datasets(self) -> Tuple[np.ndarray, np.ndarray]:
+		"""
+		Embed every student folder under dataset_base_path.
+		
+		Raises:
+			ValueError: If no embeddings could be extracted
+		"""
+		student_dirs = sorted([d for d in os.listdir(self.dataset_base_path) if os.path.isdir(os.path.join(self.dataset_base_path, d))])
+		all_embeddings = []
+		all_labels = []
+		for sid in student_dirs:
+			try:
+				x, y = self.load_dataset(sid)
+				all_embeddings.extend(x.tolist())
+				all_labels.extend(y.tolist())
+			except Exception as e:
+				print(f"Skipping {sid}: {e}")
+				continue
+		self.embedding_cache.flush()
+		if not all_embeddings:
+			raise ValueError("No embeddings found across datasets; aborting training")
+		return np.array(all_embeddings), np.array(all_labels)
+
+	def _save_combined_model(self, X: np.ndarray, y: np.ndarray, n_neighbors: int = 3):
+		"""
+		Build the combined embedding index and save it to models/face_index/.
+		
+		With gallery_prototypes set, each student's embeddings are first
+		condensed into that many prototypes.
+		
+		Returns:
+			Tuple of (EmbeddingIndex, index directory)
+		"""
+		if self.gallery_prototypes:
+			full_size = len(X)
+			X, y = compact_gallery(X, y, self.gallery_prototypes)
+			# Never vote with more neighbours than a student has prototypes
+			n_neighbors = min(n_neighbors, self.gallery_prototypes)
+			print(f"Gallery compacted to {self.gallery_prototypes} prototypes per student: {full_size} -> {len(X)} embeddings")
+		index = build_index(X, y, n_neighbors=n_neighbors, dtype=INDEX_DTYPE)
+		index_dir = os.path.join(self.model_base_path, INDEX_DIR_NAME)
+		index.save(index_dir)
+		print(f"Combined index saved to: {index_dir} ({len(index)} embeddings, {len(index.classes_)} students)\n")
+		return index, index_dir
+
+	def _update_combined_model(self, store: EmbeddingStore, student_id: str, n_neighbors: int = 3):
+		"""
+		Apply one student's change, already made in the store, to the saved index.
+		
+		Only that student's rows are swapped; with IVF they are assigned to the
+		existing lists, which are re-clustered once the gallery has drifted
+		(see IVFEmbeddingIndex.needs_retrain). The index is rebuilt from the
+		whole store when none matching the store and settings exists.
+		
+		Returns:
+			Tuple of (EmbeddingIndex, index directory)
+		"""
+		votes = min(n_neighbors, self.gallery_prototypes) if self.gallery_prototypes else n_neighbors
+		try:
+			index = self.load_index()
+		except (FileNotFoundError, ValueError):
+			index = None
+		if (index is None or index.backend != ANN_BACKEND or index.n_neighbors != votes
+				or str(index.vectors.dtype) != INDEX_DTYPE
+				or set(index.classes_.tolist()) - {student_id} != set(store.students()) - {student_id}):
+			return self._save_combined_model(store.embeddings, store.labels, n_neighbors=n_neighbors)
+		
+		embeddings = store.embeddings[store.labels == student_id]
+		if self.gallery_prototypes and len(embeddings):
+			embeddings, _ = compact_gallery(embeddings, np.array([student_id] * len(embeddings)), self.gallery_prototypes)
+		index = index.replace_student(student_id, embeddings if len(embeddings) else None)
+		if getattr(index, 'needs_retrain', False):
+			print(f"Gallery changed from {index.trained_samples} to {len(index)} embeddings; re-clustering index lists")
+			index = index.retrained()
+		index_dir = os.path.join(self.model_base_path, INDEX_DIR_NAME)
+		index.save(index_dir)
+		print(f"Combined index updated: {index_dir} ({len(index)} embeddings, {len(index.classes_)} students)\n")
+		return index, index_dir
+
+	def rebuild_index(self, n_neighbors: int = 3) -> Dict[str, any]:
+		"""
+		Rebuild the combined index from the embedding store, re-clustering any
+		IVF lists, without embedding images again.
+		"""
+		try:
+			store = self.load_store()
+			if not len(store):
+				raise ValueError("No embeddings stored; run train_all() first")
+			index, index_dir = self._save_combined_model(store.embeddings, store.labels, n_neighbors=n_neighbors)
+			return {'success': True, 'model_path': index_dir, 'samples': len(store), 'gallery_samples': len(index),
+					'unique_labels': len(index.classes_)}
+		except Exception as e:
+			error_msg = str(e)
+			print(f"\n✗ INDEX REBUILD FAILED: {error_msg}\n")
+			return {'success': False, 'error': error_msg}
+
+	def load_store(self) -> EmbeddingStore:
+		"""
+		Load the persisted embedding store.
+		
+		When the store has not been written yet (an install trained before it
+		existed), it is seeded with every student already enrolled, so the
+		first incremental write does not leave the others out of the index:
+		the legacy combined or per-student models first, then any dataset
+		folder none of them covers (embedded once, through the embedding cache).
+		"""
+		store = EmbeddingStore(self.model_base_path).load()
+		if not store.exists():
+			try:
+				X, y = load_legacy_embeddings(Path(self.model_base_path))
+				store.set_all(X, y)
+			except (FileNotFoundError, ValueError):
+				pass
+			enrolled = set(store.students())
+			for sid in sorted(os.listdir(self.dataset_base_path)):
+				if sid in enrolled or not os.path.isdir(os.path.join(self.dataset_base_path, sid)):
+					continue
 				try:
-					x, y = self.load_dataset(sid)
-					all_embeddings.extend(x.tolist())
-					all_labels.extend(y.tolist())
+					X, _ = self.load_dataset(sid)
+					store.add_student(sid, X)
 				except Exception as e:
 					print(f"Skipping {sid}: {e}")
-					continue
-			if not all_embeddings:
-				raise ValueError("No embeddings found across datasets; aborting training")
-			X = np.array(all_embeddings)
-			y = np.array(all_labels)
-			# Train classifier
-			knn = self.train_knn_classifier(X, y, n_neighbors=n_neighbors)
-			# Save combined model and training data into a single file
-			combined_path = os.path.join(self.model_base_path, 'face_model.pkl')
-			with open(combined_path, 'wb') as f:
-				pickle.dump({'knn': knn, 'embeddings': X, 'labels': y}, f)
-			print(f"Combined model saved to: {combined_path}\n")
-			accuracy = knn.score(X, y)
-			return {'success': True, 'model_path': combined_path, 'samples': len(X), 'unique_labels': len(set(y)), 'accuracy': float(accuracy)}
+			self.embedding_cache.flush()
+		return store
+
+	def enroll_student(self, student_id: str, n_neighbors: int = 3) -> Dict[str, any]:
+		"""
+		Add one student to the combined model without re-embedding anyone else.
+		
+		Only the student's own images are embedded; their rows are appended to
+		the embedding store (replacing any previous rows) and swapped into the
+		saved index without rebuilding it.
+		
+		Args:
+			student_id: Student identifier (e.g., REG001)
+			n_neighbors: Number of neighbors for KNN
+			
+		Returns:
+			Dictionary with enrollment results
+		"""
+		try:
+			if not isinstance(student_id, str) or len(student_id) < 4:
+				raise ValueError("Invalid student ID format")
+			
+			print("=" * 60)
+			print(f"ENROLLING: {student_id}")
+			print("=" * 60 + "\n")
+			
+			self.reset_stage_stats()
+			X_new, y_new = self.load_dataset(student_id)
+			self.embedding_cache.flush()
+			
+			# Per-student legacy model, fit from the embeddings just computed
+			student_knn = self.train_knn_classifier(X_new, y_new)
+			model_dir = os.path.join(self.model_base_path, student_id)
+			os.makedirs(model_dir, exist_ok=True)
+			with open(os.path.join(model_dir, 'face_model.pkl'), 'wb') as f:
+				pickle.dump(student_knn, f)
+			
+			store = self.load_store()
+			store.add_student(student_id, X_new)
+			index, combined_path = self._update_combined_model(store, student_id, n_neighbors=n_neighbors)
+			store.save()
+			
+			accuracy = index.score(X_new, y_new)
+			return {
+				'success': True,
+				'student_id': student_id,
+				'model_path': combined_path,
+				'samples': len(X_new),
+				'total_samples': len(store),
+				'gallery_samples': len(index),
+				'unique_labels': len(store.students()),
+				'accuracy': float(accuracy),
+				'throughput': self.throughput_stats()
+			}
 		except Exception as e:
 			error_msg = str(e)
-			print(f"\n✗ TRAINING ALL FAILED: {error_msg}\n")
-			return {'success': False, 'error': error_msg}
+			print(f"\n✗ ENROLLMENT FAILED: {error_msg}\n")
+			return {
+				'success': False,
+				'student_id': student_id,
+				'error': error_msg
+			}
+
+	def remove_student(self, student_id: str, n_neighbors: int = 3, delete_dataset: bool = False) -> Dict[str, any]:
+		"""
+		Remove a student from the combined model and delete their per-student model.
+		
+		Args:
+			student_id: Student identifier
+			n_neighbors: Number of neighbors for KNN
+			delete_dataset: Also delete the student's captured face images, so a
+				later full retrain does not enroll them again
+			
+		Returns:
+			Dictionary with removal results
+		"""
+		import shutil
+		try:
+			store = self.load_store()
+			removed = store.remove_student(student_id)
+			if len(store):
+				self._update_combined_model(store, student_id, n_neighbors=n_neighbors)
+			else:
+				# Nobody left: drop the index and the legacy combined model
+				shutil.rmtree(os.path.join(self.model_base_path, INDEX_DIR_NAME), ignore_errors=True)
+				legacy_path = os.path.join(self.model_base_path, 'face_model.pkl')
+				if os.path.exists(legacy_path):
+					os.remove(legacy_path)
+			store.save()
+			
+			shutil.rmtree(os.path.join(self.model_base_path, student_id), ignore_errors=True)
+			if delete_dataset:
+				shutil.rmtree(os.path.join(self.dataset_base_path, student_id), ignore_errors=True)
+			
+			return {
+				'success': True,
+				'student_id': student_id,
+				'removed_samples': removed,
+				'total_samples': len(store),
+				'unique_labels': len(store.students())
+			}
+		except Exception as e:
+			error_msg = str(e)
+			print(f"\n✗ REMOVAL FAILED: {error_msg}\n")
+			return {
+				'success': False,
+				'student_id': student_id,
+				'error': error_msg
+			}
+
+	def collect_embeddings(self) -> Tuple[np.ndarray, np.ndarray]:
+		"""
+		Return every student's full set of embeddings: from the embedding store
+		if one exists, otherwise by embedding the datasets (cached images are
+		not re-embedded).
+		"""
+		store = self.load_store()
+		if len(store):
+			return store.embeddings, store.labels
+		return self._embed_all_datasets()
+
+	def evaluate_compaction(self, n_prototypes: int, holdout_fraction: float = 0.2, n_neighbors: int = 3) -> Dict[str, any]:
+		"""
+		Report how a prototype gallery changes accuracy versus the full gallery,
+		on held-out frames from the existing student datasets. Nothing is saved.
+		
+		Args:
+			n_prototypes: Prototypes per student to evaluate
+			holdout_fraction: Fraction of each student's frames used as queries
+			n_neighbors: Number of neighbors for KNN
+			
+		Returns:
+			Dictionary from gallery_compaction.evaluate_compaction()
+		"""
+		X, y = self.collect_embeddings()
+		return evaluate_compaction(X, y, n_prototypes, n_neighbors=n_neighbors, holdout_fraction=holdout_fraction)
+
+	def load_index(self) -> EmbeddingIndex:
+		"""
+		Load the combined embedding index saved by train_all() or enroll_student().
+		
+		Raises:
+			FileNotFoundError: If no index has been saved
+		"""
+		return load_index(os.path.join(self.model_base_path, INDEX_DIR_NAME))
 
 	def load_combined_model(self):
-		"""Load the combined model file saved by train_all() and return dict with knn, embeddings, labels"""
+		"""Load the legacy pickled combined model and return dict with knn, embeddings, labels"""
 		combined_path = os.path.join(self.model_base_path, 'face_model.pkl')
 		if not os.path.exists(combined_path):
 			raise FileNotFoundError(f"Combined model not found: {combined_path}")
@@ -3,6 +3,12 @@ ASGI config for AttendnaceTracker project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+The live video feeds and camera status endpoints are async views. They also
+work under WSGI (runserver), where each open feed holds a worker thread;
+serving the project with an ASGI server (e.g. ``uvicorn
+AttendnaceTracker.asgi:application``) lets each open feed wait on an event
+instead.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
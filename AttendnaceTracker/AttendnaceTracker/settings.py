@@ -69,6 +69,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'AttendnaceTracker.wsgi.application'
+ASGI_APPLICATION = 'AttendnaceTracker.asgi.application'
 
 
 # Database
@@ -122,3 +123,9 @@ STATIC_URL = 'static/'
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Append-only spool of buffered camera attendance events, replayed after a crash
+ATTENDANCE_SPOOL_DIR = BASE_DIR / 'attendance_spool'
+
+# Write notifications from a background thread (False: inline, once the transaction commits)
+NOTIFICATION_DISPATCH_ASYNC = True
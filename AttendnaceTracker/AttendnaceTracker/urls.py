@@ -78,6 +78,8 @@ from api.views import (
     attendance_video_feed,
     attendance_status,
     stop_attendance_camera,
+    attendance_sessions,
+    attendance_events,
     face_dashboard_stats,
     crowd_report,
     unknown_faces,
@@ -140,6 +142,8 @@ urlpatterns = [
     path('api/attendance/stop/', stop_attendance_camera, name='stop_attendance'),
     path('api/attendance/status/<str:session_id>/', attendance_status, name='attendance_status'),
     path('api/attendance/video-feed/<str:session_id>/', attendance_video_feed, name='attendance_video_feed'),
+    path('api/attendance/sessions/', attendance_sessions, name='attendance_sessions'),
+    path('api/attendance/events/', attendance_events, name='attendance_events'),
     path('api/face-dashboard/stats/', face_dashboard_stats, name='face_dashboard_stats'),
     path('api/crowd-report/', crowd_report, name='crowd_report'),
     path('api/unknown-faces/', unknown_faces, name='unknown_faces'),
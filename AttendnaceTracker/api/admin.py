@@ -18,3 +18,4 @@ admin.site.register(HelpCenter)  # Register HelpCenter model for admin interface
 admin.site.register(Attendance)
 admin.site.register(UserProfile)
 admin.site.register(Notification)  # Register Notification model
+admin.site.register(NotificationBroadcast)
@@ -0,0 +1,676 @@
+"""
+Attendance camera session pipeline.
+
+Each session runs three stages connected by bounded drop-oldest queues so a
+slow stage never stalls the ones before it:
+
+    capture thread  --(latest frame)-->  inference thread  --(events)-->  persistence thread
+
+The capture thread only reads frames, the inference thread detects, tracks,
+recognizes and draws overlays, and the persistence thread writes Attendance
+and UnknownPerson records (attendance through a batched, spooled
+AttendanceWriter). Embeddings for every session run on one shared
+RecognitionWorkerPool owned by the CameraSessionManager.
+"""
+import os
+import time
+import threading
+
+import cv2
+import numpy as np
+from django.core.files.base import ContentFile
+from django.db import close_old_connections
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+
+from .attendance_writer import AttendanceWriter, replay_spools
+from .live_events import event_bus
+from .models import UserProfile, Attendance, UnknownPerson, CurrentPresence
+
+# face_recognition_views puts AttendanceSystem on sys.path before this module is imported
+from face_tracker import FaceTracker
+from frame_ring import FrameRing
+from mjpeg_broadcaster import existing_broadcaster
+from model_registry import get_registry
+from pipeline import DropOldestQueue, StageStats
+from recognition import RecognitionWorkerPool, prepare_face
+
+try:
+    from recognition_config import (
+        RECOGNITION_THRESHOLD,
+        CLAHE_CLIP_LIMIT,
+        CLAHE_TILE_SIZE,
+        FACE_DETECTION_SCALE_FACTOR,
+        FACE_DETECTION_MIN_NEIGHBORS,
+        PIPELINE_EVENT_QUEUE_SIZE,
+        EMBEDDING_WORKERS,
+        INFERENCE_MODE,
+        MAX_CAMERA_SESSIONS,
+        ADMISSION_MAX_CPU_LOAD,
+        ADMISSION_MAX_QUEUE_WAIT_MS,
+        ATTENDANCE_COOLDOWN_SECONDS,
+        WRITE_BEHIND_BATCH_SIZE,
+        WRITE_BEHIND_INTERVAL_MS
+    )
+except ImportError:
+    RECOGNITION_THRESHOLD = 0.85
+    CLAHE_CLIP_LIMIT = 2.0
+    CLAHE_TILE_SIZE = (8, 8)
+    FACE_DETECTION_SCALE_FACTOR = 1.1
+    FACE_DETECTION_MIN_NEIGHBORS = 5
+    PIPELINE_EVENT_QUEUE_SIZE = 256
+    EMBEDDING_WORKERS = 1
+    INFERENCE_MODE = 'thread'
+    MAX_CAMERA_SESSIONS = 8
+    ADMISSION_MAX_CPU_LOAD = 0.9
+    ADMISSION_MAX_QUEUE_WAIT_MS = 250
+    ATTENDANCE_COOLDOWN_SECONDS = 10
+    WRITE_BEHIND_BATCH_SIZE = 20
+    WRITE_BEHIND_INTERVAL_MS = 500
+
+# How often the same student/action sighting is re-sent to the persistence stage
+SIGHTING_REPEAT_SECONDS = 1.0
+
+# Longest a frame waits for the shared embedding workers before its faces are skipped
+RECOGNITION_TIMEOUT_SECONDS = 5.0
+
+# Consecutive failed reads after which a stream source is reopened
+RECONNECT_AFTER_FAILURES = 50
+
+
+def parse_source(source):
+    """Camera source from a request: device index ("0", 1), RTSP/HTTP URL or video file path."""
+    if source is None or source == '':
+        return 0
+    if isinstance(source, int):
+        return source
+    source = str(source).strip()
+    return int(source) if source.isdigit() else source
+
+
+def _cpu_load():
+    """Current CPU utilisation as a 0-1 fraction, if it can be determined."""
+    try:
+        import psutil
+        return psutil.cpu_percent(interval=None) / 100.0
+    except ImportError:
+        pass
+    try:
+        return os.getloadavg()[0] / (os.cpu_count() or 1)
+    except (AttributeError, OSError):
+        return None
+
+
+class AdmissionError(Exception):
+    """Raised when the server is too busy to start another camera session."""
+
+
+class AttendanceStateCache:
+    """
+    In-memory check-in state of one class, shared by every camera session of it.
+
+    Holds every student's profile and last action for the class and day, so
+    the Check-In/Check-Out alternation is decided without touching the
+    database. Seeded with one query (again at midnight), kept current by the
+    sessions' own writes, and only falls back to a query for students
+    enrolled after the seed. Sharing it lets a student check in at one
+    camera and out at another.
+    """
+
+    def __init__(self, class_name, cooldown=ATTENDANCE_COOLDOWN_SECONDS):
+        self.class_name = class_name
+        self.cooldown = cooldown
+        self.day = None
+        self.students = {}  # student_id -> UserProfile annotated with last_action
+        self._cooldown_until = {}
+        self._recorded_at = {}  # student_id -> timestamp of the last claimed action
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.loads = 0
+
+    def _profiles(self, day):
+        last_action = CurrentPresence.objects.filter(
+            student=OuterRef('pk'),
+            date=day,
+            class_name=self.class_name
+        ).values('action')[:1]
+        return UserProfile.objects.select_related('user').annotate(last_action=Subquery(last_action))
+
+    def _seed(self, day):
+        self.day = day
+        self.students = {profile.student_id: profile for profile in self._profiles(day)}
+        self._cooldown_until = {}
+        self._recorded_at = {}
+        self.loads += 1
+
+    def ensure_day(self, day):
+        """Seed for day unless already seeded (by another camera of the class)."""
+        with self._lock:
+            if day != self.day:
+                self._seed(day)
+
+    def claim(self, student_id, action, now):
+        """
+        Decide a sighting and record it if accepted.
+
+        Checking and recording happen under one lock, so two cameras seeing
+        the same student cannot both record the same transition.
+
+        Args:
+            student_id: Recognized student ID
+            action: 'Check-In' or 'Check-Out'
+            now: Aware datetime of the sighting
+
+        Returns:
+            The student's profile if the action is to be written, else None
+        """
+        with self._lock:
+            if now.date() != self.day:
+                self._seed(now.date())
+            if now.timestamp() < self._cooldown_until.get(student_id, 0):
+                self.hits += 1
+                return None
+            profile = self.students.get(student_id)
+            if profile is None:
+                profile = self._profiles(self.day).filter(student_id=student_id).first()
+                self.loads += 1
+                if profile is None:
+                    # Not enrolled; don't look again until the cooldown passes
+                    self._cooldown_until[student_id] = now.timestamp() + self.cooldown
+                    return None
+                self.students[student_id] = profile
+            else:
+                self.hits += 1
+            # Enforce alternating sequence: Check-In → Check-Out → Check-In → Check-Out
+            if action == (profile.last_action or 'Check-Out'):
+                return None
+            profile.last_action = action
+            self._recorded_at[student_id] = now
+            self._cooldown_until[student_id] = now.timestamp() + self.cooldown
+            return profile
+
+    def revert(self, student_id, action, timestamp):
+        """Undo a claimed action whose row was dropped, unless a later claim replaced it."""
+        with self._lock:
+            profile = self.students.get(student_id)
+            if profile is None or self._recorded_at.get(student_id) != timestamp:
+                return
+            # Alternation means the state before the claim was the other action
+            profile.last_action = 'Check-Out' if action == 'Check-In' else 'Check-In'
+            del self._recorded_at[student_id]
+            self._cooldown_until.pop(student_id, None)
+
+    def stats(self):
+        return {'students': len(self.students), 'hits': self.hits, 'loads': self.loads,
+                'cooling_down': len(self._cooldown_until)}
+
+
+class AttendanceSession:
+    """One attendance camera: capture, inference and persistence stages."""
+
+    def __init__(self, session_id, status, ring, recognizer, source=0, mirror=True, state=None):
+        """
+        Args:
+            session_id: Session identifier
+            status: Mutable status dict served by attendance_status; 'active'
+                is cleared to stop the session
+            ring: FrameRing that frames are captured into and the annotated
+                frame is published from for the video feed
+            recognizer: RecognitionWorkerPool shared by all sessions
+            source: Device index, stream URL or video file path
+            mirror: Flip frames horizontally (webcam mirror effect)
+            state: AttendanceStateCache shared with the class's other cameras;
+                a private one when None
+        """
+        self.session_id = session_id
+        self.status = status
+        self.ring = ring
+        self.recognizer = recognizer
+        self.source = source
+        self.mirror = mirror
+        self.is_file = isinstance(source, str) and os.path.isfile(source)
+        self.class_name = status['class_name']
+        self.cutoff_time = status['cutoff_time']
+
+        # capture -> inference: latest frame only; a skipped frame's ring slot is freed
+        self.frame_queue = DropOldestQueue(maxsize=1, on_drop=lambda item: self.ring.release(item[1]))
+        self.event_queue = DropOldestQueue(maxsize=PIPELINE_EVENT_QUEUE_SIZE)  # inference -> persistence
+        self.stages = {
+            'capture': StageStats(),
+            'inference': StageStats(),
+            'persistence': StageStats(),
+            'flush': StageStats(),  # one batched attendance write
+            'frame_age': StageStats(),  # capture to annotated frame
+        }
+        self._last_sightings = {}
+        self.state = state if state is not None else AttendanceStateCache(self.class_name)
+        self.writer = None  # AttendanceWriter, opened by the persistence thread
+
+    @property
+    def active(self):
+        return self.status.get('active', False)
+
+    def start(self):
+        for target in (self._capture_loop, self._inference_loop, self._persistence_loop):
+            threading.Thread(target=target, daemon=True).start()
+
+    def pipeline_stats(self):
+        stats = {name: stage.stats() for name, stage in self.stages.items()}
+        stats['queues'] = {'frames': self.frame_queue.stats(), 'events': self.event_queue.stats()}
+        stats['ring'] = self.ring.stats()
+        stats['state_cache'] = self.state.stats()
+        stats['writer'] = self.writer.stats() if self.writer is not None else None
+        broadcaster = existing_broadcaster(self.ring)
+        stats['stream'] = broadcaster.stats() if broadcaster is not None else None
+        return stats
+
+    # ------------------------------------------------------------------ capture
+
+    def _capture_loop(self):
+        try:
+            cap = cv2.VideoCapture(self.source)
+            if not cap.isOpened():
+                self.status['error'] = 'Cannot open camera'
+                self.status['active'] = False
+                return
+
+            # Play video files back in real time rather than as fast as they decode
+            frame_interval = 1.0 / (cap.get(cv2.CAP_PROP_FPS) or 30.0) if self.is_file else 0.0
+            failures = 0
+            raw = None  # decode buffer of mirrored reads, reused once allocated
+            layout = None  # (shape, dtype) of the last frame
+            while self.active:
+                read_started = time.perf_counter()
+                seq = buffer = None
+                if not self.mirror and layout is not None:
+                    # Decode straight into a ring slot
+                    seq, buffer = self.ring.claim(*layout)
+                with self.stages['capture'].time():
+                    ret, frame = cap.read(buffer if buffer is not None else raw)
+                if not ret:
+                    if seq is not None:
+                        self.ring.release(seq)
+                    if self.is_file:
+                        self.status['ended'] = True
+                        break
+                    failures += 1
+                    if isinstance(self.source, str) and failures >= RECONNECT_AFTER_FAILURES:
+                        # Network streams drop; reopen instead of giving up
+                        cap.release()
+                        cap = cv2.VideoCapture(self.source)
+                        failures = 0
+                    time.sleep(0.1)
+                    continue
+                failures = 0
+                layout = (frame.shape, frame.dtype)
+                # OpenCV returns a new array instead of filling the one passed in
+                # when the frame size changed (or none was passed); copy it over
+                if frame is not buffer:
+                    if buffer is None or buffer.shape != frame.shape or buffer.dtype != frame.dtype:
+                        if seq is not None:
+                            self.ring.release(seq)
+                        seq, buffer = self.ring.claim(frame.shape, frame.dtype)
+                    if self.mirror:
+                        cv2.flip(frame, 1, dst=buffer)
+                        raw = frame
+                    else:
+                        np.copyto(buffer, frame)
+                self.frame_queue.put((time.perf_counter(), seq, buffer))
+                if frame_interval:
+                    time.sleep(max(0.0, frame_interval - (time.perf_counter() - read_started)))
+
+            cap.release()
+            self.status['active'] = False
+        except Exception as e:
+            print(f"Camera error: {e}")
+            self.status['error'] = str(e)
+            self.status['active'] = False
+
+    # ---------------------------------------------------------------- inference
+
+    def _inference_loop(self):
+        face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+        clahe = cv2.createCLAHE(clipLimit=CLAHE_CLIP_LIMIT, tileGridSize=CLAHE_TILE_SIZE)
+        tracker = FaceTracker()
+        frames_processed = 0
+        fps_started = time.time()
+
+        while self.active:
+            item = self.frame_queue.get(timeout=0.5)
+            if item is None:
+                continue
+            captured_at, seq, frame = item
+            try:
+                with self.stages['inference'].time():
+                    # Overlays are drawn in place on the ring slot
+                    self._process_frame(frame, face_cascade, clahe, tracker)
+            except Exception as e:
+                print(f"Recognition error: {e}")
+            # Hand the annotated slot to the video feed without copying it
+            self.ring.publish(seq)
+            self.stages['frame_age'].record(time.perf_counter() - captured_at)
+
+            frames_processed += 1
+            if time.time() - fps_started >= 1.0:
+                self.status['fps'] = round(frames_processed / (time.time() - fps_started), 1)
+                self.status['tracker'] = tracker.stats()
+                self.status['pipeline'] = self.pipeline_stats()
+                frames_processed = 0
+                fps_started = time.time()
+        self.ring.close()
+
+    def _process_frame(self, frame, face_cascade, clahe, tracker):
+        height, width = frame.shape[:2]
+        line_x = width // 2
+
+        # Draw vertical line
+        cv2.line(frame, (line_x, 0), (line_x, height), (0, 0, 255), 2)
+        cv2.putText(frame, "Attendance Line", (line_x - 80, 30),
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
+
+        # Apply CLAHE for better lighting normalization
+        gray = clahe.apply(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY))
+        faces = face_cascade.detectMultiScale(
+            gray,
+            scaleFactor=FACE_DETECTION_SCALE_FACTOR,
+            minNeighbors=FACE_DETECTION_MIN_NEIGHBORS,
+        )
+
+        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+
+        # Follow faces across frames; only new or uncertain tracks are embedded,
+        # the others keep the identity from their last embedding
+        tracks = tracker.update(faces)
+        to_embed = tracker.select_for_embedding(tracks)
+        try:
+            matches = self.recognizer.recognize(self.session_id, [prepare_face(rgb_frame, track.box) for track in to_embed],
+                                                timeout=RECOGNITION_TIMEOUT_SECONDS)
+            for track, (matched_id, distance) in zip(to_embed, matches):
+                tracker.record_match(track, matched_id, distance)
+        except Exception as e:
+            print(f"Recognition error: {e}")
+
+        for track in tracks:
+            x, y, w, h = track.box
+            match = track.match
+            if match is None:
+                cv2.rectangle(frame, (x, y), (x+w, y+h), (255, 0, 0), 2)
+                continue
+            student_id, min_distance = match
+
+            # Left side (face_center_x <= line_x) = Check-In
+            # Right side (face_center_x > line_x) = Check-Out
+            is_right_side = x + w // 2 > line_x
+
+            if min_distance < RECOGNITION_THRESHOLD:  # Recognized
+                self._queue_sighting(student_id, 'Check-Out' if is_right_side else 'Check-In')
+                cv2.rectangle(frame, (x, y), (x+w, y+h), (0, 255, 0), 2)
+                cv2.putText(frame, student_id, (x, y-10),
+                           cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+            else:
+                cv2.rectangle(frame, (x, y), (x+w, y+h), (0, 0, 255), 2)
+                cv2.putText(frame, "Unknown", (x, y-10),
+                           cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
+                self._track_unknown(frame, x, y, w, h)
+
+    def _queue_sighting(self, student_id, action):
+        """Send a recognized face to the persistence stage, at most once per second per student and action."""
+        now = time.time()
+        last_action, last_sent = self._last_sightings.get(student_id, (None, 0))
+        if action == last_action and now - last_sent < SIGHTING_REPEAT_SECONDS:
+            return
+        self._last_sightings[student_id] = (action, now)
+        self.event_queue.put(('attendance', student_id, action, timezone.now()))
+
+    def _track_unknown(self, frame, x, y, w, h):
+        """Confirm an unknown face after 3 seconds of continuous detection, then queue it for saving."""
+        face_position_key = f"{x}_{y}_{w}_{h}"  # Approximate position key
+        unknown_detections = self.status.get('unknown_detections', {})
+        current_time = time.time()
+
+        # Find if this is a continuing detection (within 50px of previous)
+        continuing_detection = None
+        for key, start_time in list(unknown_detections.items()):
+            # Clean old detections
+            if current_time - start_time > 5:
+                del unknown_detections[key]
+                continue
+
+            # Check if this is same person (approximate position match)
+            old_coords = key.split('_')
+            if len(old_coords) == 4:
+                old_x, old_y = int(old_coords[0]), int(old_coords[1])
+                if abs(x - old_x) < 50 and abs(y - old_y) < 50:
+                    continuing_detection = key
+                    break
+
+        if continuing_detection:
+            detection_duration = current_time - unknown_detections[continuing_detection]
+            if detection_duration >= 3.0:
+                last_save = self.status['last_recognition'].get('unknown_saved', 0)
+                if current_time - last_save > 10:  # Save at most once per 10 seconds
+                    self.status['last_recognition']['unknown_saved'] = current_time
+                    self.event_queue.put(('unknown', frame[y:y+h, x:x+w].copy()))
+                    # Clear this detection after saving
+                    del unknown_detections[continuing_detection]
+        else:
+            # New unknown detection - start tracking
+            unknown_detections[face_position_key] = current_time
+
+        self.status['unknown_detections'] = unknown_detections
+
+    # -------------------------------------------------------------- persistence
+
+    def _persistence_loop(self):
+        try:
+            # Events a crashed server buffered but never wrote, before the state they affect is read
+            replay_spools()
+        except Exception as e:
+            print(f"Attendance spool replay error: {e}")
+        try:
+            # Every student's last action in this class today, in one query,
+            # unless another camera of the class already loaded it
+            self.state.ensure_day(timezone.now().date())
+        except Exception as e:
+            print(f"Attendance state seed error: {e}")
+        self.writer = AttendanceWriter(self.session_id, batch_size=WRITE_BEHIND_BATCH_SIZE,
+                                       interval_ms=WRITE_BEHIND_INTERVAL_MS, flush_stats=self.stages['flush'],
+                                       on_drop=self._attendance_dropped)
+        # Drain what inference already queued even after the session stops
+        while self.active or len(self.event_queue):
+            event = self.event_queue.get(timeout=min(0.5, self.writer.seconds_until_due()))
+            if event is not None:
+                try:
+                    with self.stages['persistence'].time():
+                        if event[0] == 'attendance':
+                            self._save_attendance(*event[1:])
+                        else:
+                            self._save_unknown(event[1])
+                except Exception as e:
+                    print(f"Attendance persistence error: {e}")
+            self.writer.flush_if_due()
+        self.writer.close()
+        close_old_connections()
+        event_bus.publish('session', {'session_id': self.session_id, 'active': False,
+                                      'error': self.status.get('error')})
+
+    def _set_result(self, result):
+        """Store the latest result for attendance_status and push it to the camera's viewers."""
+        self.status['last_result'] = result
+        event_bus.publish('session', {'session_id': self.session_id, 'active': True, 'last_result': result})
+
+    def _save_attendance(self, student_id, action, now):
+        # Alternation and cooldown are decided from the class's cached state;
+        # repeated sightings of the same student cost no queries
+        profile = self.state.claim(student_id, action, now)
+        if profile is None:
+            return
+
+        if action == 'Check-Out':
+            status = 'On-Time'  # Check-out doesn't have late status
+        else:
+            status = 'Late' if now.time() > self.cutoff_time else 'On-Time'
+
+        # Spooled now, written with the rest of its batch
+        self.writer.add(Attendance(
+            student=profile,
+            date=now.date(),
+            class_name=self.class_name,
+            timestamp=now,
+            action=action,
+            status=status
+        ))
+        # Store result for display
+        self._set_result({
+            'student_id': student_id,
+            'name': profile.user.first_name or profile.user.username,
+            'status': status,
+            'time': now.strftime('%H:%M:%S'),
+            'action': action
+        })
+
+    def _attendance_dropped(self, row):
+        # Let the student's next sighting record the transition again
+        self.state.revert(row.student.student_id, row.action, row.timestamp)
+
+    def _save_unknown(self, face_bgr):
+        ret, buffer = cv2.imencode('.jpg', face_bgr)
+        unknown = UnknownPerson(class_name=self.class_name)
+        unknown.image.save(f'unknown_{int(time.time())}.jpg', ContentFile(buffer.tobytes()))
+        unknown.save()
+        self._set_result({
+            'unknown': True,
+            'message': '⚠️ Unknown person detected!'
+        })
+
+
+class CameraSessionManager:
+    """
+    Runs any number of attendance cameras in this process.
+
+    All sessions share the registry's embedder and index through one
+    RecognitionWorkerPool. New sessions are refused when the session limit
+    is reached, the CPU is saturated, or faces already queue too long for
+    the embedding workers.
+    """
+
+    def __init__(self, max_sessions=MAX_CAMERA_SESSIONS, max_cpu_load=ADMISSION_MAX_CPU_LOAD,
+                 max_queue_wait_ms=ADMISSION_MAX_QUEUE_WAIT_MS, workers=EMBEDDING_WORKERS,
+                 inference_mode=INFERENCE_MODE):
+        self.max_sessions = max_sessions
+        self.max_cpu_load = max_cpu_load
+        self.max_queue_wait_ms = max_queue_wait_ms
+        self.workers = workers
+        self.inference_mode = inference_mode
+        self.status = {}  # session_id -> status dict (served by attendance_status)
+        self.frames = {}  # session_id -> FrameRing holding the latest annotated frame
+        self.sessions = {}
+        self.state_caches = {}  # class_name -> AttendanceStateCache shared by the class's cameras
+        self._recognizer = None
+        self._lock = threading.Lock()
+
+    @property
+    def recognizer(self):
+        if self._recognizer is None:
+            with self._lock:
+                if self._recognizer is None:
+                    if self.inference_mode == 'process':
+                        # Embedder and index live in worker processes, outside the web server's GIL
+                        from inference_service import ProcessRecognitionPool
+                        self._recognizer = ProcessRecognitionPool(get_registry())
+                    else:
+                        self._recognizer = RecognitionWorkerPool(get_registry(), workers=self.workers)
+        return self._recognizer
+
+    def active_sessions(self):
+        return [sid for sid, session in self.sessions.items() if session.active]
+
+    def admission_check(self):
+        """Return the reason a new session would be refused, or None if it can start."""
+        active = self.active_sessions()
+        if len(active) >= self.max_sessions:
+            return f'Camera limit reached ({self.max_sessions} active sessions)'
+        if not active:
+            return None
+        load = _cpu_load()
+        if load is not None and load > self.max_cpu_load:
+            return f'Server CPU is saturated ({load:.0%})'
+        if self._recognizer is not None:
+            queue_wait_ms = self._recognizer.pool.queue_wait.average * 1000
+            if queue_wait_ms > self.max_queue_wait_ms:
+                return f'Recognition workers are saturated ({queue_wait_ms:.0f} ms queue wait)'
+        return None
+
+    def start_session(self, class_name, cutoff_time, source=0, mirror=True):
+        """
+        Start a camera session and return its session ID.
+
+        Raises:
+            AdmissionError: If the server cannot take another camera
+        """
+        with self._lock:
+            reason = self.admission_check()
+            if reason:
+                raise AdmissionError(reason)
+            session_id = f"{class_name}_{int(time.time())}"
+            suffix = 1
+            while session_id in self.status:
+                suffix += 1
+                session_id = f"{class_name}_{int(time.time())}_{suffix}"
+            self.status[session_id] = {
+                'active': True,
+                'class_name': class_name,
+                'cutoff_time': cutoff_time,
+                'source': str(source),
+                'last_recognition': {},
+                'student_actions': {},  # Track last action per student (Check-In/Check-Out)
+                'unknown_detections': {}  # Track unknown face detection start time by position
+            }
+            self.frames[session_id] = FrameRing()
+            session = AttendanceSession(session_id, self.status[session_id], self.frames[session_id],
+                                        self.recognizer, source=source, mirror=mirror,
+                                        state=self._state_cache(class_name))
+            self.sessions[session_id] = session
+        session.start()
+        return session_id
+
+    def _state_cache(self, class_name):
+        state = self.state_caches.get(class_name)
+        if state is None:
+            state = self.state_caches[class_name] = AttendanceStateCache(class_name)
+        return state
+
+    def stop_session(self, session_id):
+        session = self.sessions.get(session_id)
+        if session is None:
+            return False
+        session.status['active'] = False
+        if self._recognizer is not None:
+            self._recognizer.release(session_id)
+        return True
+
+    def metrics(self):
+        """Per-camera FPS and stage latency plus shared worker pool figures."""
+        cameras = []
+        for session_id, session in self.sessions.items():
+            cameras.append({
+                'session_id': session_id,
+                'class_name': session.class_name,
+                'source': str(session.source),
+                'active': session.active,
+                'fps': session.status.get('fps'),
+                'error': session.status.get('error'),
+                'pipeline': session.pipeline_stats(),
+            })
+        load = _cpu_load()
+        return {
+            'sessions': cameras,
+            'active_sessions': len(self.active_sessions()),
+            'max_sessions': self.max_sessions,
+            'cpu_load': round(load, 3) if load is not None else None,
+            'recognition_pool': self._recognizer.stats() if self._recognizer is not None else None,
+            'admission': self.admission_check() or 'open',
+        }
+
+
+session_manager = CameraSessionManager()
@@ -0,0 +1,151 @@
+"""
+Attendance statistics queries.
+
+Each helper issues a fixed number of grouped queries regardless of how many
+students or records there are, and reads the daily rollups (see rollups.py)
+rather than raw Attendance rows, so the dashboard and history endpoints stay
+cheap as the attendance table grows.
+"""
+from datetime import timedelta
+
+from django.db.models import Count, Q, Sum
+
+from .live_events import LIVE_CLASSES, live_class_status
+from .models import (
+    UserProfile, UnknownPerson, CurrentPresence, ClassDailyAttendance, StudentDailyAttendance
+)
+
+
+def daily_checkins(start, end):
+    """
+    Distinct students who checked in per day between start and end (inclusive).
+
+    Returns:
+        Dict of date -> {'count', 'on_time', 'late'}
+    """
+    rows = StudentDailyAttendance.objects.filter(date__range=(start, end), check_ins__gt=0).values('date').annotate(
+        count=Count('student', distinct=True),
+        on_time=Count('student', filter=Q(on_time_check_ins__gt=0), distinct=True),
+        late=Count('student', filter=Q(late_check_ins__gt=0), distinct=True)
+    )
+    return {row['date']: row for row in rows}
+
+
+def class_days(start, end, class_names):
+    """
+    Daily rollup rows per class between start and end (inclusive), oldest first.
+
+    Returns:
+        Dict of class_name -> list of ClassDailyAttendance
+    """
+    days = {name: [] for name in class_names}
+    rows = ClassDailyAttendance.objects.filter(
+        date__range=(start, end), class_name__in=class_names).order_by('date')
+    for row in rows:
+        days[row.class_name].append(row)
+    return days
+
+
+def class_students(start, class_names, end=None):
+    """
+    Distinct students per class who checked in from start (to end, if given).
+
+    Returns:
+        Dict of class_name -> {'students', 'on_time', 'late'}
+    """
+    rows = StudentDailyAttendance.objects.filter(date__gte=start, class_name__in=class_names, check_ins__gt=0)
+    if end is not None:
+        rows = rows.filter(date__lte=end)
+    rows = rows.values('class_name').annotate(
+        students=Count('student', distinct=True),
+        on_time=Count('student', filter=Q(on_time_check_ins__gt=0), distinct=True),
+        late=Count('student', filter=Q(late_check_ins__gt=0), distinct=True)
+    )
+    totals = {row['class_name']: row for row in rows}
+    return {name: totals.get(name, {'students': 0, 'on_time': 0, 'late': 0}) for name in class_names}
+
+
+def student_checkins(student, month_start, week_start, today):
+    """
+    Days with a check-in and number of check-ins of one student this month and this week.
+
+    Returns:
+        Dict with present_days, total_classes, weekly_present and weekly_classes
+    """
+    month, week = Q(date__gte=month_start), Q(date__gte=week_start)
+    totals = StudentDailyAttendance.objects.filter(
+        student=student, date__gte=min(month_start, week_start), date__lte=today, check_ins__gt=0
+    ).aggregate(
+        present_days=Count('date', filter=month, distinct=True),
+        total_classes=Sum('check_ins', filter=month),
+        weekly_present=Count('date', filter=week, distinct=True),
+        weekly_classes=Sum('check_ins', filter=week)
+    )
+    return {key: value or 0 for key, value in totals.items()}
+
+
+def present_by_class(day, class_names):
+    """
+    Number of students per class whose latest action on day is Check-In.
+
+    Read from CurrentPresence, which holds one row per student, class and
+    day, so this is one indexed query however much history there is.
+    """
+    rows = CurrentPresence.objects.filter(
+        date=day,
+        class_name__in=class_names,
+        action='Check-In'
+    ).values('class_name').annotate(checked_in=Count('id'))
+    counts = {row['class_name']: row['checked_in'] for row in rows}
+    return {name: counts.get(name, 0) for name in class_names}
+
+
+def dashboard_stats(today):
+    """Payload of the attendance dashboard stats endpoint for today, in five queries."""
+    total_students = UserProfile.objects.count()
+
+    # Weekly attendance trend (last 7 days); today's row also gives today's totals
+    daily = daily_checkins(today - timedelta(days=6), today)
+    weekly_data = []
+    for i in range(6, -1, -1):
+        day = today - timedelta(days=i)
+        weekly_data.append({
+            'date': day.strftime('%a'),
+            'count': daily.get(day, {}).get('count', 0)
+        })
+
+    todays = daily.get(today, {})
+    today_attendance = todays.get('count', 0)
+    on_time_count = todays.get('on_time', 0)
+    late_count = todays.get('late', 0)
+    attendance_rate = round((today_attendance / total_students * 100), 1) if total_students > 0 else 0
+    punctuality = round((on_time_count / today_attendance * 100), 0) if today_attendance > 0 else 0
+
+    # Unknown faces today
+    unknown_count = UnknownPerson.objects.filter(detected_at__date=today).count()
+
+    # Class breakdown (distinct students who checked in today)
+    class_data = [
+        {'class_name': row.class_name, 'count': row.students, 'on_time': row.on_time_students, 'late': row.late_students}
+        for row in ClassDailyAttendance.objects.filter(date=today, check_ins__gt=0)
+    ]
+    top_classes = sorted(class_data, key=lambda c: -c['count'])[:4]
+
+    # Live classroom status (students currently checked in)
+    present = present_by_class(today, LIVE_CLASSES)
+    live_classes = [live_class_status(cls, present[cls]) for cls in LIVE_CLASSES]
+
+    return {
+        'total_students': total_students,
+        'attendance_rate': attendance_rate,
+        'classes_in_session': sum(1 for c in live_classes if c['checked_in']),
+        'punctuality': punctuality,
+        'unknown_count': unknown_count,
+        'weekly_data': weekly_data,
+        'class_data': class_data,
+        'top_classes': top_classes,
+        'live_classes': live_classes,
+        'today_attendance': today_attendance,
+        'on_time_count': on_time_count,
+        'late_count': late_count,
+    }
@@ -0,0 +1,282 @@
+"""
+Write-behind attendance persistence.
+
+Camera sessions hand accepted check-ins/check-outs to an AttendanceWriter
+instead of inserting them one by one. Each event is first appended to a
+local spool file (fsynced), then buffered; the buffer is written every
+WRITE_BEHIND_BATCH_SIZE events or WRITE_BEHIND_INTERVAL_MS, whichever comes
+first, in one transaction that bulk-inserts the Attendance rows and their
+Notifications. The spool is emptied once that transaction commits, so
+events buffered when the server dies are replayed from it on the next
+start (see replay_spools and the replay_attendance_spool command).
+"""
+import contextlib
+import json
+import os
+import time
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .live_events import publish_attendance
+from .models import Attendance, Notification
+from .presence import record_presence
+from .rollups import record_rollups
+from .signals import build_attendance_notification
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
+SPOOL_DIR = getattr(settings, 'ATTENDANCE_SPOOL_DIR', settings.BASE_DIR / 'attendance_spool')
+
+# Spool files held open by writers in this process
+_open_spools = set()
+
+
+def write_attendance(rows):
+    """
+    Insert unsaved Attendance rows in one transaction.
+
+    bulk_create sends no post_save signals, so this also does what the
+    Attendance receivers in signals.py do for a single save: notifications
+    (bulk-inserted as well), CurrentPresence, daily rollups and, once
+    committed, the live dashboard events.
+    """
+    with transaction.atomic():
+        Attendance.objects.bulk_create(rows)
+        Notification.objects.bulk_create([build_attendance_notification(row) for row in rows])
+        for row in rows:
+            record_presence(row)
+            record_rollups(row)
+        # robust: the rows are committed; a failed live update must not get them written again
+        transaction.on_commit(lambda: _publish(rows), robust=True)
+
+
+def _publish(rows):
+    for row in rows:
+        publish_attendance(row)
+
+
+def _reset(rows):
+    # A rolled back bulk_create may already have assigned primary keys
+    for row in rows:
+        row.pk = None
+        row._state.adding = True
+
+
+def _write_each(rows):
+    """Write rows one transaction each after a batch failed; returns the rows that were dropped."""
+    _reset(rows)
+    dropped = []
+    for row in rows:
+        try:
+            write_attendance([row])
+        except Exception as e:
+            print(f"Dropping attendance record for student {row.student_id}: {e}")
+            dropped.append(row)
+    return dropped
+
+
+def _to_record(attendance):
+    return {
+        'student': attendance.student_id,
+        'class_name': attendance.class_name,
+        'date': attendance.date.isoformat(),
+        'timestamp': attendance.timestamp.isoformat(),
+        'action': attendance.action,
+        'status': attendance.status,
+    }
+
+
+def _from_record(record):
+    return Attendance(
+        student_id=record['student'],
+        class_name=record['class_name'],
+        date=parse_date(record['date']),
+        timestamp=parse_datetime(record['timestamp']),
+        action=record['action'],
+        status=record['status'],
+    )
+
+
+def _try_lock(spool):
+    """
+    Take the spool's exclusive lock.
+
+    False if another live process holds it, or if the platform has no lock
+    primitive: a spool that cannot be locked is never treated as orphaned.
+    """
+    try:
+        if fcntl is not None:
+            fcntl.flock(spool.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        elif msvcrt is not None:
+            # Lock the first byte; the region may lie past the end of an empty spool
+            position = spool.tell()
+            spool.seek(0)
+            try:
+                msvcrt.locking(spool.fileno(), msvcrt.LK_NBLCK, 1)
+            finally:
+                spool.seek(position)
+        else:
+            return False
+    except OSError:
+        return False
+    return True
+
+
+class AttendanceWriter:
+    """Spooled, batched Attendance inserts for one camera session."""
+
+    def __init__(self, name, batch_size=20, interval_ms=500, flush_stats=None, spool_dir=SPOOL_DIR, on_drop=None):
+        """
+        Args:
+            name: Spool file name prefix (the session ID)
+            batch_size: Flush once this many events are buffered
+            interval_ms: Flush once the oldest buffered event is this old
+            flush_stats: Optional StageStats that records flush latency
+            spool_dir: Directory of the spool files
+            on_drop: Optional callable given each row dropped because the
+                database rejected it
+        """
+        self.batch_size = max(1, batch_size)
+        self.interval = interval_ms / 1000.0
+        self.flush_stats = flush_stats
+        self.on_drop = on_drop
+        os.makedirs(spool_dir, exist_ok=True)
+        self.spool_path = os.path.join(spool_dir, f'{name}-{os.getpid()}.jsonl')
+        self._spool = open(self.spool_path, 'a', encoding='utf-8')
+        _try_lock(self._spool)
+        _open_spools.add(os.path.abspath(self.spool_path))
+        self.pending = []
+        self._oldest = None  # monotonic time the oldest pending event was added
+        self.flushed = 0
+        self.flushes = 0
+        self.failed_flushes = 0
+        self.dropped = 0
+
+    def add(self, attendance):
+        """Spool an unsaved Attendance row and buffer it for the next flush."""
+        self._spool.write(json.dumps(_to_record(attendance)) + '\n')
+        self._spool.flush()
+        os.fsync(self._spool.fileno())
+        self.pending.append(attendance)
+        if self._oldest is None:
+            self._oldest = time.monotonic()
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def seconds_until_due(self):
+        """Time until the pending events must be flushed (the full interval when none are pending)."""
+        if not self.pending:
+            return self.interval
+        return max(0.0, self._oldest + self.interval - time.monotonic())
+
+    def flush_if_due(self):
+        if self.pending and self.seconds_until_due() == 0:
+            self.flush()
+
+    def flush(self):
+        """
+        Write every pending event in one transaction and empty the spool.
+
+        Rows are kept (and stay spooled) for the next attempt when the
+        database is unavailable; a batch rejected by a constraint is retried
+        row by row so one bad row cannot hold back the rest.
+        """
+        if not self.pending:
+            return
+        rows = self.pending
+        timer = self.flush_stats.time() if self.flush_stats is not None else contextlib.nullcontext()
+        try:
+            with timer:
+                write_attendance(rows)
+            dropped = []
+        except IntegrityError:
+            self.failed_flushes += 1
+            dropped = _write_each(rows)
+            if self.on_drop is not None:
+                for row in dropped:
+                    self.on_drop(row)
+        except Exception as e:
+            print(f"Attendance flush error: {e}")
+            self.failed_flushes += 1
+            _reset(rows)
+            self._oldest = time.monotonic()  # retry after another interval
+            return
+        self.flushes += 1
+        self.flushed += len(rows) - len(dropped)
+        self.dropped += len(dropped)
+        self.pending = []
+        self._oldest = None
+        self._spool.truncate(0)
+        os.fsync(self._spool.fileno())
+
+    def close(self):
+        """Flush what is pending and remove the spool if everything was written."""
+        self.flush()
+        _open_spools.discard(os.path.abspath(self.spool_path))
+        self._spool.close()
+        if not self.pending:
+            os.remove(self.spool_path)
+
+    def stats(self):
+        return {
+            'queue_depth': len(self.pending),
+            'flushed': self.flushed,
+            'flushes': self.flushes,
+            'failed_flushes': self.failed_flushes,
+            'dropped': self.dropped,
+            'spool_bytes': os.path.getsize(self.spool_path) if not self._spool.closed else 0,
+            'batch_size': self.batch_size,
+            'interval_ms': round(self.interval * 1000),
+        }
+
+
+def replay_spools(spool_dir=SPOOL_DIR):
+    """
+    Write the events left in spool files of writers that are no longer running.
+
+    Events whose Attendance row already exists (the server stopped between
+    commit and emptying the spool) are skipped.
+
+    Returns:
+        Number of Attendance rows written
+    """
+    if not os.path.isdir(spool_dir):
+        return 0
+    written = 0
+    for name in sorted(os.listdir(spool_dir)):
+        path = os.path.abspath(os.path.join(spool_dir, name))
+        if not name.endswith('.jsonl') or path in _open_spools:
+            continue
+        with open(path, 'r+', encoding='utf-8') as spool:
+            if not _try_lock(spool):
+                continue  # a writer in another process still owns it
+            records = []
+            for line in spool:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    pass  # torn last line of a crashed write
+            rows = [_from_record(record) for record in records]
+            if rows:
+                existing = set(Attendance.objects.filter(
+                    timestamp__in={row.timestamp for row in rows}
+                ).values_list('student_id', 'class_name', 'timestamp', 'action'))
+                rows = [row for row in rows
+                        if (row.student_id, row.class_name, row.timestamp, row.action) not in existing]
+            if rows:
+                try:
+                    write_attendance(rows)
+                    written += len(rows)
+                except IntegrityError:
+                    written += len(rows) - len(_write_each(rows))
+        os.remove(path)
+    return written
@@ -1,6 +1,8 @@
 # Face Recognition and Attendance Views from AttendanceSystem
 from django.shortcuts import render
 from django.http import JsonResponse, StreamingHttpResponse
+from django.core.handlers.asgi import ASGIRequest
+from asgiref.sync import sync_to_async
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib.auth.models import User
 from django.contrib.auth import authenticate, login as auth_login, logout as auth_logout
@@ -281,21 +283,49 @@ def student_update(request, pk: int):
 @login_required
 @require_POST
 def student_delete(request, pk: int):
-    """Delete a student (User + Profile)."""
+    """
+    Delete a student (User + Profile).
+
+    Their captured face images are only deleted when the request sets
+    delete_dataset=1; images that are kept are enrolled again by a later
+    full retrain.
+    """
     try:
         profile = UserProfile.objects.select_related('user').get(pk=pk)
     except UserProfile.DoesNotExist:
         return JsonResponse({'error': 'Student not found'}, status=404)
 
+    student_id = profile.student_id
+
     # Delete the user cascades to profile
     profile.user.delete()
 
+    # Drop the student's faces from the recognition model
+    try:
+        from train import FaceRecognitionTrainer
+        from model_registry import get_registry
+        base_path = Path(__file__).resolve().parent.parent.parent / 'AttendanceSystem'
+        trainer = FaceRecognitionTrainer(
+            dataset_base_path=str(base_path / 'dataset'),
+            model_base_path=str(base_path / 'models')
+        )
+        result = trainer.remove_student(student_id,
+                                        delete_dataset=request.POST.get('delete_dataset') in ('1', 'true'))
+        if not result['success']:
+            raise RuntimeError(result['error'])
+        get_registry().reload()
+    except Exception as e:
+        print(f"Failed to remove {student_id} from recognition model: {e}")
+
     return JsonResponse({'success': True})
 
 
+from frame_ring import FrameRing
+from mjpeg_broadcaster import MJPEG_CONTENT_TYPE, get_broadcaster
+
 # Global variables for face capture
 face_capture_status = {}
-face_capture_frames = {}
+face_capture_frames = {}  # student_id -> FrameRing
 
 
 def face_capture_page(request):
@@ -347,6 +377,7 @@ def start_face_capture(request):
         'max_images': 50,
         'completed': False
     }
+    ring = face_capture_frames[student_id] = FrameRing(slots=4)
     
     # Start capture in background thread
     def capture_faces():
@@ -362,10 +393,23 @@ def start_face_capture(request):
             count = 0
             max_images = 50
             frames_without_face = 0
+            frame_shape = None
             
             while face_capture_status.get(student_id, {}).get('active', False) and count < max_images:
-                ret, frame = cap.read()
-                if not ret:
+                if frame_shape is None:
+                    ret, frame = cap.read()
+                    if ret:
+                        frame_shape = frame.shape
+                    else:
+                        time.sleep(0.1)
+                    continue
+                
+                # Read straight into a preallocated ring slot
+                seq, frame = ring.claim(frame_shape)
+                ret, frame = cap.read(frame)
+                if not ret or frame.shape != frame_shape:
+                    ring.release(seq)
+                    frame_shape = None
                     time.sleep(0.1)
                     continue
                 
@@ -386,8 +430,8 @@ def start_face_capture(request):
                 for (x, y, w, h) in faces:
                     cv2.rectangle(frame, (x, y), (x+w, y+h), (0, 255, 0), 2)
                 
-                # Store frame for streaming
-                face_capture_frames[student_id] = frame.copy()
+                # Publish the slot for streaming; it is not written again while pinned
+                ring.publish(seq)
                 
                 if len(faces) > 0:
                     frames_without_face = 0
@@ -429,6 +473,8 @@ def start_face_capture(request):
         except Exception as e:
             face_capture_status[student_id]['error'] = str(e)
             face_capture_status[student_id]['active'] = False
+        finally:
+            ring.close()
     
     thread = threading.Thread(target=capture_faces, daemon=True)
     thread.start()
@@ -437,7 +483,7 @@ def start_face_capture(request):
 
 
 @csrf_exempt
-def capture_status(request, student_id):
+async def capture_status(request, student_id):
     """Get capture status."""
     status = face_capture_status.get(student_id, {
         'active': False,
@@ -466,8 +512,30 @@ def stop_face_capture(request):
     return JsonResponse({'success': True})
 
 
+def _enroll(student_id):
+    """Embed one student's images into the combined model and reload the shared registry."""
+    base_path = Path(__file__).resolve().parent.parent.parent / 'AttendanceSystem'
+    sys.path.insert(0, str(base_path))
+    
+    from train import FaceRecognitionTrainer
+    
+    # Create trainer instance
+    trainer = FaceRecognitionTrainer(
+        dataset_base_path=str(base_path / 'dataset'),
+        model_base_path=str(base_path / 'models')
+    )
+    
+    # Embed only this student's images and add them to the combined model
+    result = trainer.enroll_student(student_id)
+    if result.get('success'):
+        # Make new camera sessions pick up the updated model
+        from model_registry import get_registry
+        get_registry().reload()
+    return result
+
+
 @csrf_exempt
-def train_model(request):
+async def train_model(request):
     """Train the face recognition model."""
     if request.method != 'POST':
         return JsonResponse({'error': 'Only POST allowed'}, status=405)
@@ -482,32 +550,14 @@ def train_model(request):
         return JsonResponse({'error': 'Student ID required'}, status=400)
     
     try:
-        # Import trainer
-        import sys
-        base_path = Path(__file__).resolve().parent.parent.parent / 'AttendanceSystem'
-        sys.path.insert(0, str(base_path))
-        
-        from train import FaceRecognitionTrainer
-        
-        # Create trainer instance
-        trainer = FaceRecognitionTrainer(
-            dataset_base_path=str(base_path / 'dataset'),
-            model_base_path=str(base_path / 'models')
-        )
-        
-        # Train the model
-        result = trainer.train_student(student_id)
-        # After training single student legacy model, rebuild the combined model for all students
-        try:
-            combined_result = trainer.train_all()
-        except Exception as e:
-            combined_result = {'success': False, 'error': str(e)}
+        # Embedding takes seconds; run it on its own thread rather than the one
+        # that every sync view shares under ASGI
+        result = await sync_to_async(_enroll, thread_sensitive=False)(student_id)
         
         # Clear session
-        if 'pending_face_capture' in request.session:
-            del request.session['pending_face_capture']
-        # Return both results
-        return JsonResponse({'single_train': result, 'combined_train': combined_result})
+        await request.session.apop('pending_face_capture', None)
+        # Enrollment updates both the per-student and combined models in one pass
+        return JsonResponse({'single_train': result, 'combined_train': result})
         
     except Exception as e:
         return JsonResponse({
@@ -516,19 +566,36 @@ def train_model(request):
         }, status=500)
 
 
-def video_feed(request, student_id):
+def _is_asgi(request):
+    """True when served by an ASGI server, where streamed bodies should be async iterators."""
+    return isinstance(request, ASGIRequest)
+
+
+async def _no_frames():
+    return
+    yield
+
+
+def _mjpeg_response(request, ring):
+    """
+    MJPEG stream of a ring's frames.
+
+    Under ASGI a waiting viewer is an idle coroutine; under WSGI (runserver)
+    Django cannot stream an async iterator, so each viewer reads from a
+    blocking generator on its worker thread instead.
+    """
+    if ring is None:
+        body = _no_frames() if _is_asgi(request) else iter(())
+    else:
+        # Frames are encoded once by the ring's broadcaster and fanned out to every viewer
+        broadcaster = get_broadcaster(ring)
+        body = broadcaster.astream() if _is_asgi(request) else broadcaster.stream()
+    return StreamingHttpResponse(body, content_type=MJPEG_CONTENT_TYPE)
+
+
+async def video_feed(request, student_id):
     """Stream video feed with face detection."""
-    def generate():
-        while face_capture_status.get(student_id, {}).get('active', False):
-            frame = face_capture_frames.get(student_id)
-            if frame is not None:
-                ret, buffer = cv2.imencode('.jpg', frame)
-                frame_bytes = buffer.tobytes()
-                yield (b'--frame\r\n'
-                       b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
-            time.sleep(0.033)  # ~30 fps
-    
-    return StreamingHttpResponse(generate(), content_type='multipart/x-mixed-replace; boundary=frame')
+    return _mjpeg_response(request, face_capture_frames.get(student_id))
 
 
 # Attendance System
@@ -538,9 +605,13 @@ from datetime import datetime
 import pickle
 import numpy as np
 
-# Global variables for attendance camera
-attendance_camera_active = {}
-attendance_camera_frames = {}
+from .attendance_pipeline import AdmissionError, parse_source, session_manager
+from . import attendance_stats
+from .live_events import aevent_stream, event_stream
+
+# Attendance camera state, owned by the process-wide camera session manager
+attendance_camera_active = session_manager.status
+attendance_camera_frames = session_manager.frames
 
 
 @csrf_exempt
@@ -553,6 +624,9 @@ def start_attendance_camera(request):
         data = json.loads(request.body)
         class_name = data.get('class_name')
         cutoff_time_str = data.get('cutoff_time')
+        # Device index (default 0), RTSP/HTTP URL, or a video file for testing
+        source = parse_source(data.get('source'))
+        mirror = bool(data.get('mirror', True))
     except:
         return JsonResponse({'error': 'Invalid request'}, status=400)
     
@@ -565,290 +639,39 @@ def start_attendance_camera(request):
     except:
         return JsonResponse({'error': 'Invalid time format'}, status=400)
     
-    # Load face recognition model
+    # Load face recognition model from the process-wide registry
     try:
-        from keras_facenet import FaceNet
-        embedder = FaceNet()
-        
-        # Prefer loading a single combined model if present
-        base_path = Path(__file__).resolve().parent.parent.parent / 'AttendanceSystem'
-        models_path = base_path / 'models'
-        combined_model_file = models_path / 'face_model.pkl'
-        all_embeddings = []
-        all_labels = []
-        combined_model = None
-        if combined_model_file.exists():
-            # Load combined model object
-            with open(combined_model_file, 'rb') as f:
-                try:
-                    data = pickle.load(f)
-                    # data expected to be a dict with 'knn' key
-                    if isinstance(data, dict) and 'knn' in data:
-                        combined_model = data['knn']
-                        all_embeddings = data.get('embeddings', [])
-                        all_labels = data.get('labels', [])
-                except Exception:
-                    # Fallback: file may be a raw model
-                    f.seek(0)
-                    combined_model = pickle.load(f)
-        
-        # If combined_model not available, fall back to old per-student scan
-        if combined_model is None:
-            if not models_path.exists():
-                return JsonResponse({'error': 'No trained models found'}, status=404)
-            for student_dir in models_path.iterdir():
-                if student_dir.is_dir():
-                    model_file = student_dir / 'face_model.pkl'
-                    if model_file.exists():
-                        with open(model_file, 'rb') as f:
-                            student_model = pickle.load(f)
-                            if hasattr(student_model, '_fit_X'):
-                                all_embeddings.extend(student_model._fit_X)
-                                all_labels.extend([student_dir.name] * len(student_model._fit_X))
-            if not all_embeddings:
-                return JsonResponse({'error': 'No trained faces found'}, status=404)
-            from sklearn.neighbors import KNeighborsClassifier
-            combined_model = KNeighborsClassifier(n_neighbors=3, metric='euclidean')
-            combined_model.fit(np.array(all_embeddings), np.array(all_labels))
-        
+        from model_registry import get_registry
+        registry = get_registry()
+        if session_manager.inference_mode == 'process':
+            # The embedder and index are only loaded by the worker processes
+            if not registry.model_available():
+                raise FileNotFoundError('No trained models found')
+        else:
+            registry.get_embedder()
+            registry.get_model()
+    except (FileNotFoundError, ValueError) as e:
+        return JsonResponse({'error': str(e)}, status=404)
     except Exception as e:
         return JsonResponse({'error': f'Failed to load models: {str(e)}'}, status=500)
     
-    # Initialize camera status
-    session_id = f"{class_name}_{int(time.time())}"
-    attendance_camera_active[session_id] = {
-        'active': True,
-        'class_name': class_name,
-        'cutoff_time': cutoff_time,
-        'last_recognition': {},
-        'student_actions': {},  # Track last action per student (Check-In/Check-Out)
-        'unknown_detections': {}  # Track unknown face detection start time by position
-    }
-    
-    # Start camera thread
-    def run_attendance_camera():
-        try:
-            cap = cv2.VideoCapture(0)
-            if not cap.isOpened():
-                attendance_camera_active[session_id]['error'] = 'Cannot open camera'
-                attendance_camera_active[session_id]['active'] = False
-                return
-            
-            face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
-            
-            while attendance_camera_active.get(session_id, {}).get('active', False):
-                ret, frame = cap.read()
-                if not ret:
-                    time.sleep(0.1)
-                    continue
-                
-                # Flip camera horizontally (mirror effect)
-                frame = cv2.flip(frame, 1)
-                
-                height, width = frame.shape[:2]
-                line_x = width // 2
-                
-                # Draw vertical line
-                cv2.line(frame, (line_x, 0), (line_x, height), (0, 0, 255), 2)
-                cv2.putText(frame, "Attendance Line", (line_x - 80, 30),
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
-                
-                gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-                
-                # Apply CLAHE for better lighting normalization
-                clahe = cv2.createCLAHE(clipLimit=CLAHE_CLIP_LIMIT, tileGridSize=CLAHE_TILE_SIZE)
-                gray = clahe.apply(gray)
-                
-                faces = face_cascade.detectMultiScale(
-                    gray, 
-                    scaleFactor=FACE_DETECTION_SCALE_FACTOR, 
-                    minNeighbors=FACE_DETECTION_MIN_NEIGHBORS, 
-                )
-                
-                rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                
-                for (x, y, w, h) in faces:
-                    current_time = time.time()  # Get current time once per face for consistency
-                    face_img = rgb_frame[y:y+h, x:x+w]
-                    
-                    # Normalize lighting on the face region
-                    face_img_normalized = cv2.normalize(face_img, None, 0, 255, cv2.NORM_MINMAX)
-                    face_img_resized = cv2.resize(face_img_normalized, (160, 160))
-                    
-                    # Determine which side of line the face is on
-                    face_center_x = x + w // 2
-                    is_right_side = face_center_x > line_x
-                
-                    try:
-                        # Get embedding
-                        embedding = embedder.embeddings([face_img_resized])[0]
-                        
-                        # Predict with distance
-                        distances, indices = combined_model.kneighbors([embedding])
-                        min_distance = distances[0][0]
-                        
-                        # Use configurable threshold
-                        if min_distance < RECOGNITION_THRESHOLD:  # Recognized
-                            student_id = combined_model.predict([embedding])[0]
-                            
-                            try:
-                                # Check student's current attendance state in database
-                                profile = UserProfile.objects.get(student_id=student_id)
-                                now = timezone.now()
-                                current_time_only = now.time()
-                                
-                                # Determine action based on which side of line
-                                # Left side (face_center_x <= line_x) = Check-In
-                                # Right side (face_center_x > line_x) = Check-Out
-                                if is_right_side:
-                                    action = 'Check-Out'
-                                    status = 'On-Time'  # Check-out doesn't have late status
-                                else:
-                                    action = 'Check-In'
-                                    status = 'Late' if current_time_only > cutoff_time else 'On-Time'
-                                
-                                # Get the last attendance entry for this student today
-                                last_entry = Attendance.objects.filter(
-                                    student=profile,
-                                    date=now.date(),
-                                    class_name=class_name
-                                ).order_by('-timestamp').first()
-                                
-                                # Enforce alternating sequence: Check-In → Check-Out → Check-In → Check-Out
-                                can_create = False
-                                if last_entry is None:
-                                    # No entries yet - only allow check-in
-                                    can_create = (action == 'Check-In')
-                                elif last_entry.action == 'Check-In':
-                                    # Last action was check-in - only allow check-out
-                                    can_create = (action == 'Check-Out')
-                                elif last_entry.action == 'Check-Out':
-                                    # Last action was check-out - only allow check-in
-                                    can_create = (action == 'Check-In')
-                                
-                                # Only create entry if action follows proper sequence
-                                if can_create:
-                                    # Create separate entry for this action (check-in or check-out)
-                                    attendance = Attendance.objects.create(
-                                        student=profile,
-                                        date=now.date(),
-                                        class_name=class_name,
-                                        timestamp=now,
-                                        action=action,
-                                        status=status
-                                    )
-                                    
-                                    # Store result for display
-                                    attendance_camera_active[session_id]['last_result'] = {
-                                        'student_id': student_id,
-                                        'name': profile.user.first_name or profile.user.username,
-                                        'status': status,
-                                        'time': now.strftime('%H:%M:%S'),
-                                        'action': action
-                                    }
-                            except UserProfile.DoesNotExist:
-                                pass
-                            
-                            # Draw green rectangle
-                            cv2.rectangle(frame, (x, y), (x+w, y+h), (0, 255, 0), 2)
-                            cv2.putText(frame, student_id, (x, y-10),
-                                       cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-                        else:
-                            # Unknown person detected
-                            cv2.rectangle(frame, (x, y), (x+w, y+h), (0, 0, 255), 2)
-                            cv2.putText(frame, "Unknown", (x, y-10),
-                                       cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
-                            
-                            # Track unknown face detection time (require 3 seconds continuous detection)
-                            face_position_key = f"{x}_{y}_{w}_{h}"  # Approximate position key
-                            unknown_detections = attendance_camera_active[session_id].get('unknown_detections', {})
-                            current_time = time.time()
-                            
-                            # Find if this is a continuing detection (within 50px of previous)
-                            continuing_detection = None
-                            for key, start_time in list(unknown_detections.items()):
-                                # Clean old detections (not seen in last 2 seconds)
-                                if current_time - start_time > 5:
-                                    del unknown_detections[key]
-                                    continue
-                                
-                                # Check if this is same person (approximate position match)
-                                old_coords = key.split('_')
-                                if len(old_coords) == 4:
-                                    old_x, old_y = int(old_coords[0]), int(old_coords[1])
-                                    if abs(x - old_x) < 50 and abs(y - old_y) < 50:
-                                        continuing_detection = key
-                                        break
-                            
-                            if continuing_detection:
-                                # Continuing detection - check if 3 seconds elapsed
-                                detection_duration = current_time - unknown_detections[continuing_detection]
-                                if detection_duration >= 3.0:
-                                    # Unknown face confirmed after 3 seconds - save once
-                                    last_save = attendance_camera_active[session_id]['last_recognition'].get('unknown_saved', 0)
-                                    if current_time - last_save > 10:  # Save at most once per 10 seconds
-                                        attendance_camera_active[session_id]['last_recognition']['unknown_saved'] = current_time
-                                        
-                                        # Save to database
-                                        face_bgr = frame[y:y+h, x:x+w]
-                                        ret, buffer = cv2.imencode('.jpg', face_bgr)
-                                        unknown = UnknownPerson(class_name=class_name)
-                                        unknown.image.save(f'unknown_{int(time.time())}.jpg', ContentFile(buffer.tobytes()))
-                                        unknown.save()
-                                        
-                                        attendance_camera_active[session_id]['last_result'] = {
-                                            'unknown': True,
-                                            'message': '⚠️ Unknown person detected!'
-                                        }
-                                        
-                                        # Clear this detection after saving
-                                        del unknown_detections[continuing_detection]
-                            else:
-                                # New unknown detection - start tracking
-                                unknown_detections[face_position_key] = current_time
-                            
-                            # Update the unknown_detections dict
-                            attendance_camera_active[session_id]['unknown_detections'] = unknown_detections
-                    
-                    except Exception as e:
-                        print(f"Recognition error: {e}")
-                        cv2.rectangle(frame, (x, y), (x+w, y+h), (255, 0, 0), 2)
-                
-                # Store frame for streaming
-                attendance_camera_frames[session_id] = frame.copy()
-                time.sleep(0.033)
-            
-            cap.release()
-            attendance_camera_active[session_id]['active'] = False
-            
-        except Exception as e:
-            print(f"Camera error: {e}")
-            attendance_camera_active[session_id]['error'] = str(e)
-            attendance_camera_active[session_id]['active'] = False
-    
-    thread = threading.Thread(target=run_attendance_camera, daemon=True)
-    thread.start()
+    # Capture, inference and persistence run as separate pipeline stages;
+    # embeddings go through the worker pool shared by every camera
+    try:
+        session_id = session_manager.start_session(class_name, cutoff_time, source=source, mirror=mirror)
+    except AdmissionError as e:
+        return JsonResponse({'error': str(e)}, status=503)
     
-    return JsonResponse({'success': True, 'session_id': session_id})
+    return JsonResponse({'success': True, 'session_id': session_id, 'model': registry.stats()})
 
 
-def attendance_video_feed(request, session_id):
+async def attendance_video_feed(request, session_id):
     """Stream attendance camera feed."""
-    def generate():
-        while attendance_camera_active.get(session_id, {}).get('active', False):
-            frame = attendance_camera_frames.get(session_id)
-            if frame is not None:
-                ret, buffer = cv2.imencode('.jpg', frame)
-                frame_bytes = buffer.tobytes()
-                yield (b'--frame\r\n'
-                       b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
-            time.sleep(0.033)
-    
-    return StreamingHttpResponse(generate(), content_type='multipart/x-mixed-replace; boundary=frame')
+    return _mjpeg_response(request, attendance_camera_frames.get(session_id))
 
 
 @csrf_exempt
-def attendance_status(request, session_id):
+async def attendance_status(request, session_id):
     """Get attendance camera status."""
     status = attendance_camera_active.get(session_id, {})
     return JsonResponse(status)
@@ -866,119 +689,45 @@ def stop_attendance_camera(request):
     except:
         return JsonResponse({'error': 'Invalid request'}, status=400)
     
-    if session_id in attendance_camera_active:
-        attendance_camera_active[session_id]['active'] = False
+    session_manager.stop_session(session_id)
     
     return JsonResponse({'success': True})
 
 
+@csrf_exempt
+def attendance_sessions(request):
+    """Per-camera FPS and latency metrics, shared worker pool load and admission state."""
+    return JsonResponse(session_manager.metrics())
+
+
+@login_required
+async def attendance_events(request):
+    """Server-Sent Events stream of check-ins, check-outs, unknown faces, camera results and counters."""
+    try:
+        last_event_id = int(request.headers.get('Last-Event-ID', ''))
+    except ValueError:
+        last_event_id = None
+    # As with the video feeds, WSGI cannot stream an async iterator
+    stream = aevent_stream(last_event_id) if _is_asgi(request) else event_stream(last_event_id)
+    response = StreamingHttpResponse(stream, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Let nginx pass events through immediately
+    return response
+
+
 @login_required
 def dashboard_stats(request):
     """Get real-time dashboard statistics."""
-    from django.db.models import Count, Q
-    from datetime import date, timedelta
-    
-    today = date.today()
-    
-    # Total students
-    total_students = UserProfile.objects.count()
-    
-    # Today's attendance (unique students based on Check-In actions)
-    today_attendance = Attendance.objects.filter(date=today, action='Check-In').values('student').distinct().count()
-    attendance_rate = round((today_attendance / total_students * 100), 1) if total_students > 0 else 0
-
-    # Active sessions by class - compute students whose last action today is Check-In
-    classes_in_session = 0
-
-    # On-time vs Late (distinct students counted once based on their Check-In status)
-    on_time_count = Attendance.objects.filter(date=today, action='Check-In', status='On-Time').values('student').distinct().count()
-    late_count = Attendance.objects.filter(date=today, action='Check-In', status='Late').values('student').distinct().count()
-    punctuality = round((on_time_count / today_attendance * 100), 0) if today_attendance > 0 else 0
-
-    # Unknown faces today
-    unknown_count = UnknownPerson.objects.filter(detected_at__date=today).count()
-
-    # Weekly attendance trend (last 7 days) - count unique students who checked in each day
-    weekly_data = []
-    for i in range(6, -1, -1):
-        day = today - timedelta(days=i)
-        count = Attendance.objects.filter(date=day, action='Check-In').values('student').distinct().count()
-        weekly_data.append({
-            'date': day.strftime('%a'),
-            'count': count
-        })
-
-    # Class breakdown (distinct students who checked in today)
-    class_data = Attendance.objects.filter(date=today, action='Check-In').values('class_name').annotate(
-        count=Count('student', distinct=True),
-        on_time=Count('student', filter=Q(status='On-Time', action='Check-In'), distinct=True),
-        late=Count('student', filter=Q(status='Late', action='Check-In'), distinct=True)
-    )
+    from datetime import date
 
-    # Top classes by attendance
-    top_classes = list(class_data.order_by('-count')[:4])
-    
-    # Live classroom status (students currently checked in)
-    from django.db.models import Max, F
-    live_classes = []
-    for cls in ['BCA', 'BSC', 'BCOM', 'ELECTRONICS']:
-        # Get distinct students and their most recent action today in this class
-        # Use subquery to get the latest timestamp per student
-        latest_entries = Attendance.objects.filter(date=today, class_name=cls).values('student').annotate(
-            latest_timestamp=Max('timestamp')
-        )
-        
-        checked_in = 0
-        for entry in latest_entries:
-            student_id = entry['student']
-            latest_timestamp = entry['latest_timestamp']
-            # Get the most recent attendance entry for this student
-            last_attendance = Attendance.objects.filter(
-                date=today,
-                class_name=cls,
-                student_id=student_id,
-                timestamp=latest_timestamp
-            ).first()
-            if last_attendance and last_attendance.action == 'Check-In':
-                checked_in += 1
-        
-        # Assume max capacity of 60 students per class
-        capacity_percent = min(round((checked_in / 60) * 100), 120)
-        if checked_in == 0:
-            status = 'No active session'
-            status_color = 'slate'
-        else:
-            status = 'In session' if capacity_percent < 80 else ('Filling fast' if capacity_percent < 100 else 'Over capacity')
-            status_color = 'emerald' if capacity_percent < 80 else ('amber' if capacity_percent < 100 else 'rose')
-        live_classes.append({
-            'class_name': cls,
-            'checked_in': checked_in,
-            'capacity_percent': capacity_percent,
-            'status': status,
-            'status_color': status_color
-        })
-    
-    return JsonResponse({
-        'total_students': total_students,
-        'attendance_rate': attendance_rate,
-        'classes_in_session': classes_in_session,
-        'punctuality': punctuality,
-        'unknown_count': unknown_count,
-        'weekly_data': weekly_data,
-        'class_data': list(class_data),
-        'top_classes': top_classes,
-        'live_classes': live_classes,
-        'today_attendance': today_attendance,
-        'on_time_count': on_time_count,
-        'late_count': late_count,
-    })
+    # A constant number of grouped queries, independent of the number of students
+    return JsonResponse(attendance_stats.dashboard_stats(date.today()))
 
 
 @login_required
 def crowd_report(request):
     """Return a crowd detection summary for configured classrooms/zones."""
     from datetime import date
-    from django.db.models import Max
 
     today = date.today()
 
@@ -995,17 +744,11 @@ def crowd_report(request):
     total_capacity = 0
     zones = []
 
-    for zone_name, capacity in zones_config.items():
-        # For each student in this zone today get their latest timestamp
-        latest_entries = Attendance.objects.filter(date=today, class_name=zone_name).values('student').annotate(latest_timestamp=Max('timestamp'))
+    # Students whose latest action today is Check-In, for every zone in one query
+    present = attendance_stats.present_by_class(today, list(zones_config))
 
-        checked_in = 0
-        for entry in latest_entries:
-            student_id = entry['student']
-            latest_ts = entry['latest_timestamp']
-            last_att = Attendance.objects.filter(date=today, class_name=zone_name, student_id=student_id, timestamp=latest_ts).first()
-            if last_att and last_att.action == 'Check-In':
-                checked_in += 1
+    for zone_name, capacity in zones_config.items():
+        checked_in = present[zone_name]
 
         capacity_percent = min(round((checked_in / capacity) * 100), 120) if capacity > 0 else 0
 
@@ -1112,7 +855,6 @@ def get_time_ago(dt):
 @login_required
 def class_attendance_history(request):
     """Get attendance history for all classes (last 30 days)."""
-    from django.db.models import Count, Q
     from datetime import date, timedelta
     
     today = date.today()
@@ -1121,39 +863,19 @@ def class_attendance_history(request):
     classes = ['BCA', 'BSC', 'BCOM', 'ELECTRONICS']
     class_data = {}
     
+    # Two queries over the daily rollups for every class
+    days = attendance_stats.class_days(thirty_days_ago, today, classes)
+    # Distinct students who checked in during the period
+    students = attendance_stats.class_students(thirty_days_ago, classes)
+
     for cls in classes:
-        # Get all attendance records for this class in last 30 days
-        records = Attendance.objects.filter(
-            class_name=cls,
-            date__gte=thirty_days_ago,
-            date__lte=today
-        ).values('date').annotate(
-            total=Count('id'),
-            on_time=Count('id', filter=Q(status='On-Time')),
-            late=Count('id', filter=Q(status='Late'))
-        ).order_by('date')
-        
-        # Calculate summary statistics (unique students based on Check-In actions)
-        # Count distinct students who checked in during the period
-        total_attendance = Attendance.objects.filter(
-            class_name=cls,
-            date__gte=thirty_days_ago,
-            action='Check-In'
-        ).values('student').distinct().count()
-        
-        total_on_time = Attendance.objects.filter(
-            class_name=cls,
-            date__gte=thirty_days_ago,
-            action='Check-In',
-            status='On-Time'
-        ).values('student').distinct().count()
-        
-        total_late = Attendance.objects.filter(
-            class_name=cls,
-            date__gte=thirty_days_ago,
-            action='Check-In',
-            status='Late'
-        ).values('student').distinct().count()
+        history = [{'date': row.date, 'total': row.records, 'on_time': row.on_time, 'late': row.late}
+                   for row in days[cls]]
+        checked_in = {row.date: row.students for row in days[cls]}
+
+        total_attendance = students[cls]['students']
+        total_on_time = students[cls]['on_time']
+        total_late = students[cls]['late']
         
         # Get unique students in this class (last 30 days) - same as total_attendance (distinct check-ins)
         unique_students = total_attendance
@@ -1164,15 +886,9 @@ def class_attendance_history(request):
         daily_data = []
         for i in range(6, -1, -1):
             day = today - timedelta(days=i)
-            # count distinct students who checked in that day
-            daily_count = Attendance.objects.filter(
-                class_name=cls,
-                date=day,
-                action='Check-In'
-            ).values('student').distinct().count()
             daily_data.append({
                 'date': day.strftime('%a'),
-                'count': daily_count
+                'count': checked_in.get(day, 0)
             })
         
         class_data[cls] = {
@@ -1183,7 +899,7 @@ def class_attendance_history(request):
             'unique_students': unique_students,
             'on_time_percentage': on_time_percentage,
             'daily_data': daily_data,
-            'history': list(records)
+            'history': history
         }
     
     # Sort by on_time_percentage descending
@@ -1,8 +1,12 @@
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework import status
-from .models import FacultyProfile, StudentProfile, Attendance, Notification, UserProfile
+from .models import (
+    FacultyProfile, StudentProfile, Attendance, Notification, NotificationBroadcast, UserProfile, StudentDailyAttendance
+)
+from .notification_dispatcher import notification_dispatcher
 from django.contrib.auth.models import User
+from django.db.models import Prefetch
 from django.utils import timezone
 from datetime import datetime
 
@@ -439,26 +443,26 @@ def send_notification_to_students(request):
         faculty_name = 'Faculty'
         if faculty_id:
             try:
-                faculty = FacultyProfile.objects.get(pk=faculty_id)
+                faculty = FacultyProfile.objects.select_related('user').get(pk=faculty_id)
                 faculty_name = f"{faculty.user.first_name} {faculty.user.last_name}".strip() or faculty.user.username
             except FacultyProfile.DoesNotExist:
                 pass
         
-        # Get students and create notifications
-        students = UserProfile.objects.filter(id__in=student_ids).select_related('user')
-        notifications_created = 0
-        
-        for student in students:
-            if student.user:
-                Notification.objects.create(
-                    user=student.user,
-                    title=title,
-                    description=f"From {faculty_name}: {message}",
-                    notification_type='info',
-                    icon='mail',
-                    icon_color='#3498DB',
-                )
-                notifications_created += 1
+        # The message is stored once; each student gets a receipt row, bulk-inserted off the request path
+        recipient_ids = list(UserProfile.objects.filter(
+            id__in=student_ids, user__isnull=False
+        ).values_list('user_id', flat=True))
+        broadcast = NotificationBroadcast.objects.create(
+            sender=faculty,
+            sender_name=faculty_name,
+            title=title,
+            description=f"From {faculty_name}: {message}",
+            recipients_count=len(recipient_ids),
+        )
+        notifications_created = notification_dispatcher.dispatch(
+            Notification(user_id=user_id, broadcast=broadcast, notification_type=broadcast.notification_type)
+            for user_id in recipient_ids
+        )
         
         return Response({
             'message': f'Notification sent to {notifications_created} student(s).',
@@ -471,60 +475,32 @@ def send_notification_to_students(request):
 @api_view(['GET'])
 def get_faculty_sent_notifications(request, pk):
     """
-    Fetches notifications sent by a faculty (to students in their department).
-    This is a placeholder - in a full implementation, you'd track which faculty sent which notification.
-    For now, we return recent notifications to students in the faculty's department.
+    Fetches the latest 50 notifications a faculty has sent, with their recipients.
     pk: Faculty profile ID
     """
     try:
         faculty = FacultyProfile.objects.get(pk=pk)
-        department = faculty.department
-        
-        # Get students in the department
-        students = UserProfile.objects.filter(
-            department__iexact=department,
-            # approval_status='Approved'
-        ).select_related('user')
-        
-        student_user_ids = [s.user.id for s in students if s.user]
-        
-        # Get recent notifications sent to these students (info type with 'From' in description)
-        notifications = Notification.objects.filter(
-            user_id__in=student_user_ids,
-            notification_type='info',
-            description__startswith='From'
+        receipts = Notification.objects.select_related('user').only(
+            'broadcast', 'user__username', 'user__first_name', 'user__last_name').order_by('id')
+        broadcasts = faculty.broadcasts.prefetch_related(
+            Prefetch('receipts', queryset=receipts)
         ).order_by('-created_at')[:50]
         
         data = []
-        for notif in notifications:
-            # Find recipient student name
-            recipient_name = 'Unknown'
-            for student in students:
-                if student.user and student.user.id == notif.user_id:
-                    recipient_name = f"{student.user.first_name} {student.user.last_name}".strip() or student.user.username
-                    break
-            
-            notif_data = {
-                'id': notif.id,
-                'title': notif.title,
-                'message': notif.description.replace(f'From {faculty.user.first_name} {faculty.user.last_name}: ', '').replace(f'From {faculty.user.username}: ', ''),
-                'created_at': notif.created_at.isoformat(),
-                'recipients_count': 1,
-                'recipients': [{'name': recipient_name}],
-            }
-            data.append(notif_data)
-        
-        # Group notifications by title and created_at (within 1 minute) to combine recipients
-        grouped = {}
-        for notif in data:
-            key = f"{notif['title']}_{notif['created_at'][:16]}"  # Group by title and minute
-            if key not in grouped:
-                grouped[key] = notif
-            else:
-                grouped[key]['recipients_count'] += 1
-                grouped[key]['recipients'].extend(notif['recipients'])
+        for broadcast in broadcasts:
+            data.append({
+                'id': broadcast.id,
+                'title': broadcast.title,
+                'message': broadcast.description.removeprefix(f'From {broadcast.sender_name}: '),
+                'created_at': broadcast.created_at.isoformat(),
+                'recipients_count': broadcast.recipients_count,
+                'recipients': [
+                    {'name': f"{receipt.user.first_name} {receipt.user.last_name}".strip() or receipt.user.username}
+                    for receipt in broadcast.receipts.all()
+                ],
+            })
         
-        return Response(list(grouped.values()), status=status.HTTP_200_OK)
+        return Response(data, status=status.HTTP_200_OK)
     except FacultyProfile.DoesNotExist:
         return Response({'error': 'Faculty profile not found.'}, status=status.HTTP_404_NOT_FOUND)
     except Exception as e:
@@ -553,21 +529,12 @@ def get_faculty_dashboard_stats(request, pk):
         print(students)
         total_students = students.count()
         
-        # Count attendance for today
-        present_today = 0
-        absent_today = 0
-        
-        for student in students:
-            # Check if there's attendance for today
-            attendance = Attendance.objects.filter(
-                student=student,
-                date=today
-            ).first()
-            
-            if attendance and attendance.status in ['On-Time', 'present', 'Present', 'Late']:
-                present_today += 1
-            else:
-                absent_today += 1
+        # Count attendance for today from the daily rollups
+        present_today = StudentDailyAttendance.objects.filter(
+            student__in=students,
+            date=today
+        ).values('student').distinct().count()
+        absent_today = total_students - present_today
         
         # Calculate attendance rate
         attendance_rate = 0
@@ -0,0 +1,355 @@
+"""
+Live attendance events for the dashboard.
+
+Check-ins, check-outs and unknown-person sightings are published to an
+in-process EventBus once they are committed (see signals.py), together with
+today's dashboard counters, which are updated incrementally instead of
+being recomputed per viewer. The dashboard subscribes once over
+Server-Sent Events and no longer polls the stats endpoints.
+"""
+import asyncio
+import json
+import queue
+import threading
+from collections import deque
+from datetime import datetime
+
+from asgiref.sync import sync_to_async
+from django.utils import timezone
+
+from .models import UserProfile, Attendance, UnknownPerson
+
+# Classrooms shown in the live classroom panel and their nominal capacity
+LIVE_CLASSES = ['BCA', 'BSC', 'BCOM', 'ELECTRONICS']
+CLASS_CAPACITY = 60
+
+# Events kept for clients that reconnect with Last-Event-ID
+EVENT_HISTORY = 200
+
+# Events buffered per viewer before the oldest are dropped
+SUBSCRIBER_QUEUE_SIZE = 100
+
+# Seconds between keep-alive comments on an idle stream
+KEEPALIVE_SECONDS = 15
+
+
+def live_class_status(class_name, checked_in, capacity=CLASS_CAPACITY):
+    """Live classroom card for a class with checked_in students currently present."""
+    capacity_percent = min(round((checked_in / capacity) * 100), 120)
+    if checked_in == 0:
+        status = 'No active session'
+        status_color = 'slate'
+    else:
+        status = 'In session' if capacity_percent < 80 else ('Filling fast' if capacity_percent < 100 else 'Over capacity')
+        status_color = 'emerald' if capacity_percent < 80 else ('amber' if capacity_percent < 100 else 'rose')
+    return {
+        'class_name': class_name,
+        'checked_in': checked_in,
+        'capacity_percent': capacity_percent,
+        'status': status,
+        'status_color': status_color
+    }
+
+
+class LiveCounters:
+    """
+    Today's dashboard counters kept in memory.
+
+    Seeded from the database by the first viewer that needs them (never on
+    the write path) and then updated from each committed Attendance or
+    UnknownPerson, so serving them to any number of viewers costs no
+    queries. Changes that cannot be applied incrementally (students added
+    or removed, attendance deleted) invalidate them until the next seed.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._seeded = threading.Condition(self._lock)
+        self._seeding = False
+        self.day = None
+        self.stale = True
+
+    def seed(self, day=None):
+        day = day or timezone.now().date()
+        total_students = UserProfile.objects.count()
+        rows = list(Attendance.objects.filter(date=day).order_by('timestamp').values_list(
+            'student_id', 'class_name', 'action', 'status'))
+        unknown_count = UnknownPerson.objects.filter(detected_at__date=day).count()
+        with self._lock:
+            self.day = day
+            self.stale = False
+            self.total_students = total_students
+            self.checked_in = set()
+            self.on_time = set()
+            self.late = set()
+            self.classes = {}
+            self.last_action = {}
+            for row in rows:
+                self._apply(*row)
+            self.unknown_count = unknown_count
+
+    def invalidate(self):
+        """Make the next snapshot reseed from the database."""
+        with self._lock:
+            self.stale = True
+
+    def _is_current(self, day):
+        return not self.stale and day == self.day
+
+    def _apply(self, student_pk, class_name, action, status):
+        self.last_action[(class_name, student_pk)] = action
+        if action != 'Check-In':
+            return
+        per_class = self.classes.setdefault(class_name, {'students': set(), 'on_time': set(), 'late': set()})
+        self.checked_in.add(student_pk)
+        per_class['students'].add(student_pk)
+        if status == 'On-Time':
+            self.on_time.add(student_pk)
+            per_class['on_time'].add(student_pk)
+        elif status == 'Late':
+            self.late.add(student_pk)
+            per_class['late'].add(student_pk)
+
+    def record_attendance(self, attendance):
+        day = attendance.date.date() if isinstance(attendance.date, datetime) else attendance.date
+        with self._lock:
+            # Counters that are not seeded for this day will read the record when they are
+            if self._is_current(day):
+                self._apply(attendance.student_id, attendance.class_name, attendance.action, attendance.status)
+
+    def record_unknown(self, unknown):
+        with self._lock:
+            if self._is_current(timezone.localdate(unknown.detected_at)):
+                self.unknown_count += 1
+
+    def snapshot(self, seed=True):
+        """
+        Counters in the same shape as the dashboard stats endpoint.
+
+        Args:
+            seed: Reseed counters that are stale or from another day; when
+                False such counters give None instead of querying
+        """
+        today = timezone.now().date()
+        must_seed = False
+        with self._lock:
+            if not self._is_current(today):
+                if not seed:
+                    return None
+                # Single flight: viewers that find a seed running wait for it instead of repeating its queries
+                while self._seeding:
+                    self._seeded.wait()
+                must_seed = self._seeding = not self._is_current(today)
+        if must_seed:
+            try:
+                self.seed(today)
+            finally:
+                with self._lock:
+                    self._seeding = False
+                    self._seeded.notify_all()
+        with self._lock:
+            today_attendance = len(self.checked_in)
+            class_data = [
+                {'class_name': name, 'count': len(c['students']), 'on_time': len(c['on_time']), 'late': len(c['late'])}
+                for name, c in self.classes.items()
+            ]
+            present = {}
+            for (class_name, _), action in self.last_action.items():
+                if action == 'Check-In':
+                    present[class_name] = present.get(class_name, 0) + 1
+            live_classes = [live_class_status(name, present.get(name, 0)) for name in LIVE_CLASSES]
+            return {
+                'total_students': self.total_students,
+                'attendance_rate': round((today_attendance / self.total_students * 100), 1) if self.total_students > 0 else 0,
+                'classes_in_session': sum(1 for c in live_classes if c['checked_in']),
+                'punctuality': round((len(self.on_time) / today_attendance * 100), 0) if today_attendance > 0 else 0,
+                'unknown_count': self.unknown_count,
+                'class_data': class_data,
+                'top_classes': sorted(class_data, key=lambda c: -c['count'])[:4],
+                'live_classes': live_classes,
+                'today_attendance': today_attendance,
+                'on_time_count': len(self.on_time),
+                'late_count': len(self.late),
+            }
+
+
+class EventSubscriber:
+    """One SSE viewer served by a worker thread (WSGI): a bounded queue that drops its oldest event when full."""
+
+    def __init__(self, maxsize=SUBSCRIBER_QUEUE_SIZE):
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+    def offer(self, event):
+        self._put(event)
+
+    def _put(self, event):
+        with self._lock:
+            while True:
+                try:
+                    self.queue.put_nowait(event)
+                    return
+                except queue.Full:
+                    # Slow viewer: lose the oldest event rather than grow without bound
+                    try:
+                        self.queue.get_nowait()
+                        self.dropped += 1
+                    except queue.Empty:
+                        pass
+
+    def get(self, timeout):
+        """Next event, or None if nothing arrived within timeout seconds."""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class AsyncEventSubscriber:
+    """One SSE viewer served by an event loop (ASGI): a bounded asyncio queue fed from any thread."""
+
+    def __init__(self, loop, maxsize=SUBSCRIBER_QUEUE_SIZE):
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def offer(self, event):
+        try:
+            self.loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            # The viewer's event loop has already shut down
+            pass
+
+    def _put(self, event):
+        if self.queue.full():
+            # Slow viewer: lose the oldest event rather than grow without bound
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(event)
+
+
+class EventBus:
+    """Fan-out of numbered events from worker threads to thread or async viewers."""
+
+    def __init__(self, history=EVENT_HISTORY):
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._history = deque(maxlen=history)
+        self._last_id = 0
+
+    def publish(self, event_type, data):
+        with self._lock:
+            self._last_id += 1
+            event = (self._last_id, event_type, data)
+            self._history.append(event)
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            subscriber.offer(event)
+
+    def subscribe(self, last_event_id=None, loop=None):
+        """
+        Register a viewer; events after last_event_id that are still in history are replayed.
+
+        Args:
+            last_event_id: ID of the last event the viewer received, if reconnecting
+            loop: Event loop of an async viewer; None for a viewer on its own thread
+        """
+        subscriber = AsyncEventSubscriber(loop) if loop is not None else EventSubscriber()
+        with self._lock:
+            self._subscribers.add(subscriber)
+            if last_event_id is not None:
+                for event in self._history:
+                    if event[0] > last_event_id:
+                        subscriber._put(event)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def stats(self):
+        with self._lock:
+            return {'viewers': len(self._subscribers), 'last_id': self._last_id}
+
+
+event_bus = EventBus()
+live_counters = LiveCounters()
+
+
+def publish_attendance(attendance):
+    """
+    Publish a committed check-in/check-out and the updated counters.
+
+    Counters that need a reseed are published as None; each stream fetches
+    them itself, so the writer never runs the seeding queries.
+    """
+    live_counters.record_attendance(attendance)
+    user = attendance.student.user
+    event_bus.publish('attendance', {
+        'student_id': attendance.student.student_id,
+        'name': user.first_name or user.username,
+        'class_name': attendance.class_name,
+        'action': attendance.action,
+        'status': attendance.status,
+        'time': timezone.localtime(attendance.timestamp).strftime('%H:%M:%S'),
+    })
+    event_bus.publish('counters', live_counters.snapshot(seed=False))
+
+
+def publish_unknown(unknown):
+    """Publish a committed unknown-person sighting and the updated counters."""
+    live_counters.record_unknown(unknown)
+    event_bus.publish('unknown', {
+        'id': unknown.id,
+        'image_url': unknown.image.url if unknown.image else '',
+        'detected_at': timezone.localtime(unknown.detected_at).strftime('%Y-%m-%d %H:%M:%S'),
+        'class_name': unknown.class_name,
+    })
+    event_bus.publish('counters', live_counters.snapshot(seed=False))
+
+
+def format_sse(event_type, data, event_id=None):
+    lines = [f"id: {event_id}"] if event_id is not None else []
+    lines.append(f"event: {event_type}")
+    lines.append(f"data: {json.dumps(data, default=str)}")
+    return ('\n'.join(lines) + '\n\n').encode()
+
+
+def event_stream(last_event_id=None):
+    """SSE body for a viewer on a worker thread (WSGI): current counters, then every live event."""
+    subscriber = event_bus.subscribe(last_event_id)
+    try:
+        yield format_sse('counters', live_counters.snapshot())
+        while True:
+            event = subscriber.get(KEEPALIVE_SECONDS)
+            if event is None:
+                # Comment line keeps proxies from closing an idle connection; under WSGI
+                # it is also how a disconnected viewer is noticed and its thread freed
+                yield b': keep-alive\n\n'
+                continue
+            event_id, event_type, data = event
+            if event_type == 'counters' and data is None:
+                data = live_counters.snapshot()
+            yield format_sse(event_type, data, event_id)
+    finally:
+        event_bus.unsubscribe(subscriber)
+
+
+async def aevent_stream(last_event_id=None):
+    """Async version of event_stream() for ASGI; a waiting viewer holds no thread."""
+    subscriber = event_bus.subscribe(last_event_id, loop=asyncio.get_running_loop())
+    try:
+        yield format_sse('counters', await sync_to_async(live_counters.snapshot)())
+        while True:
+            try:
+                event_id, event_type, data = await asyncio.wait_for(subscriber.queue.get(), KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                # Comment line keeps proxies from closing an idle connection
+                yield b': keep-alive\n\n'
+                continue
+            if event_type == 'counters' and data is None:
+                data = await sync_to_async(live_counters.snapshot)()
+            yield format_sse(event_type, data, event_id)
+    finally:
+        event_bus.unsubscribe(subscriber)
@@ -0,0 +1,28 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.rollups import backfill_rollups
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the daily class and student attendance rollups from Attendance history.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', help='First day to rebuild (YYYY-MM-DD); default is the beginning')
+        parser.add_argument('--until', help='Last day to rebuild (YYYY-MM-DD); default is the latest record')
+
+    def parse_date(self, value):
+        if not value:
+            return None
+        try:
+            return datetime.strptime(value, '%Y-%m-%d').date()
+        except ValueError:
+            raise CommandError(f'Invalid date "{value}", expected YYYY-MM-DD')
+
+    def handle(self, *args, **options):
+        start = self.parse_date(options['since'])
+        end = self.parse_date(options['until'])
+        class_rows, student_rows = backfill_rollups(start, end)
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {class_rows} class and {student_rows} student daily rollups'))
@@ -0,0 +1,23 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.presence import rebuild_presence
+
+
+class Command(BaseCommand):
+    help = 'Recompute the CurrentPresence table (latest action per student, class and day) from Attendance history.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='Only rebuild this day (YYYY-MM-DD); default is every day')
+
+    def handle(self, *args, **options):
+        day = None
+        if options['date']:
+            try:
+                day = datetime.strptime(options['date'], '%Y-%m-%d').date()
+            except ValueError:
+                raise CommandError('Invalid date, expected YYYY-MM-DD')
+        written = rebuild_presence(day)
+        scope = day.isoformat() if day else 'all days'
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {written} presence rows for {scope}'))
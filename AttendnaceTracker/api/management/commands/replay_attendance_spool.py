@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from api.attendance_writer import replay_spools
+
+
+class Command(BaseCommand):
+    help = 'Write attendance events left in the spool by camera sessions that stopped before flushing them.'
+
+    def handle(self, *args, **options):
+        written = replay_spools()
+        self.stdout.write(self.style.SUCCESS(f'Replayed {written} attendance records'))
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.4 on 2026-10-17 06:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0022_notification'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CurrentPresence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('class_name', models.CharField(max_length=50)),
+                ('date', models.DateField()),
+                ('action', models.CharField(choices=[('Check-In', 'Check-In'), ('Check-Out', 'Check-Out')], max_length=20)),
+                ('timestamp', models.DateTimeField()),
+                ('attendance', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='api.attendance')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='presence', to='api.userprofile')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['date', 'class_name', 'action'], name='api_current_date_45f4f5_idx')],
+                'constraints': [models.UniqueConstraint(fields=('student', 'class_name', 'date'), name='unique_presence_per_class_day')],
+            },
+        ),
+    ]
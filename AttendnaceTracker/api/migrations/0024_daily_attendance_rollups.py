@@ -0,0 +1,49 @@
+# Generated by Django 5.2.4 on 2026-10-17 07:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0023_currentpresence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClassDailyAttendance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('class_name', models.CharField(max_length=50)),
+                ('records', models.PositiveIntegerField(default=0)),
+                ('on_time', models.PositiveIntegerField(default=0)),
+                ('late', models.PositiveIntegerField(default=0)),
+                ('check_ins', models.PositiveIntegerField(default=0)),
+                ('students', models.PositiveIntegerField(default=0)),
+                ('on_time_students', models.PositiveIntegerField(default=0)),
+                ('late_students', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('date', 'class_name'), name='unique_class_daily_attendance')],
+            },
+        ),
+        migrations.CreateModel(
+            name='StudentDailyAttendance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('class_name', models.CharField(max_length=50)),
+                ('records', models.PositiveIntegerField(default=0)),
+                ('check_ins', models.PositiveIntegerField(default=0)),
+                ('on_time_check_ins', models.PositiveIntegerField(default=0)),
+                ('late_check_ins', models.PositiveIntegerField(default=0)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_attendance', to='api.userprofile')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['student', 'date'], name='api_student_student_af9faf_idx')],
+                'constraints': [models.UniqueConstraint(fields=('date', 'student', 'class_name'), name='unique_student_daily_attendance')],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.4 on 2026-10-17 07:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0024_daily_attendance_rollups'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['student', 'date', 'class_name', 'timestamp'], name='attendance_student_day_class'),
+        ),
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['student', 'timestamp'], name='attendance_student_time'),
+        ),
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['date', 'action', 'status'], name='attendance_day_action_status'),
+        ),
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['class_name', 'date'], name='attendance_class_day'),
+        ),
+    ]
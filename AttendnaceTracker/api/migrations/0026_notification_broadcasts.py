@@ -0,0 +1,104 @@
+# Generated by Django 5.2.4 on 2026-10-17 07:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def group_legacy_broadcasts(apps, schema_editor):
+    """Turn faculty messages stored as one full copy per student into broadcasts with receipts."""
+    Notification = apps.get_model('api', 'Notification')
+    NotificationBroadcast = apps.get_model('api', 'NotificationBroadcast')
+    FacultyProfile = apps.get_model('api', 'FacultyProfile')
+
+    faculty_by_name = {}
+    for faculty in FacultyProfile.objects.select_related('user'):
+        name = f"{faculty.user.first_name} {faculty.user.last_name}".strip() or faculty.user.username
+        faculty_by_name.setdefault(name, []).append(faculty)
+
+    # Rows sent together share title, text and minute (as the old sent-history view grouped them)
+    groups = {}
+    legacy = Notification.objects.filter(
+        broadcast__isnull=True, related_attendance__isnull=True, notification_type='info', description__startswith='From '
+    ).order_by('created_at')
+    for notification in legacy:
+        key = (notification.title, notification.description, notification.created_at.replace(second=0, microsecond=0))
+        groups.setdefault(key, []).append(notification)
+
+    for (title, description, _), rows in groups.items():
+        sender_name = description[len('From '):].split(': ', 1)[0]
+        senders = faculty_by_name.get(sender_name, [])
+        broadcast = NotificationBroadcast.objects.create(
+            sender=senders[0] if len(senders) == 1 else None,
+            sender_name=sender_name,
+            title=title,
+            description=description,
+            notification_type=rows[0].notification_type,
+            icon=rows[0].icon,
+            icon_color=rows[0].icon_color,
+            recipients_count=len(rows),
+        )
+        NotificationBroadcast.objects.filter(pk=broadcast.pk).update(created_at=rows[0].created_at)
+        Notification.objects.filter(pk__in=[row.pk for row in rows]).update(broadcast=broadcast, title='', description='')
+
+
+def expand_broadcasts(apps, schema_editor):
+    Notification = apps.get_model('api', 'Notification')
+    NotificationBroadcast = apps.get_model('api', 'NotificationBroadcast')
+    for broadcast in NotificationBroadcast.objects.all():
+        Notification.objects.filter(broadcast=broadcast).update(
+            title=broadcast.title, description=broadcast.description,
+            notification_type=broadcast.notification_type, icon=broadcast.icon, icon_color=broadcast.icon_color,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0025_attendance_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='read_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='notification',
+            name='description',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AlterField(
+            model_name='notification',
+            name='title',
+            field=models.CharField(blank=True, max_length=200),
+        ),
+        migrations.CreateModel(
+            name='NotificationBroadcast',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sender_name', models.CharField(blank=True, max_length=200)),
+                ('title', models.CharField(max_length=200)),
+                ('description', models.TextField()),
+                ('notification_type', models.CharField(default='info', max_length=20)),
+                ('icon', models.CharField(default='mail', max_length=50)),
+                ('icon_color', models.CharField(default='#3498DB', max_length=20)),
+                ('recipients_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('sender', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='broadcasts', to='api.facultyprofile')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='broadcast',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='receipts', to='api.notificationbroadcast'),
+        ),
+        migrations.AddIndex(
+            model_name='notificationbroadcast',
+            index=models.Index(fields=['sender', '-created_at'], name='broadcast_sender_created'),
+        ),
+        migrations.RunPython(group_legacy_broadcasts, expand_broadcasts),
+    ]
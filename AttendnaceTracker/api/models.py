@@ -184,6 +184,16 @@ class Attendance(models.Model):
     
     class Meta:
         ordering = ['-date', '-timestamp']
+        indexes = [
+            # Camera sessions: a student's latest action in a class today
+            models.Index(fields=['student', 'date', 'class_name', 'timestamp'], name='attendance_student_day_class'),
+            # Student and faculty views: a student's records by time
+            models.Index(fields=['student', 'timestamp'], name='attendance_student_time'),
+            # Dashboards: a day's check-ins by status
+            models.Index(fields=['date', 'action', 'status'], name='attendance_day_action_status'),
+            # Class history and rollup rebuilds: a class over a date range
+            models.Index(fields=['class_name', 'date'], name='attendance_class_day'),
+        ]
     
     def __str__(self):
         return f"{self.student.student_id} - {self.action} - {self.date} - {self.class_name}"
@@ -201,6 +211,70 @@ class UnknownPerson(models.Model):
     def __str__(self):
         return f"Unknown person at {self.detected_at}"
 
+
+class CurrentPresence(models.Model):
+    """Latest attendance action per student, class and day; maintained on every Attendance write."""
+    student = models.ForeignKey(UserProfile, on_delete=models.CASCADE, related_name='presence')
+    class_name = models.CharField(max_length=50)
+    date = models.DateField()
+    action = models.CharField(max_length=20, choices=Attendance.ACTION_CHOICES)
+    timestamp = models.DateTimeField()
+    attendance = models.ForeignKey(Attendance, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['student', 'class_name', 'date'], name='unique_presence_per_class_day'),
+        ]
+        indexes = [
+            models.Index(fields=['date', 'class_name', 'action']),
+        ]
+
+    def __str__(self):
+        return f"{self.student.student_id} - {self.action} - {self.date} - {self.class_name}"
+
+
+class ClassDailyAttendance(models.Model):
+    """Per-day attendance totals for a class, updated incrementally from Attendance."""
+    date = models.DateField()
+    class_name = models.CharField(max_length=50)
+    records = models.PositiveIntegerField(default=0)  # Check-ins and check-outs
+    on_time = models.PositiveIntegerField(default=0)  # Records with status On-Time
+    late = models.PositiveIntegerField(default=0)  # Records with status Late
+    check_ins = models.PositiveIntegerField(default=0)
+    students = models.PositiveIntegerField(default=0)  # Distinct students who checked in
+    on_time_students = models.PositiveIntegerField(default=0)
+    late_students = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'class_name'], name='unique_class_daily_attendance'),
+        ]
+
+    def __str__(self):
+        return f"{self.class_name} - {self.date}: {self.students} students"
+
+
+class StudentDailyAttendance(models.Model):
+    """Per-day attendance totals for a student in a class, updated incrementally from Attendance."""
+    date = models.DateField()
+    student = models.ForeignKey(UserProfile, on_delete=models.CASCADE, related_name='daily_attendance')
+    class_name = models.CharField(max_length=50)
+    records = models.PositiveIntegerField(default=0)
+    check_ins = models.PositiveIntegerField(default=0)
+    on_time_check_ins = models.PositiveIntegerField(default=0)
+    late_check_ins = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'student', 'class_name'], name='unique_student_daily_attendance'),
+        ]
+        indexes = [
+            models.Index(fields=['student', 'date']),
+        ]
+
+    def __str__(self):
+        return f"{self.student.student_id} - {self.class_name} - {self.date}: {self.check_ins} check-ins"
+
 # Model for job posting
 class Job(models.Model):
     # Job type choices
@@ -443,6 +517,33 @@ class HelpCenter(models.Model):
 
 
 # Model for Notifications
+class NotificationBroadcast(models.Model):
+    """
+    A message sent to many users at once (e.g. a faculty announcement).
+
+    The content is stored once; each recipient gets a Notification row
+    pointing here that only carries their delivery and read state.
+    """
+    sender = models.ForeignKey('FacultyProfile', on_delete=models.SET_NULL, null=True, blank=True, related_name='broadcasts')
+    sender_name = models.CharField(max_length=200, blank=True)
+    title = models.CharField(max_length=200)
+    description = models.TextField()
+    notification_type = models.CharField(max_length=20, default='info')
+    icon = models.CharField(max_length=50, default='mail')
+    icon_color = models.CharField(max_length=20, default='#3498DB')
+    recipients_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['sender', '-created_at'], name='broadcast_sender_created'),
+        ]
+
+    def __str__(self):
+        return f"{self.sender_name or 'Broadcast'} - {self.title}"
+
+
 class Notification(models.Model):
     """
     Stores user notifications for various events like attendance marking, reminders, etc.
@@ -455,16 +556,19 @@ class Notification(models.Model):
     ]
     
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notifications')
-    title = models.CharField(max_length=200)
-    description = models.TextField()
+    title = models.CharField(max_length=200, blank=True)  # Empty on broadcast receipts
+    description = models.TextField(blank=True)
     notification_type = models.CharField(max_length=20, choices=NOTIFICATION_TYPES, default='info')
     is_read = models.BooleanField(default=False)
+    read_at = models.DateTimeField(null=True, blank=True)
     icon = models.CharField(max_length=50, default='notifications')  # Icon name (e.g., 'checkmark_circle', 'time')
     icon_color = models.CharField(max_length=20, default='#2ECC71')  # Hex color code
     created_at = models.DateTimeField(auto_now_add=True)
     
     # Optional: link to related object
     related_attendance = models.ForeignKey(Attendance, on_delete=models.CASCADE, null=True, blank=True, related_name='notifications')
+    # Set when this row is one recipient's copy of a broadcast, whose content it shows
+    broadcast = models.ForeignKey(NotificationBroadcast, on_delete=models.CASCADE, null=True, blank=True, related_name='receipts')
     
     class Meta:
         ordering = ['-created_at']
@@ -473,6 +577,11 @@ class Notification(models.Model):
             models.Index(fields=['user', 'is_read']),
         ]
     
+    @property
+    def content(self):
+        """The object holding the title, description and icon: the broadcast, or the notification itself."""
+        return self.broadcast if self.broadcast_id else self
+
     def __str__(self):
-        return f"{self.user.username} - {self.title}"
+        return f"{self.user.username} - {self.content.title}"
 
@@ -0,0 +1,118 @@
+"""
+Batched notification delivery.
+
+Callers hand the NotificationDispatcher lists of unsaved Notification
+objects instead of saving them one by one. Batches are queued once the
+surrounding transaction commits and written by a background thread with
+bulk_create, coalescing whatever else is waiting into the same INSERTs, so
+a faculty broadcast or a burst of attendance signals costs a few queries
+off the request path. Set NOTIFICATION_DISPATCH_ASYNC = False to write
+batches inline (e.g. in tests or management commands).
+
+Batches still queued when the process exits are lost.
+"""
+import queue
+import threading
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+
+from .models import Notification
+
+# Notifications written per INSERT, and at most per coalesced write
+NOTIFICATION_BATCH_SIZE = 500
+
+
+class NotificationDispatcher:
+    """Queue of notification batches written by one background worker."""
+
+    def __init__(self, batch_size=NOTIFICATION_BATCH_SIZE):
+        self.batch_size = batch_size
+        self._queue = queue.Queue()
+        self._worker = None
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.sent = 0
+        self.failed = 0
+        self.writes = 0
+
+    @property
+    def run_async(self):
+        return getattr(settings, 'NOTIFICATION_DISPATCH_ASYNC', True)
+
+    def dispatch(self, notifications):
+        """
+        Queue unsaved notifications for writing once the current transaction commits.
+
+        Returns:
+            Number of notifications queued
+        """
+        notifications = list(notifications)
+        if notifications:
+            transaction.on_commit(lambda: self._enqueue(notifications))
+        return len(notifications)
+
+    def _enqueue(self, notifications):
+        self.queued += len(notifications)
+        if not self.run_async:
+            self.send(notifications)
+            return
+        self._queue.put(notifications)
+        if self._worker is None or not self._worker.is_alive():
+            with self._lock:
+                if self._worker is None or not self._worker.is_alive():
+                    self._worker = threading.Thread(target=self._run, name='notification-dispatcher', daemon=True)
+                    self._worker.start()
+
+    def send(self, notifications):
+        """Write notifications now with bulk_create; returns how many were written."""
+        try:
+            Notification.objects.bulk_create(notifications, batch_size=self.batch_size)
+            written = len(notifications)
+        except IntegrityError:
+            # e.g. a recipient deleted while queued; keep the rest of the batch
+            written = 0
+            for notification in notifications:
+                notification.pk = None
+                notification._state.adding = True
+                try:
+                    notification.save()
+                    written += 1
+                except IntegrityError as e:
+                    print(f"Dropping notification for user {notification.user_id}: {e}")
+        self.writes += 1
+        self.sent += written
+        self.failed += len(notifications) - written
+        return written
+
+    def _run(self):
+        while True:
+            batch = self._queue.get()
+            taken = 1
+            # Coalesce everything already waiting into one write
+            while len(batch) < self.batch_size:
+                try:
+                    batch = batch + self._queue.get_nowait()
+                    taken += 1
+                except queue.Empty:
+                    break
+            try:
+                self.send(batch)
+            except Exception as e:
+                print(f"Notification dispatch error: {e}")
+                self.failed += len(batch)
+            finally:
+                close_old_connections()
+                for _ in range(taken):
+                    self._queue.task_done()
+
+    def join(self):
+        """Block until every queued batch has been written."""
+        self._queue.join()
+
+    def stats(self):
+        return {'pending': self._queue.qsize(), 'queued': self.queued, 'sent': self.sent,
+                'failed': self.failed, 'writes': self.writes}
+
+
+notification_dispatcher = NotificationDispatcher()
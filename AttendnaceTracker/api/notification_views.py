@@ -1,56 +1,130 @@
 """
 Notification API Views for student attendance notifications.
 """
+import hashlib
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework import status
 from django.contrib.auth.models import User
+from django.db.models import Q
 from .models import Notification
 from datetime import datetime, timedelta
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.http import parse_etags
+
+
+# Notifications per page of the inbox, and the most a client may ask for
+NOTIFICATIONS_PAGE_SIZE = 50
+MAX_NOTIFICATIONS_PAGE_SIZE = 100
+
+
+def _encode_cursor(notification):
+    """Opaque position of a notification in the inbox's (created_at, id) order."""
+    raw = f"{notification.created_at.isoformat()}|{notification.id}"
+    return urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def _decode_position(value):
+    """
+    (created_at, id) of a cursor, or (created_at, None) of an ISO timestamp.
+
+    Raises:
+        ValueError: If value is neither
+    """
+    # An unescaped '+' of a UTC offset arrives as a space
+    created_at = parse_datetime(value.replace(' ', '+'))
+    pk = None
+    if created_at is None:
+        raw = urlsafe_b64decode(value + '=' * (-len(value) % 4)).decode()
+        stamp, pk = raw.rsplit('|', 1)
+        created_at, pk = parse_datetime(stamp), int(pk)
+        if created_at is None:
+            raise ValueError(value)
+    if timezone.is_naive(created_at):
+        created_at = timezone.make_aware(created_at)
+    return created_at, pk
+
+
+# The redundant created_at bound lets the database seek the index instead of filtering every row
+def _older_than(created_at, pk):
+    if pk is None:
+        return Q(created_at__lt=created_at)
+    return Q(created_at__lte=created_at) & (Q(created_at__lt=created_at) | Q(id__lt=pk))
+
+
+def _newer_than(created_at, pk):
+    if pk is None:
+        return Q(created_at__gt=created_at)
+    return Q(created_at__gte=created_at) & (Q(created_at__gt=created_at) | Q(id__gt=pk))
 
 
 @api_view(['GET'])
 def get_user_notifications(request, user_id):
     """
-    Get all notifications for a specific user.
-    Returns notifications ordered by most recent first.
+    Get one page of a user's notifications, most recent first.
+
+    Query parameters:
+        limit: Page size (default 50, at most 100)
+        cursor: X-Next-Cursor of the previous page, to continue with older notifications
+        since: X-Sync-Cursor of an earlier response (or an ISO timestamp), to only
+            return newer notifications
+
+    The X-Next-Cursor header is set while there are more (older) notifications,
+    X-Sync-Cursor marks the newest one returned for the next incremental sync,
+    and an unchanged page is answered with 304 when If-None-Match matches its ETag.
     """
     try:
         user = User.objects.get(id=user_id)
         
-        # Get all notifications for the user
-        notifications = Notification.objects.filter(user=user)
-        
-        # Build response data
+        try:
+            limit = int(request.query_params.get('limit', NOTIFICATIONS_PAGE_SIZE))
+            limit = min(max(limit, 1), MAX_NOTIFICATIONS_PAGE_SIZE)
+            cursor = request.query_params.get('cursor')
+            since = request.query_params.get('since')
+            # Keyset pagination on (created_at, id) walks the (user, -created_at) index
+            notifications = Notification.objects.filter(user=user)
+            if cursor:
+                notifications = notifications.filter(_older_than(*_decode_position(cursor)))
+            if since:
+                notifications = notifications.filter(_newer_than(*_decode_position(since)))
+        except ValueError:
+            return Response({'error': 'Invalid limit, cursor or since.'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Broadcast receipts carry their message's content
+        page = list(notifications.select_related('broadcast').order_by('-created_at', '-id')[:limit + 1])
+        has_more = len(page) > limit
+        page = page[:limit]
+        
+        # Build response data; the app formats times from createdAt, so an unchanged page stays byte-identical
         notifications_list = []
-        for notif in notifications:
-            # Calculate time ago
-            time_diff = timezone.now() - notif.created_at
-            if time_diff.days > 0:
-                time_ago = f"{time_diff.days} day{'s' if time_diff.days > 1 else ''} ago"
-            elif time_diff.seconds >= 3600:
-                hours = time_diff.seconds // 3600
-                time_ago = f"{hours} hour{'s' if hours > 1 else ''} ago"
-            elif time_diff.seconds >= 60:
-                minutes = time_diff.seconds // 60
-                time_ago = f"{minutes} min ago"
-            else:
-                time_ago = "Just now"
-            
+        for notif in page:
+            content = notif.content
             notifications_list.append({
                 'id': notif.id,
-                'title': notif.title,
-                'description': notif.description,
-                'type': notif.notification_type,
-                'icon': notif.icon,
-                'iconColor': notif.icon_color,
-                'time': time_ago,
+                'title': content.title,
+                'description': content.description,
+                'type': content.notification_type,
+                'icon': content.icon,
+                'iconColor': content.icon_color,
                 'isRead': notif.is_read,
                 'createdAt': notif.created_at.isoformat(),
             })
         
-        return Response(notifications_list, status=status.HTTP_200_OK)
+        headers = {'Cache-Control': 'private, no-cache'}
+        if has_more:
+            headers['X-Next-Cursor'] = _encode_cursor(page[-1])
+        if not cursor and (page or since):
+            headers['X-Sync-Cursor'] = _encode_cursor(page[0]) if page else since
+        digest = hashlib.md5(json.dumps([notifications_list, headers], sort_keys=True).encode(), usedforsecurity=False)
+        headers['ETag'] = f'"{digest.hexdigest()}"'
+        
+        if headers['ETag'] in parse_etags(request.headers.get('If-None-Match', '')):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(notifications_list, status=status.HTTP_200_OK, headers=headers)
         
     except User.DoesNotExist:
         return Response({'error': 'User not found.'}, status=status.HTTP_404_NOT_FOUND)
@@ -82,8 +156,10 @@ def mark_notification_read(request, notification_id):
     """
     try:
         notification = Notification.objects.get(id=notification_id)
-        notification.is_read = True
-        notification.save()
+        if not notification.is_read:
+            notification.is_read = True
+            notification.read_at = timezone.now()
+            notification.save(update_fields=['is_read', 'read_at'])
         
         return Response({'message': 'Notification marked as read.'}, status=status.HTTP_200_OK)
         
@@ -102,7 +178,7 @@ def mark_all_notifications_read(request, user_id):
         user = User.objects.get(id=user_id)
         
         # Update all unread notifications to read
-        updated_count = Notification.objects.filter(user=user, is_read=False).update(is_read=True)
+        updated_count = Notification.objects.filter(user=user, is_read=False).update(is_read=True, read_at=timezone.now())
         
         return Response({
             'message': 'All notifications marked as read.',
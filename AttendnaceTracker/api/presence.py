@@ -0,0 +1,100 @@
+"""
+Current presence bookkeeping.
+
+CurrentPresence holds the latest action of each student per class and day,
+so "who is checked in right now" is a lookup on a small indexed table
+instead of a scan over every Attendance row.
+"""
+from datetime import datetime
+
+from django.db import IntegrityError, transaction
+from django.db.models import OuterRef, Subquery
+
+from .models import Attendance, CurrentPresence
+
+# Presence rows written per INSERT when rebuilding
+REBUILD_BATCH_SIZE = 1000
+
+
+def _as_date(value):
+    # Attendance.date defaults to timezone.now, so unsaved-then-created rows may still hold a datetime
+    return value.date() if isinstance(value, datetime) else value
+
+
+def record_presence(attendance):
+    """Apply a new Attendance row; an older row never overwrites a newer action."""
+    day = _as_date(attendance.date)
+    with transaction.atomic():
+        updated = CurrentPresence.objects.filter(
+            student_id=attendance.student_id,
+            class_name=attendance.class_name,
+            date=day,
+            timestamp__lte=attendance.timestamp
+        ).update(action=attendance.action, timestamp=attendance.timestamp, attendance=attendance)
+        if updated:
+            return
+        try:
+            with transaction.atomic():
+                CurrentPresence.objects.create(
+                    student_id=attendance.student_id,
+                    class_name=attendance.class_name,
+                    date=day,
+                    action=attendance.action,
+                    timestamp=attendance.timestamp,
+                    attendance=attendance
+                )
+        except IntegrityError:
+            # A newer action for this student, class and day is already recorded
+            pass
+
+
+def refresh_presence(student_id, class_name, day):
+    """Recompute one presence row from Attendance (e.g. after a row was deleted)."""
+    day = _as_date(day)
+    latest = Attendance.objects.filter(
+        student_id=student_id, class_name=class_name, date=day
+    ).order_by('-timestamp', '-id').first()
+    if latest is None:
+        CurrentPresence.objects.filter(student_id=student_id, class_name=class_name, date=day).delete()
+        return
+    CurrentPresence.objects.update_or_create(
+        student_id=student_id, class_name=class_name, date=day,
+        defaults={'action': latest.action, 'timestamp': latest.timestamp, 'attendance': latest}
+    )
+
+
+def rebuild_presence(day=None):
+    """
+    Recompute CurrentPresence from Attendance history.
+
+    Args:
+        day: Only rebuild this date; all dates when None
+
+    Returns:
+        Number of presence rows written
+    """
+    rows = Attendance.objects.all() if day is None else Attendance.objects.filter(date=day)
+    latest = Attendance.objects.filter(
+        date=OuterRef('date'),
+        class_name=OuterRef('class_name'),
+        student=OuterRef('student')
+    ).order_by('-timestamp', '-id').values('id')[:1]
+    latest_rows = rows.filter(id=Subquery(latest)).order_by().values_list(
+        'id', 'student_id', 'class_name', 'date', 'action', 'timestamp')
+
+    written = 0
+    with transaction.atomic():
+        existing = CurrentPresence.objects.all() if day is None else CurrentPresence.objects.filter(date=day)
+        existing.delete()
+        batch = []
+        for attendance_id, student_id, class_name, date, action, timestamp in latest_rows.iterator(chunk_size=REBUILD_BATCH_SIZE):
+            batch.append(CurrentPresence(student_id=student_id, class_name=class_name, date=date,
+                                         action=action, timestamp=timestamp, attendance_id=attendance_id))
+            if len(batch) >= REBUILD_BATCH_SIZE:
+                CurrentPresence.objects.bulk_create(batch)
+                written += len(batch)
+                batch = []
+        if batch:
+            CurrentPresence.objects.bulk_create(batch)
+            written += len(batch)
+    return written
@@ -0,0 +1,144 @@
+"""
+Daily attendance rollups.
+
+ClassDailyAttendance and StudentDailyAttendance hold per-day totals that
+are bumped on every Attendance insert (see signals.py), so history and
+statistics endpoints read a handful of small rows instead of scanning raw
+attendance. Distinct-student counters are only incremented the first time
+a student's own counter leaves zero, which keeps them exact under
+concurrent writers.
+"""
+from django.db import transaction
+from django.db.models import Count, F, Q
+
+from .models import Attendance, ClassDailyAttendance, StudentDailyAttendance
+from .presence import _as_date
+
+# Rollup rows written per INSERT when backfilling
+BACKFILL_BATCH_SIZE = 1000
+
+# Per-status counters: (student check-in field, class distinct-student field)
+STATUS_FIELDS = {
+    'On-Time': ('on_time_check_ins', 'on_time_students'),
+    'Late': ('late_check_ins', 'late_students'),
+}
+
+
+def _class_totals():
+    """Aggregates of raw Attendance rows that make up a ClassDailyAttendance row."""
+    check_in = Q(action='Check-In')
+    return {
+        'records': Count('id'),
+        'on_time': Count('id', filter=Q(status='On-Time')),
+        'late': Count('id', filter=Q(status='Late')),
+        'check_ins': Count('id', filter=check_in),
+        'students': Count('student', filter=check_in, distinct=True),
+        'on_time_students': Count('student', filter=check_in & Q(status='On-Time'), distinct=True),
+        'late_students': Count('student', filter=check_in & Q(status='Late'), distinct=True),
+    }
+
+
+def _student_totals():
+    """Aggregates of raw Attendance rows that make up a StudentDailyAttendance row."""
+    check_in = Q(action='Check-In')
+    return {
+        'records': Count('id'),
+        'check_ins': Count('id', filter=check_in),
+        'on_time_check_ins': Count('id', filter=check_in & Q(status='On-Time')),
+        'late_check_ins': Count('id', filter=check_in & Q(status='Late')),
+    }
+
+
+def _bump(model, pk, field):
+    """Increment a counter; True if it went from zero to one."""
+    if model.objects.filter(pk=pk, **{field: 0}).update(**{field: 1}):
+        return True
+    model.objects.filter(pk=pk).update(**{field: F(field) + 1})
+    return False
+
+
+def record_rollups(attendance):
+    """Add a new Attendance row to its class and student rollups."""
+    day = _as_date(attendance.date)
+    with transaction.atomic():
+        student_pk = StudentDailyAttendance.objects.get_or_create(
+            date=day, student_id=attendance.student_id, class_name=attendance.class_name)[0].pk
+        class_pk = ClassDailyAttendance.objects.get_or_create(date=day, class_name=attendance.class_name)[0].pk
+
+        StudentDailyAttendance.objects.filter(pk=student_pk).update(records=F('records') + 1)
+        class_updates = {'records': F('records') + 1}
+        if attendance.status == 'On-Time':
+            class_updates['on_time'] = F('on_time') + 1
+        elif attendance.status == 'Late':
+            class_updates['late'] = F('late') + 1
+
+        if attendance.action == 'Check-In':
+            class_updates['check_ins'] = F('check_ins') + 1
+            if _bump(StudentDailyAttendance, student_pk, 'check_ins'):
+                class_updates['students'] = F('students') + 1
+            fields = STATUS_FIELDS.get(attendance.status)
+            if fields and _bump(StudentDailyAttendance, student_pk, fields[0]):
+                class_updates[fields[1]] = F(fields[1]) + 1
+
+        ClassDailyAttendance.objects.filter(pk=class_pk).update(**class_updates)
+
+
+def refresh_student_rollup(day, class_name, student_id):
+    """Recompute one student's rollup for a class and day from raw rows (e.g. after a delete)."""
+    day = _as_date(day)
+    totals = Attendance.objects.filter(
+        date=day, class_name=class_name, student_id=student_id).aggregate(**_student_totals())
+    if totals['records']:
+        StudentDailyAttendance.objects.update_or_create(
+            date=day, student_id=student_id, class_name=class_name, defaults=totals)
+    else:
+        StudentDailyAttendance.objects.filter(date=day, student_id=student_id, class_name=class_name).delete()
+
+
+def refresh_class_rollup(day, class_name):
+    """Recompute one class's rollup for a day from raw rows (e.g. after a delete)."""
+    day = _as_date(day)
+    totals = Attendance.objects.filter(date=day, class_name=class_name).aggregate(**_class_totals())
+    if totals['records']:
+        ClassDailyAttendance.objects.update_or_create(date=day, class_name=class_name, defaults=totals)
+    else:
+        ClassDailyAttendance.objects.filter(date=day, class_name=class_name).delete()
+
+
+def refresh_rollups(day, class_name, student_id):
+    """Recompute the rollups touched by one student, class and day from raw rows."""
+    with transaction.atomic():
+        refresh_student_rollup(day, class_name, student_id)
+        refresh_class_rollup(day, class_name)
+
+
+def backfill_rollups(start=None, end=None):
+    """
+    Rebuild the rollups for a date range from Attendance history.
+
+    Args:
+        start: First date to rebuild; unbounded when None
+        end: Last date to rebuild; unbounded when None
+
+    Returns:
+        Tuple of (class rows, student rows) written
+    """
+    dates = Q()
+    if start is not None:
+        dates &= Q(date__gte=start)
+    if end is not None:
+        dates &= Q(date__lte=end)
+    rows = Attendance.objects.filter(dates).order_by()
+
+    with transaction.atomic():
+        ClassDailyAttendance.objects.filter(dates).delete()
+        StudentDailyAttendance.objects.filter(dates).delete()
+        class_rows = ClassDailyAttendance.objects.bulk_create(
+            [ClassDailyAttendance(**totals) for totals in
+             rows.values('date', 'class_name').annotate(**_class_totals())],
+            batch_size=BACKFILL_BATCH_SIZE)
+        student_rows = StudentDailyAttendance.objects.bulk_create(
+            [StudentDailyAttendance(student_id=totals.pop('student'), **totals) for totals in
+             rows.values('date', 'student', 'class_name').annotate(**_student_totals())],
+            batch_size=BACKFILL_BATCH_SIZE)
+    return len(class_rows), len(student_rows)
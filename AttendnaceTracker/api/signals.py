@@ -1,46 +1,100 @@
-from django.db.models.signals import post_save
+import threading
+import weakref
+
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from .models import Attendance, Notification
+from .models import Attendance, Notification, UnknownPerson, UserProfile
+from .live_events import live_counters, publish_attendance, publish_unknown
+from .notification_dispatcher import notification_dispatcher
+from .presence import record_presence, refresh_presence
+from .rollups import record_rollups, refresh_class_rollup, refresh_student_rollup
 from django.utils import timezone
 
 
+# Per thread and database alias, a weak reference to the batch the open transaction queued.
+# Only the on-commit callback list keeps a batch alive, so when a rollback discards its
+# callback the batch goes too and the next refresh starts (and registers) a new one.
+_queued_refreshes = threading.local()
+
+
+class _PendingRefreshes:
+    """Refreshes queued by one transaction, each run once after it commits."""
+
+    def __init__(self, alias):
+        self.alias = alias
+        self.calls = {}  # (refresh, args) -> None, in queueing order
+
+    def __call__(self):
+        batches = vars(_queued_refreshes)
+        if self.alias in batches and batches[self.alias]() is self:
+            del batches[self.alias]
+        calls, self.calls = self.calls, {}
+        for refresh, args in calls:
+            refresh(*args)
+
+
+def _refresh_on_commit(refresh, *args):
+    """
+    Run refresh(*args) once the current transaction commits, however many
+    deleted rows ask for it (a cascade sends post_delete row by row).
+    """
+    alias = transaction.get_connection().alias
+    batches = vars(_queued_refreshes)
+    pending = batches[alias]() if alias in batches else None
+    if pending is None:
+        pending = _PendingRefreshes(alias)
+        batches[alias] = weakref.ref(pending)
+        pending.calls[(refresh, args)] = None
+        transaction.on_commit(pending, using=alias)
+    else:
+        pending.calls[(refresh, args)] = None
+
+
+def build_attendance_notification(attendance):
+    """
+    Unsaved Notification telling the student their attendance was marked.
+    """
+    # Determine notification details based on action and status
+    if attendance.action == 'Check-In':
+        if attendance.status == 'On-Time':
+            title = 'Attendance Marked Successfully'
+            description = f'Your attendance for {attendance.class_name} class has been marked present with {98.5}% confidence.'
+            icon = 'checkmark_circle'
+            icon_color = '#2ECC71'  # Green
+            notification_type = 'success'
+        else:  # Late
+            title = 'Late Check-In Recorded'
+            description = f'You checked in late for {attendance.class_name} class. Please try to arrive on time.'
+            icon = 'time'
+            icon_color = '#F39C12'  # Orange
+            notification_type = 'warning'
+    else:  # Check-Out
+        title = 'Check-Out Recorded'
+        description = f'Your check-out for {attendance.class_name} class has been recorded successfully.'
+        icon = 'exit'
+        icon_color = '#3498DB'  # Blue
+        notification_type = 'info'
+
+    return Notification(
+        user=attendance.student.user,
+        title=title,
+        description=description,
+        notification_type=notification_type,
+        icon=icon,
+        icon_color=icon_color,
+        related_attendance=attendance,
+    )
+
+
 @receiver(post_save, sender=Attendance)
 def create_attendance_notification(sender, instance, created, **kwargs):
     """
     Automatically create a notification when attendance is marked.
     """
     if created:
-        # Determine notification details based on action and status
-        if instance.action == 'Check-In':
-            if instance.status == 'On-Time':
-                title = 'Attendance Marked Successfully'
-                description = f'Your attendance for {instance.class_name} class has been marked present with {98.5}% confidence.'
-                icon = 'checkmark_circle'
-                icon_color = '#2ECC71'  # Green
-                notification_type = 'success'
-            else:  # Late
-                title = 'Late Check-In Recorded'
-                description = f'You checked in late for {instance.class_name} class. Please try to arrive on time.'
-                icon = 'time'
-                icon_color = '#F39C12'  # Orange
-                notification_type = 'warning'
-        else:  # Check-Out
-            title = 'Check-Out Recorded'
-            description = f'Your check-out for {instance.class_name} class has been recorded successfully.'
-            icon = 'exit'
-            icon_color = '#3498DB'  # Blue
-            notification_type = 'info'
-        
-        # Create the notification
-        Notification.objects.create(
-            user=instance.student.user,
-            title=title,
-            description=description,
-            notification_type=notification_type,
-            icon=icon,
-            icon_color=icon_color,
-            related_attendance=instance,
-        )
+        # Written in the background, together with other queued notifications
+        notification_dispatcher.dispatch([build_attendance_notification(instance)])
 
 
 @receiver(post_save, sender=Attendance)
@@ -52,3 +106,74 @@ def create_class_reminder(sender, instance, created, **kwargs):
     # Example: Create a reminder 15 minutes before next class
     # This would typically be done with a scheduled task (Celery, etc.)
     pass
+
+
+@receiver(post_save, sender=Attendance)
+def update_current_presence(sender, instance, created, **kwargs):
+    """
+    Keep CurrentPresence in step with new attendance rows.
+    """
+    if created:
+        record_presence(instance)
+
+
+@receiver(post_delete, sender=Attendance)
+def refresh_current_presence(sender, instance, **kwargs):
+    """
+    Fall back to the previous action when an attendance row is removed.
+    """
+    _refresh_on_commit(refresh_presence, instance.student_id, instance.class_name, instance.date)
+
+
+@receiver(post_save, sender=Attendance)
+def update_daily_rollups(sender, instance, created, **kwargs):
+    """
+    Add new attendance rows to the daily class and student rollups.
+    """
+    if created:
+        record_rollups(instance)
+
+
+@receiver(post_delete, sender=Attendance)
+def refresh_daily_rollups(sender, instance, **kwargs):
+    """
+    Recompute the daily rollups a removed attendance row contributed to.
+    """
+    _refresh_on_commit(refresh_student_rollup, instance.date, instance.class_name, instance.student_id)
+    _refresh_on_commit(refresh_class_rollup, instance.date, instance.class_name)
+
+
+@receiver(post_save, sender=Attendance)
+def publish_attendance_event(sender, instance, created, **kwargs):
+    """
+    Push new check-ins/check-outs to live dashboard viewers once they are committed.
+    """
+    if created:
+        transaction.on_commit(lambda: publish_attendance(instance), robust=True)
+
+
+@receiver(post_save, sender=UnknownPerson)
+def publish_unknown_event(sender, instance, created, **kwargs):
+    """
+    Push unknown-person sightings to live dashboard viewers once they are committed.
+    """
+    if created:
+        transaction.on_commit(lambda: publish_unknown(instance), robust=True)
+
+
+@receiver(post_save, sender=UserProfile)
+def invalidate_live_counters_on_enrollment(sender, instance, created, **kwargs):
+    """
+    Reseed the live dashboard counters so a new student counts towards the total.
+    """
+    if created:
+        transaction.on_commit(live_counters.invalidate)
+
+
+@receiver(post_delete, sender=UserProfile)
+@receiver(post_delete, sender=Attendance)
+def invalidate_live_counters_on_delete(sender, instance, **kwargs):
+    """
+    Reseed the live dashboard counters after removals they cannot apply incrementally.
+    """
+    transaction.on_commit(live_counters.invalidate)
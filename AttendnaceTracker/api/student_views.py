@@ -110,9 +110,9 @@ def get_student_stats(request, student_id):
     Get attendance statistics for a specific student.
     Returns present days, absent days, total classes, and attendance rate.
     """
-    from .models import UserProfile, Attendance
+    from .models import UserProfile
+    from .attendance_stats import student_checkins
     from datetime import date, timedelta
-    from django.db.models import Count, Q
     
     try:
         # Get the UserProfile (face recognition profile) - student_id is passed as int from URL
@@ -123,16 +123,13 @@ def get_student_stats(request, student_id):
         today = date.today()
         first_day_of_month = date(today.year, today.month, 1)
         
-        # Get attendance records for current month
-        monthly_attendance = Attendance.objects.filter(
-            student=profile,
-            date__gte=first_day_of_month,
-            date__lte=today,
-            action='Check-In'  # Only count check-ins
-        )
+        week_start = today - timedelta(days=today.weekday())
+        
+        # Month and week totals from the daily rollups in one query
+        checkins = student_checkins(profile, first_day_of_month, week_start, today)
         
         # Count present days (unique dates with check-in)
-        present_days = monthly_attendance.values('date').distinct().count()
+        present_days = checkins['present_days']
         
         # Calculate total working days in the month so far (excluding weekends for simplicity)
         total_days = (today - first_day_of_month).days + 1
@@ -143,19 +140,13 @@ def get_student_stats(request, student_id):
         absent_days = max(0, estimated_working_days - present_days)
         
         # Total classes attended
-        total_classes = monthly_attendance.count()
+        total_classes = checkins['total_classes']
         
         # Attendance rate
         attendance_rate = round((present_days / estimated_working_days * 100), 1) if estimated_working_days > 0 else 0
         
         # Weekly stats (this week)
-        week_start = today - timedelta(days=today.weekday())
-        weekly_present = Attendance.objects.filter(
-            student=profile,
-            date__gte=week_start,
-            date__lte=today,
-            action='Check-In'
-        ).values('date').distinct().count()
+        weekly_present = checkins['weekly_present']
         
         # Calculate weekly working days and absent days
         days_in_week = (today - week_start).days + 1
@@ -163,12 +154,7 @@ def get_student_stats(request, student_id):
         weekly_absent = max(0, weekly_working_days - weekly_present)
         
         # Weekly classes count
-        weekly_classes = Attendance.objects.filter(
-            student=profile,
-            date__gte=week_start,
-            date__lte=today,
-            action='Check-In'
-        ).count()
+        weekly_classes = checkins['weekly_classes']
         
         data = {
             'present_days': present_days,
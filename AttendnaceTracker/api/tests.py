@@ -1,3 +1,891 @@
-from django.test import TestCase
+import json
+import os
+import shutil
+import tempfile
+import threading
+from datetime import date, datetime, time, timedelta
+from io import StringIO
 
-# Create your tests here.
+import cv2
+import numpy as np
+
+from unittest import mock, skipUnless
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import attendance_stats
+from . import attendance_writer
+from .attendance_writer import AttendanceWriter, replay_spools
+from .face_recognition_views import face_capture_frames
+from .attendance_pipeline import AttendanceSession, CameraSessionManager  # after face_recognition_views sets sys.path
+from ann_index import IVFEmbeddingIndex, load_index
+from embedding_index import EmbeddingIndex, l2_normalize
+from face_tracker import FaceTracker
+from train import FaceRecognitionTrainer
+from gallery_compaction import centroid_and_outliers, compact_gallery, evaluate_compaction, kmeans_medoids
+from mjpeg_broadcaster import MjpegBroadcaster
+from .live_events import LiveCounters, event_bus, event_stream, live_counters
+from .models import (
+    UserProfile, Attendance, CurrentPresence, ClassDailyAttendance, StudentDailyAttendance, Notification,
+    NotificationBroadcast, FacultyProfile
+)
+
+
+def create_students(count, start=0):
+    return [
+        UserProfile.objects.create(user=User.objects.create_user(f'student{i}'), student_id=f'REG{i:03d}')
+        for i in range(start, start + count)
+    ]
+
+
+def mark(student, day, class_name, action, status='On-Time', minute=0, save=True):
+    stamp = timezone.make_aware(datetime.combine(day, time(9, 0)) + timedelta(minutes=minute))
+    attendance = Attendance(student=student, date=day, class_name=class_name,
+                            timestamp=stamp, action=action, status=status)
+    if save:
+        attendance.save()
+    return attendance
+
+
+class DashboardStatsTests(TestCase):
+    def setUp(self):
+        self.today = date.today()
+
+    def test_query_count_does_not_grow_with_students(self):
+        for i, student in enumerate(create_students(5)):
+            mark(student, self.today, 'BCA', 'Check-In', 'Late' if i % 2 else 'On-Time')
+            mark(student, self.today - timedelta(days=i), 'BSC', 'Check-In', minute=30)
+        with self.assertNumQueries(5):
+            attendance_stats.dashboard_stats(self.today)
+
+        for student in create_students(20, start=5):
+            mark(student, self.today, 'BCOM', 'Check-In')
+            mark(student, self.today, 'BCOM', 'Check-Out', minute=10)
+        with self.assertNumQueries(5):
+            attendance_stats.dashboard_stats(self.today)
+
+    def test_stats_values(self):
+        alice, bob, carol = create_students(3)
+        mark(alice, self.today, 'BCA', 'Check-In', 'On-Time')
+        mark(bob, self.today, 'BCA', 'Check-In', 'Late')
+        mark(bob, self.today, 'BCA', 'Check-Out', minute=5)
+        mark(carol, self.today - timedelta(days=1), 'BSC', 'Check-In')
+
+        stats = attendance_stats.dashboard_stats(self.today)
+
+        self.assertEqual(stats['today_attendance'], 2)
+        self.assertEqual(stats['on_time_count'], 1)
+        self.assertEqual(stats['late_count'], 1)
+        self.assertEqual([d['count'] for d in stats['weekly_data']][-2:], [1, 2])
+        live = {c['class_name']: c['checked_in'] for c in stats['live_classes']}
+        # Bob checked out again, so only Alice is still in BCA
+        self.assertEqual(live, {'BCA': 1, 'BSC': 0, 'BCOM': 0, 'ELECTRONICS': 0})
+        self.assertEqual(stats['classes_in_session'], 1)
+
+
+@override_settings(NOTIFICATION_DISPATCH_ASYNC=False)
+class LiveEventTests(TestCase):
+    def setUp(self):
+        self.today = timezone.now().date()
+        self.student = create_students(1)[0]
+        live_counters.invalidate()
+        self.subscriber = event_bus.subscribe()
+        self.addCleanup(event_bus.unsubscribe, self.subscriber)
+
+    def events(self):
+        events = []
+        while (event := self.subscriber.get(0)) is not None:
+            events.append(event[1:])
+        return events
+
+    def test_only_committed_attendance_is_published(self):
+        live_counters.snapshot()
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(IntegrityError), transaction.atomic():
+                mark(self.student, self.today, 'BCA', 'Check-In')
+                raise IntegrityError('batch failed')
+        self.assertEqual(self.events(), [])
+        self.assertEqual(live_counters.snapshot()['today_attendance'], 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            mark(self.student, self.today, 'BCA', 'Check-In')
+        events = self.events()
+        self.assertEqual([event_type for event_type, _ in events], ['attendance', 'counters'])
+        self.assertEqual(events[1][1]['today_attendance'], 1)
+
+    def test_enrollment_and_deletes_reseed_counters(self):
+        self.assertEqual(live_counters.snapshot()['total_students'], 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            create_students(2, start=1)
+        self.assertEqual(live_counters.snapshot()['total_students'], 3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            attendance = mark(self.student, self.today, 'BCA', 'Check-In')
+        self.assertEqual(live_counters.snapshot()['today_attendance'], 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            attendance.delete()
+        self.assertEqual(live_counters.snapshot()['today_attendance'], 0)
+
+    def test_concurrent_viewers_share_one_seed(self):
+        counters = LiveCounters()
+        counters.seed()
+        counters.invalidate()
+        seeding, release = threading.Event(), threading.Event()
+
+        def slow_seed(day):
+            seeding.set()
+            release.wait(5)
+            counters.stale = False
+
+        snapshots = []
+        with mock.patch.object(counters, 'seed', side_effect=slow_seed) as seed:
+            viewers = [threading.Thread(target=lambda: snapshots.append(counters.snapshot())) for _ in range(4)]
+            for viewer in viewers:
+                viewer.start()
+            # Let the other viewers reach the stale counters while the first seed is still running
+            seeding.wait(5)
+            for viewer in viewers:
+                viewer.join(0.05)
+            release.set()
+            for viewer in viewers:
+                viewer.join(5)
+        self.assertEqual(seed.call_count, 1)
+        self.assertEqual([s['total_students'] for s in snapshots], [1] * 4)
+
+    def test_stale_counters_are_seeded_by_the_stream(self):
+        stream = event_stream()
+        self.assertTrue(next(stream).startswith(b'event: counters'))
+        live_counters.invalidate()
+        # Writers publish stale counters as None instead of running the seed queries
+        with self.assertNumQueries(0):
+            event_bus.publish('counters', live_counters.snapshot(seed=False))
+        self.assertIn(b'"total_students": 1', next(stream))
+        stream.close()
+
+
+class CurrentPresenceTests(TestCase):
+    def setUp(self):
+        self.today = date.today()
+        self.alice, self.bob = create_students(2)
+
+    def presence(self):
+        return {(p.student_id, p.class_name, p.date): p.action for p in CurrentPresence.objects.all()}
+
+    def test_follows_latest_action(self):
+        mark(self.alice, self.today, 'BCA', 'Check-In')
+        checkout = mark(self.alice, self.today, 'BCA', 'Check-Out', minute=10)
+        # A late-arriving older row does not overwrite the newer action
+        mark(self.alice, self.today, 'BCA', 'Check-In', minute=5)
+        self.assertEqual(self.presence(), {(self.alice.id, 'BCA', self.today): 'Check-Out'})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            checkout.delete()
+        self.assertEqual(self.presence(), {(self.alice.id, 'BCA', self.today): 'Check-In'})
+        self.assertEqual(attendance_stats.present_by_class(self.today, ['BCA', 'BSC']), {'BCA': 1, 'BSC': 0})
+
+    def test_cascade_refreshes_each_key_once(self):
+        for minute in range(0, 50, 10):
+            mark(self.alice, self.today, 'BCA', 'Check-In' if minute % 20 == 0 else 'Check-Out', minute=minute)
+        mark(self.bob, self.today, 'BCA', 'Check-In')
+        with self.captureOnCommitCallbacks() as callbacks:
+            Attendance.objects.filter(student=self.alice).delete()
+        # One presence and two rollup refreshes for all five rows, run after the commit
+        refreshes = callbacks[0]
+        self.assertEqual(len(refreshes.calls), 3)
+        with self.assertNumQueries(9):
+            refreshes()
+        self.assertEqual(self.presence(), {(self.bob.id, 'BCA', self.today): 'Check-In'})
+
+    def test_rolled_back_delete_does_not_hold_back_later_refreshes(self):
+        mark(self.alice, self.today, 'BCA', 'Check-In')
+        checkout = mark(self.alice, self.today, 'BCA', 'Check-Out', minute=10).pk
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with self.assertRaises(IntegrityError), transaction.atomic():
+                Attendance.objects.get(pk=checkout).delete()
+                raise IntegrityError('delete failed')
+        self.assertEqual(callbacks, [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Attendance.objects.get(pk=checkout).delete()
+        self.assertEqual(self.presence(), {(self.alice.id, 'BCA', self.today): 'Check-In'})
+
+    def test_rebuild_matches_incremental_updates(self):
+        yesterday = self.today - timedelta(days=1)
+        mark(self.alice, yesterday, 'BSC', 'Check-In')
+        mark(self.alice, self.today, 'BCA', 'Check-In')
+        mark(self.bob, self.today, 'BCA', 'Check-In')
+        mark(self.bob, self.today, 'BCA', 'Check-Out', minute=20)
+        expected = self.presence()
+
+        CurrentPresence.objects.all().delete()
+        call_command('rebuild_presence', stdout=StringIO())
+        self.assertEqual(self.presence(), expected)
+
+        CurrentPresence.objects.filter(date=self.today).delete()
+        call_command('rebuild_presence', date=self.today.isoformat(), stdout=StringIO())
+        self.assertEqual(self.presence(), expected)
+
+
+class DailyRollupTests(TestCase):
+    def setUp(self):
+        self.today = date.today()
+        self.students = create_students(3)
+
+    def rollups(self):
+        classes = {(r.date, r.class_name): (r.records, r.on_time, r.late, r.check_ins, r.students,
+                                            r.on_time_students, r.late_students)
+                   for r in ClassDailyAttendance.objects.all()}
+        students = {(r.date, r.student_id, r.class_name): (r.records, r.check_ins, r.on_time_check_ins, r.late_check_ins)
+                    for r in StudentDailyAttendance.objects.all()}
+        return classes, students
+
+    def test_incremental_updates_match_backfill(self):
+        first, second, third = self.students
+        mark(first, self.today, 'BCA', 'Check-In', 'Late')
+        mark(first, self.today, 'BCA', 'Check-Out', minute=10)
+        extra = mark(first, self.today, 'BCA', 'Check-In', 'On-Time', minute=20)
+        mark(second, self.today, 'BCA', 'Check-In', 'On-Time')
+        mark(third, self.today - timedelta(days=1), 'BSC', 'Check-In', 'Late')
+
+        bca = ClassDailyAttendance.objects.get(date=self.today, class_name='BCA')
+        self.assertEqual((bca.records, bca.check_ins, bca.students, bca.on_time_students, bca.late_students),
+                         (4, 3, 2, 2, 1))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            extra.delete()
+        incremental = self.rollups()
+        ClassDailyAttendance.objects.all().delete()
+        StudentDailyAttendance.objects.all().delete()
+        call_command('backfill_rollups', stdout=StringIO())
+        self.assertEqual(self.rollups(), incremental)
+
+    def test_class_history_reads_rollups(self):
+        user = User.objects.create_user('viewer', password='pw')
+        self.client.force_login(user)
+        for i, student in enumerate(self.students):
+            for day in range(10):
+                mark(student, self.today - timedelta(days=day), 'BCA', 'Check-In', minute=i)
+
+        # Session and user lookups plus two rollup queries, regardless of the amount of history
+        with self.assertNumQueries(4):
+            response = self.client.get('/api/class-history/')
+        bca = response.json()['classes']['BCA']
+        self.assertEqual(bca['total_attendance'], 3)
+        self.assertEqual([d['count'] for d in bca['daily_data']], [3] * 7)
+        self.assertEqual(len(bca['history']), 10)
+
+
+class AttendanceWriterTests(TestCase):
+    def setUp(self):
+        self.today = date.today()
+        self.students = create_students(3)
+        self.spool_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.spool_dir)
+
+    def test_batches_match_single_saves(self):
+        writer = AttendanceWriter('BCA_test', batch_size=3, interval_ms=60000, spool_dir=self.spool_dir)
+        for i, student in enumerate(self.students[:2]):
+            writer.add(mark(student, self.today, 'BCA', 'Check-In', 'Late' if i else 'On-Time', save=False))
+        self.assertEqual(Attendance.objects.count(), 0)
+        self.assertEqual(writer.stats()['queue_depth'], 2)
+        self.assertGreater(os.path.getsize(writer.spool_path), 0)
+
+        # The third event fills the batch
+        writer.add(mark(self.students[0], self.today, 'BCA', 'Check-Out', minute=5, save=False))
+        self.assertEqual(Attendance.objects.count(), 3)
+        self.assertEqual(Notification.objects.filter(related_attendance__isnull=False).count(), 3)
+        self.assertEqual(os.path.getsize(writer.spool_path), 0)
+        self.assertEqual(writer.stats()['flushed'], 3)
+        writer.close()
+        self.assertFalse(os.path.exists(writer.spool_path))
+
+        batched = (set(CurrentPresence.objects.values_list('student_id', 'action')),
+                   list(ClassDailyAttendance.objects.values('records', 'check_ins', 'students', 'late_students')))
+        with self.captureOnCommitCallbacks(execute=True):
+            Attendance.objects.all().delete()
+        mark(self.students[0], self.today, 'BCA', 'Check-In')
+        mark(self.students[1], self.today, 'BCA', 'Check-In', 'Late')
+        mark(self.students[0], self.today, 'BCA', 'Check-Out', minute=5)
+        single = (set(CurrentPresence.objects.values_list('student_id', 'action')),
+                  list(ClassDailyAttendance.objects.values('records', 'check_ins', 'students', 'late_students')))
+        self.assertEqual(batched, single)
+
+    def test_replays_orphaned_spool(self):
+        written = mark(self.students[0], self.today, 'BCA', 'Check-In')
+        lost = mark(self.students[1], self.today, 'BCA', 'Check-In', minute=1, save=False)
+        with open(os.path.join(self.spool_dir, 'BCA_1-999999.jsonl'), 'w') as spool:
+            for row in (written, lost):
+                spool.write(json.dumps({
+                    'student': row.student_id, 'class_name': row.class_name, 'date': row.date.isoformat(),
+                    'timestamp': row.timestamp.isoformat(), 'action': row.action, 'status': row.status,
+                }) + '\n')
+            spool.write('{"student": ')  # torn write
+
+        # Only the event that never reached the database is written again
+        self.assertEqual(replay_spools(self.spool_dir), 1)
+        self.assertEqual(Attendance.objects.filter(date=self.today, class_name='BCA').count(), 2)
+        self.assertEqual(os.listdir(self.spool_dir), [])
+
+    def test_spools_are_not_replayed_without_a_lock_primitive(self):
+        path = os.path.join(self.spool_dir, 'BCA_1-999999.jsonl')
+        with open(path, 'w') as spool:
+            spool.write(json.dumps(attendance_writer._to_record(
+                mark(self.students[0], self.today, 'BCA', 'Check-In', save=False))) + '\n')
+        with mock.patch.object(attendance_writer, 'fcntl', None), mock.patch.object(attendance_writer, 'msvcrt', None):
+            self.assertEqual(replay_spools(self.spool_dir), 0)
+        self.assertTrue(os.path.exists(path))
+        self.assertEqual(Attendance.objects.count(), 0)
+
+
+class AttendanceStateCacheTests(TestCase):
+    def setUp(self):
+        self.student = create_students(1)[0]
+        self.manager = CameraSessionManager()
+        self.spool_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.spool_dir)
+        self.now = timezone.now().replace(hour=9, minute=0, second=0, microsecond=0)
+
+    def session(self, name):
+        status = {'active': True, 'class_name': 'BCA', 'cutoff_time': time(23, 59)}
+        session = AttendanceSession(name, status, None, None, state=self.manager._state_cache('BCA'))
+        session.writer = AttendanceWriter(name, batch_size=1, spool_dir=self.spool_dir,
+                                         on_drop=session._attendance_dropped)
+        self.addCleanup(session.writer.close)
+        return session
+
+    def actions(self):
+        return list(Attendance.objects.order_by('timestamp').values_list('action', flat=True))
+
+    def test_cameras_of_a_class_share_state(self):
+        door, hall = self.session('door'), self.session('hall')
+        self.assertIs(door.state, hall.state)
+        door._save_attendance('REG000', 'Check-In', self.now)
+        hall._save_attendance('REG000', 'Check-In', self.now + timedelta(seconds=30))  # already in
+        hall._save_attendance('REG000', 'Check-Out', self.now + timedelta(seconds=40))
+        door._save_attendance('REG000', 'Check-Out', self.now + timedelta(seconds=60))  # already out
+        door._save_attendance('REG000', 'Check-In', self.now + timedelta(seconds=80))
+        self.assertEqual(self.actions(), ['Check-In', 'Check-Out', 'Check-In'])
+
+    def test_repeated_sightings_cost_no_queries(self):
+        door = self.session('door')
+        door.state.ensure_day(self.now.date())
+        door._save_attendance('REG000', 'Check-In', self.now)
+        with self.assertNumQueries(0):
+            self.session('hall').state.ensure_day(self.now.date())  # already seeded by the door camera
+            for second in range(1, 5):
+                door._save_attendance('REG000', 'Check-Out', self.now + timedelta(seconds=second))  # cooling down
+            door._save_attendance('REG000', 'Check-In', self.now + timedelta(seconds=30))  # already in
+        self.assertEqual(self.actions(), ['Check-In'])
+
+    def test_dropped_row_is_rolled_back(self):
+        door = self.session('door')
+        with mock.patch.object(attendance_writer, 'write_attendance', side_effect=IntegrityError):
+            door._save_attendance('REG000', 'Check-In', self.now)
+        self.assertEqual(door.writer.stats()['dropped'], 1)
+        # Not cooling down and still checked out, so the next sighting is recorded
+        door._save_attendance('REG000', 'Check-In', self.now + timedelta(seconds=1))
+        self.assertEqual(self.actions(), ['Check-In'])
+
+
+@override_settings(NOTIFICATION_DISPATCH_ASYNC=False)
+class NotificationDispatchTests(TestCase):
+    def setUp(self):
+        faculty_user = User.objects.create_user('teacher', first_name='Ada', last_name='King')
+        self.faculty = FacultyProfile.objects.create(user=faculty_user, employee_id='F1', department='BCA',
+                                                     phone='100', qualifications='MSc')
+
+    def broadcast(self, students, title='Exam'):
+        return self.client.post('/api/faculty/send-notification/', {
+            'faculty_id': self.faculty.id, 'title': title, 'message': 'Hall 2 at 10:00',
+            'student_ids': [student.id for student in students],
+        }, content_type='application/json')
+
+    def test_broadcast_is_stored_once(self):
+        students = create_students(30)
+        # Sender and recipient lookups, the broadcast row and one bulk INSERT of receipts,
+        # however many students are selected
+        with self.assertNumQueries(4), self.captureOnCommitCallbacks(execute=True):
+            response = self.broadcast(students)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['recipients_count'], 30)
+        broadcast = NotificationBroadcast.objects.get()
+        self.assertEqual((broadcast.sender, broadcast.description), (self.faculty, 'From Ada King: Hall 2 at 10:00'))
+        self.assertEqual(broadcast.receipts.filter(title='', description='').count(), 30)
+
+        inbox = self.client.get(f'/api/notifications/{students[0].user_id}/').json()
+        self.assertEqual([(n['title'], n['description'], n['icon']) for n in inbox],
+                         [('Exam', 'From Ada King: Hall 2 at 10:00', 'mail')])
+
+    def test_sent_history(self):
+        students = create_students(5)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.broadcast(students[:2], title='First')
+            self.broadcast(students, title='Second')
+        # Faculty, broadcasts and their recipients, regardless of the number of students
+        with self.assertNumQueries(3):
+            history = self.client.get(f'/api/faculty/{self.faculty.id}/sent-notifications/').json()
+        self.assertEqual([(h['title'], h['message'], h['recipients_count'], len(h['recipients'])) for h in history],
+                         [('Second', 'Hall 2 at 10:00', 5, 5), ('First', 'Hall 2 at 10:00', 2, 2)])
+        self.assertEqual(history[1]['recipients'][0], {'name': 'student0'})
+
+    def test_attendance_notification_after_commit(self):
+        student = create_students(1)[0]
+        with self.captureOnCommitCallbacks(execute=True):
+            attendance = mark(student, date.today(), 'BCA', 'Check-In', 'Late')
+            self.assertFalse(Notification.objects.exists())
+        notification = Notification.objects.get()
+        self.assertEqual((notification.user, notification.related_attendance, notification.notification_type),
+                         (student.user, attendance, 'warning'))
+
+
+class NotificationInboxTests(TestCase):
+    def setUp(self):
+        self.user = create_students(1)[0].user
+        self.url = f'/api/notifications/{self.user.id}/'
+        self.stamp = timezone.now() - timedelta(hours=1)
+
+    def notify(self, count, same_time=False):
+        created = []
+        for i in range(count):
+            notification = Notification.objects.create(user=self.user, title=f'N{i}', description='-')
+            # Rows sharing a timestamp must still page without gaps or repeats
+            stamp = self.stamp if same_time else timezone.now()
+            Notification.objects.filter(pk=notification.pk).update(created_at=stamp)
+            created.append(notification.id)
+        return created
+
+    def test_cursor_pages_cover_every_notification_once(self):
+        older = self.notify(4, same_time=True)
+        newer = self.notify(3)
+        ids, cursor = [], None
+        while True:
+            response = self.client.get(self.url, {'limit': 3, **({'cursor': cursor} if cursor else {})})
+            ids += [n['id'] for n in response.json()]
+            cursor = response.headers.get('X-Next-Cursor')
+            if not cursor:
+                break
+        self.assertEqual(ids, newer[::-1] + older[::-1])
+
+    def test_since_returns_only_new_notifications(self):
+        self.notify(2)
+        sync = self.client.get(self.url).headers['X-Sync-Cursor']
+        new = self.notify(2)
+        response = self.client.get(self.url, {'since': sync})
+        self.assertEqual([n['id'] for n in response.json()], new[::-1])
+
+        sync = response.headers['X-Sync-Cursor']
+        response = self.client.get(self.url, {'since': sync})
+        self.assertEqual((response.json(), response.headers['X-Sync-Cursor']), ([], sync))
+        self.assertEqual(self.client.get(self.url, {'cursor': 'not-a-cursor'}).status_code, 400)
+
+    def test_response_has_fields_the_app_reads(self):
+        self.notify(1)
+        response = self.client.get(self.url)
+        # lib/screens/user/notifications_view.dart builds its cards from these
+        self.assertEqual(set(response.json()[0]), {
+            'id', 'title', 'description', 'type', 'icon', 'iconColor', 'isRead', 'createdAt',
+        })
+        self.assertIsNotNone(parse_datetime(response.json()[0]['createdAt']))
+
+    def test_etag(self):
+        first = self.notify(2)[0]
+        etag = self.client.get(self.url).headers['ETag']
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.client.post(f'/api/notifications/mark-read/{first}/')
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers['ETag'], etag)
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN output is SQLite specific')
+class AttendanceQueryPlanTests(TestCase):
+    """The hot Attendance queries must be index searches, never full table scans."""
+
+    def setUp(self):
+        self.today = date.today()
+        self.student = create_students(1)[0]
+
+    def assertIndexed(self, queryset, index=None):
+        plan = queryset.explain()
+        self.assertIn('USING', plan, plan)
+        self.assertNotIn('SCAN api_attendance', plan, plan)
+        if index:
+            self.assertIn(f'INDEX {index}', plan, plan)
+        return plan
+
+    def test_camera_latest_action(self):
+        # AttendanceSession._save_attendance: the index also provides the ordering
+        plan = self.assertIndexed(Attendance.objects.filter(
+            student=self.student, date=self.today, class_name='BCA'
+        ).order_by('-timestamp')[:1], index='attendance_student_day_class')
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_dashboard_queries(self):
+        self.assertIndexed(Attendance.objects.filter(date=self.today, action='Check-In', status='Late'),
+                           index='attendance_day_action_status')
+        # LiveCounters seeding
+        self.assertIndexed(Attendance.objects.filter(date=self.today).order_by('timestamp'))
+        # Rollup refresh and backfill of a class
+        self.assertIndexed(Attendance.objects.filter(date=self.today, class_name='BCA'),
+                           index='attendance_class_day')
+        self.assertIndexed(Attendance.objects.filter(class_name='BCA', date__gte=self.today - timedelta(days=30)),
+                           index='attendance_class_day')
+
+    def test_faculty_queries(self):
+        self.assertIndexed(Attendance.objects.filter(student=self.student, date=self.today).order_by('-timestamp')[:1])
+        self.assertIndexed(Attendance.objects.filter(
+            student=self.student, date=self.today, action='Check-Out').order_by('-timestamp')[:1])
+        self.assertIndexed(Attendance.objects.filter(student_id__in=[self.student.id]).order_by('-timestamp')[:10])
+
+    def test_student_queries(self):
+        self.assertIndexed(Attendance.objects.filter(student=self.student).order_by('-date', '-timestamp')[:50])
+        self.assertIndexed(Attendance.objects.filter(
+            student=self.student, timestamp__gte=timezone.now() - timedelta(days=7)).order_by('-timestamp')[:10],
+            index='attendance_student_time')
+
+
+class LiveFeedTests(SimpleTestCase):
+    """The MJPEG feeds must stream under both runserver (WSGI) and an ASGI server."""
+
+    def setUp(self):
+        from frame_ring import FrameRing
+        self.ring = FrameRing()
+        seq, frame = self.ring.claim((48, 64, 3))
+        frame[:] = 0
+        self.ring.publish(seq)
+        face_capture_frames['feed-test'] = self.ring
+        self.addCleanup(face_capture_frames.pop, 'feed-test', None)
+        self.addCleanup(self.ring.close)
+
+    def test_wsgi_feed_uses_blocking_generator(self):
+        response = self.client.get('/api/video-feed/feed-test/')
+        self.assertFalse(response.is_async)
+        chunks = iter(response.streaming_content)
+        self.assertTrue(next(chunks).startswith(b'--frame'))
+        self.ring.close()
+        self.assertEqual(list(chunks), [])
+
+    async def test_asgi_feed_uses_async_generator(self):
+        response = await self.async_client.get('/api/video-feed/feed-test/')
+        self.assertTrue(response.is_async)
+        chunks = aiter(response.streaming_content)
+        self.assertTrue((await anext(chunks)).startswith(b'--frame'))
+        self.ring.close()
+        self.assertEqual([chunk async for chunk in chunks], [])
+
+
+class MjpegBroadcasterTests(SimpleTestCase):
+    def setUp(self):
+        from frame_ring import FrameRing
+        self.ring = FrameRing()
+        self.addCleanup(self.ring.close)
+        self.broadcaster = MjpegBroadcaster(self.ring)
+
+    def publish(self):
+        seq, frame = self.ring.claim((48, 64, 3))
+        frame[:] = 0
+        self.ring.publish(seq)
+
+    def test_encoder_idles_without_viewers(self):
+        viewer = self.broadcaster.subscribe()
+        self.publish()
+        self.assertTrue(viewer.mailbox.get(timeout=1.0).startswith(b'--frame'))
+        self.broadcaster.unsubscribe(viewer)
+
+        with mock.patch.object(self.ring, 'read_latest', wraps=self.ring.read_latest) as read_latest:
+            for _ in range(5):
+                self.publish()
+            # Give the encoder thread time to pick the frames up, if it were going to
+            threading.Event().wait(0.2)
+        # At most the read already waiting when the viewer left returns
+        self.assertLessEqual(read_latest.call_count, 1)
+        self.assertEqual(self.broadcaster.encoded, {'normal': 1, 'low': 0})
+
+        # A new viewer wakes the encoder and gets the latest frame
+        viewer = self.broadcaster.subscribe()
+        self.assertTrue(viewer.mailbox.get(timeout=1.0).startswith(b'--frame'))
+
+
+def synthetic_gallery(students, per_student, dim=32, spread=0.15, seed=0, noise_seed=0):
+    """Embeddings scattered around one random centre per student (from seed), rows in shuffled order."""
+    centres = np.random.default_rng(seed).normal(size=(students, dim))
+    rng = np.random.default_rng((seed, noise_seed))
+    labels = np.repeat([f'REG{i:03d}' for i in range(students)], per_student)
+    embeddings = np.repeat(centres, per_student, axis=0) + spread * rng.normal(size=(len(labels), dim))
+    order = rng.permutation(len(labels))
+    return embeddings[order].astype(np.float32), labels[order]
+
+
+def brute_force(embeddings, queries, k):
+    similarities = l2_normalize(queries) @ l2_normalize(embeddings).T
+    rows = np.argsort(-similarities, axis=1, kind='stable')[:, :k]
+    return np.sqrt(np.clip(2 - 2 * np.take_along_axis(similarities, rows, axis=1), 0, None)), rows
+
+
+class EmbeddingIndexTests(SimpleTestCase):
+    def setUp(self):
+        self.embeddings, self.labels = synthetic_gallery(students=20, per_student=10)
+        self.queries, self.expected = synthetic_gallery(students=20, per_student=2, noise_seed=1)
+
+    def assert_matches_brute_force(self, index, k=5):
+        distances, rows = index.search(self.queries, k)
+        expected_distances, expected_rows = brute_force(self.embeddings, self.queries, k)
+        np.testing.assert_allclose(distances, expected_distances, atol=1e-5)
+        # The index stores rows grouped by student, so compare the rows themselves
+        np.testing.assert_allclose(np.asarray(index.vectors)[rows], l2_normalize(self.embeddings)[expected_rows],
+                                   atol=1e-6)
+
+    def test_search_matches_brute_force(self):
+        self.assert_matches_brute_force(EmbeddingIndex.build(self.embeddings, self.labels))
+
+    def test_centroid_shortlist_finds_the_same_neighbours(self):
+        # Well separated students: the true neighbours' centroid is always shortlisted
+        self.assert_matches_brute_force(EmbeddingIndex.build(self.embeddings, self.labels, centroid_shortlist=3))
+
+    def test_match_votes_like_knn(self):
+        index = EmbeddingIndex.build(self.embeddings, self.labels, n_neighbors=3)
+        labels, distances = index.match(self.queries)
+        _, rows = brute_force(self.embeddings, self.queries, 1)
+        self.assertEqual(labels.tolist(), self.labels[rows[:, 0]].tolist())
+        self.assertEqual(labels.tolist(), self.expected.tolist())
+        np.testing.assert_allclose(distances, brute_force(self.embeddings, self.queries, 1)[0][:, 0], atol=1e-5)
+
+    def test_save_and_load_round_trip(self):
+        index = EmbeddingIndex.build(self.embeddings, self.labels, dtype='float16')
+        index_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, index_dir)
+        index.save(index_dir)
+        loaded = EmbeddingIndex.load(index_dir, mmap=True)
+        self.assertEqual(loaded.vectors.dtype, np.float16)
+        self.assertEqual(loaded.predict(self.queries).tolist(), index.predict(self.queries).tolist())
+
+    def test_replace_student_matches_a_rebuild(self):
+        index = EmbeddingIndex.build(self.embeddings, self.labels)
+        new = self.embeddings[self.labels == 'REG003'] * -1
+        replaced = index.replace_student('REG003', new).replace_student('REG007')
+        keep = ~np.isin(self.labels, ['REG003', 'REG007'])
+        rebuilt = EmbeddingIndex.build(np.vstack([self.embeddings[keep], new]),
+                                       np.concatenate([self.labels[keep], ['REG003'] * len(new)]))
+        self.assertEqual(replaced.classes_.tolist(), rebuilt.classes_.tolist())
+        np.testing.assert_allclose(replaced.search(self.queries, 5)[0], rebuilt.search(self.queries, 5)[0], atol=1e-6)
+
+
+class IVFIndexTests(SimpleTestCase):
+    def setUp(self):
+        self.embeddings, self.labels = synthetic_gallery(students=100, per_student=30)
+        self.queries, _ = synthetic_gallery(students=100, per_student=1, noise_seed=1)
+
+    def build(self, **kwargs):
+        return IVFEmbeddingIndex.build(self.embeddings, self.labels, n_lists=40, n_probe=8, min_samples=1000, **kwargs)
+
+    def recall(self, index, k=5):
+        _, rows = index.search(self.queries, k)
+        _, expected_rows = brute_force(self.embeddings, self.queries, k)
+        found = np.asarray(index.vectors)[rows]
+        expected = l2_normalize(self.embeddings)[expected_rows]
+        hits = [(np.abs(found[q][:, None] - expected[q][None]).max(axis=2) < 1e-6).any(axis=0).sum()
+                for q in range(len(self.queries))]
+        return sum(hits) / expected_rows.size
+
+    def test_recall_against_exact_search(self):
+        index = self.build()
+        self.assertFalse(index.is_exact)
+        self.assertGreaterEqual(self.recall(index), 0.95)
+        self.assertEqual(index.predict(self.queries).tolist(),
+                         EmbeddingIndex.build(self.embeddings, self.labels).predict(self.queries).tolist())
+
+    def test_lists_follow_students(self):
+        # With a list per student, k-means++ seeding spreads the centres over the students
+        # (random seeding kept 84% of students in one list and 0.97 recall at n_probe=1)
+        index = IVFEmbeddingIndex.build(self.embeddings, self.labels, n_lists=100, n_probe=1, min_samples=1000)
+        whole = [len(np.unique(index.list_ids[index.codes == code])) == 1 for code in range(len(index.classes_))]
+        self.assertGreaterEqual(np.mean(whole), 0.9)
+        self.assertGreaterEqual(self.recall(index), 0.98)
+
+    def test_small_gallery_searches_exactly(self):
+        index = IVFEmbeddingIndex.build(self.embeddings[:500], self.labels[:500], min_samples=1000)
+        self.assertTrue(index.is_exact)
+        np.testing.assert_allclose(index.search(self.queries, 5)[0],
+                                   brute_force(self.embeddings[:500], self.queries, 5)[0], atol=1e-5)
+
+    def test_saved_lists_are_reused(self):
+        index = self.build()
+        index_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, index_dir)
+        index.save(index_dir)
+        loaded = load_index(index_dir, n_probe=8)
+        np.testing.assert_array_equal(loaded.list_centroids, index.list_centroids)
+        np.testing.assert_array_equal(loaded.list_ids, index.list_ids)
+        self.assertEqual(loaded.trained_samples, len(index))
+
+    def test_replace_student_keeps_lists_until_drift(self):
+        index = self.build(retrain_drift=0.5)
+        updated = index.replace_student('REG000', self.embeddings[self.labels == 'REG001'])
+        np.testing.assert_array_equal(updated.list_centroids, index.list_centroids)
+        # New rows are assigned to their nearest existing list
+        np.testing.assert_array_equal(updated.list_ids, updated._assign_lists(updated.list_centroids))
+        self.assertFalse(updated.needs_retrain)
+
+        for student in range(60):
+            updated = updated.replace_student(f'REG{student:03d}')
+        self.assertTrue(updated.needs_retrain)
+        retrained = updated.retrained()
+        self.assertEqual(retrained.trained_samples, len(updated))
+        self.assertFalse(retrained.needs_retrain)
+
+
+class GalleryCompactionTests(SimpleTestCase):
+    def poses(self, poses=3, frames=8, dim=32, seed=0):
+        """One student's capture: a few distinct poses, each repeated over near-duplicate frames."""
+        rng = np.random.default_rng(seed)
+        centres = rng.normal(size=(poses, dim))
+        pose_ids = np.repeat(np.arange(poses), frames)
+        return np.repeat(centres, frames, axis=0) + 0.05 * rng.normal(size=(len(pose_ids), dim)), pose_ids
+
+    def test_medoids_are_central_real_frames(self):
+        embeddings, pose_ids = self.poses()
+        for pose in range(3):
+            frames = embeddings[pose_ids == pose]
+            vectors = l2_normalize(frames)
+            # A single cluster keeps the frame closest to the pose's mean direction
+            central = int((vectors @ l2_normalize(vectors.mean(axis=0))[0]).argmax())
+            self.assertEqual(kmeans_medoids(frames, 1).tolist(), [central])
+        # k-means++ seeding gives each pose its own medoid
+        medoids = kmeans_medoids(embeddings, 3)
+        self.assertEqual(sorted(pose_ids[medoids].tolist()), [0, 1, 2])
+
+    def test_centroid_and_outliers(self):
+        embeddings, pose_ids = self.poses()
+        prototypes = centroid_and_outliers(embeddings, 4)
+        self.assertEqual(len(prototypes), 4)
+        vectors = l2_normalize(embeddings)
+        np.testing.assert_allclose(prototypes[0], l2_normalize(vectors.mean(axis=0))[0], atol=1e-6)
+        # The outliers come from every pose
+        chosen = [int(np.abs(vectors - prototype).max(axis=1).argmin()) for prototype in prototypes[1:]]
+        self.assertEqual(sorted(pose_ids[chosen].tolist()), [0, 1, 2])
+
+        # A single tight pose is covered by its centroid alone
+        tight, _ = self.poses(poses=1)
+        self.assertEqual(len(centroid_and_outliers(tight, 4)), 1)
+
+    def test_compact_gallery_caps_each_student(self):
+        many, _ = self.poses()
+        few, _ = self.poses(poses=1, frames=2, seed=1)
+        embeddings = np.vstack([many, few])
+        labels = np.array(['REG001'] * len(many) + ['REG002'] * len(few))
+        compact, compact_labels = compact_gallery(embeddings, labels, 3)
+        self.assertEqual(compact_labels.tolist(), ['REG001'] * 3 + ['REG002'] * 2)
+        # Medoids are real embeddings; a student with fewer frames is kept as is
+        for row in compact:
+            self.assertTrue((np.abs(embeddings - row).max(axis=1) == 0).any())
+
+    def test_evaluation_reports_no_loss_for_separated_students(self):
+        embeddings, labels = synthetic_gallery(students=10, per_student=10)
+        order = np.argsort(labels, kind='stable')
+        report = evaluate_compaction(embeddings[order], labels[order], 3)
+        self.assertEqual(report['compact']['gallery_size'], 30)
+        self.assertEqual(report['full']['accuracy'], 1.0)
+        self.assertEqual(report['accuracy_change'], 0.0)
+
+
+class FaceTrackerTests(SimpleTestCase):
+    def setUp(self):
+        self.tracker = FaceTracker(iou_threshold=0.3, max_misses=2, reembed_interval=3,
+                                   confident_distance=0.6, recognition_threshold=0.8)
+
+    def test_ids_persist_while_faces_move(self):
+        first = self.tracker.update([(100, 100, 50, 50), (300, 100, 50, 50)])
+        ids = [track.track_id for track in first]
+        # Small step (IoU match) for one face, a fast jump within a face width for the other
+        second = self.tracker.update([(310, 100, 50, 50), (140, 110, 50, 50)])
+        self.assertEqual([track.track_id for track in second], ids[::-1])
+        third = self.tracker.update([(500, 400, 50, 50)])
+        self.assertNotIn(third[0].track_id, ids)
+
+    def test_lost_tracks_expire(self):
+        track = self.tracker.update([(100, 100, 50, 50)])[0]
+        for _ in range(2):
+            self.tracker.update([])
+        self.assertEqual(self.tracker.update([(100, 100, 50, 50)])[0].track_id, track.track_id)
+        for _ in range(3):
+            self.tracker.update([])
+        self.assertEqual(self.tracker.tracks, [])
+        self.assertNotEqual(self.tracker.update([(100, 100, 50, 50)])[0].track_id, track.track_id)
+
+    def test_reembeds_new_uncertain_and_due_tracks(self):
+        confident, uncertain = self.tracker.update([(100, 100, 50, 50), (300, 100, 50, 50)])
+        self.assertEqual(self.tracker.select_for_embedding([confident, uncertain]), [confident, uncertain])
+        self.tracker.record_match(confident, 'REG001', 0.4)
+        self.tracker.record_match(uncertain, 'REG002', 0.7)
+
+        embedded = []
+        for _ in range(4):
+            tracks = self.tracker.update([(102, 100, 50, 50), (302, 100, 50, 50)])
+            to_embed = self.tracker.select_for_embedding(tracks)
+            embedded.append([track.student_id for track in to_embed])
+            for track in to_embed:
+                self.tracker.record_match(track, track.student_id, track.distance)
+        # The uncertain face every frame, the confident one every reembed_interval frames
+        self.assertEqual(embedded, [['REG002'], ['REG002'], ['REG001', 'REG002'], ['REG002']])
+        self.assertEqual(self.tracker.stats()['embedded_faces'], 7)
+        self.assertEqual(self.tracker.stats()['reused_faces'], 3)
+
+
+class MeanColourEmbedder:
+    """Deterministic stand-in for FaceNet: an image's mean colour, counting the images embedded."""
+
+    def __init__(self):
+        self.embedded = 0
+
+    def embeddings(self, images):
+        self.embedded += len(images)
+        return [image.reshape(-1, 3).mean(axis=0) for image in images]
+
+
+class EmbeddingCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.student_dir = os.path.join(self.root, 'dataset', 'REG001')
+        os.makedirs(self.student_dir)
+        for i in range(5):
+            self.write_image(i, stripe=2 + 3 * i)
+
+    def write_image(self, i, stripe):
+        image = np.zeros((20, 20, 3), dtype=np.uint8)
+        image[:, :stripe] = 255
+        cv2.imwrite(os.path.join(self.student_dir, f'{i}.png'), image)
+
+    def load(self):
+        trainer = FaceRecognitionTrainer(dataset_base_path=os.path.join(self.root, 'dataset'),
+                                         model_base_path=os.path.join(self.root, 'models'))
+        trainer._embedder = MeanColourEmbedder()
+        embeddings, _ = trainer.load_dataset('REG001')
+        trainer.embedding_cache.flush()
+        return trainer._embedder.embedded, embeddings
+
+    def test_only_new_or_changed_images_are_embedded(self):
+        embedded, first = self.load()
+        self.assertEqual(embedded, 5)
+        embedded, cached = self.load()
+        self.assertEqual(embedded, 0)
+        np.testing.assert_allclose(cached, first)
+
+        # Changed content under the same file name is a cache miss
+        self.write_image(2, stripe=17)
+        embedded, updated = self.load()
+        self.assertEqual(embedded, 1)
+        self.assertFalse(np.allclose(updated[2], first[2]))
+        np.testing.assert_allclose(np.delete(updated, 2, axis=0), np.delete(first, 2, axis=0))
+
+    def test_namespace_change_invalidates_everything(self):
+        self.load()
+        with mock.patch('train.PREPROCESSING_VERSION', 'resize-160|bgr2rgb'):
+            embedded, _ = self.load()
+        self.assertEqual(embedded, 5)
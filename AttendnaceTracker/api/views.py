@@ -17,8 +17,8 @@ from .face_recognition_views import (
     student_update, student_delete, face_capture_page,
     start_face_capture, capture_status, stop_face_capture,
     train_model, video_feed, start_attendance_camera,
-    attendance_video_feed, attendance_status, stop_attendance_camera,
-    dashboard_stats as face_dashboard_stats, crowd_report, unknown_faces,
+    attendance_video_feed, attendance_status, stop_attendance_camera, attendance_sessions,
+    attendance_events, dashboard_stats as face_dashboard_stats, crowd_report, unknown_faces,
     student_dashboard, class_attendance_history
 )
 
@@ -20,6 +20,8 @@ class _NotificationsViewState extends State<NotificationsView> {
   List<Map<String, dynamic>> _notifications = [];
   bool _isLoading = true;
   bool _isRefreshing = false;
+  bool _isLoadingMore = false;
+  String? _nextCursor;
 
   @override
   void initState() {
@@ -34,14 +36,7 @@ class _NotificationsViewState extends State<NotificationsView> {
 
     try {
       print('Fetching notifications for user: ${widget.userId}');
-      final response = await http
-          .get(
-            Uri.parse(
-              '${ApiConfig.baseUrl}/api/notifications/${widget.userId}/',
-            ),
-            headers: {'Accept': 'application/json'},
-          )
-          .timeout(Duration(seconds: 5));
+      final response = await _getPage(null);
 
       print('Notifications API Response Status: ${response.statusCode}');
       print('Notifications API Response Body: ${response.body}');
@@ -50,30 +45,8 @@ class _NotificationsViewState extends State<NotificationsView> {
         final List<dynamic> notificationsData = json.decode(response.body);
 
         setState(() {
-          _notifications = notificationsData.map((notif) {
-            DateTime timestamp;
-            try {
-              timestamp = DateTime.parse(
-                notif['createdAt'] ??
-                    notif['created_at'] ??
-                    DateTime.now().toIso8601String(),
-              );
-            } catch (e) {
-              timestamp = DateTime.now();
-            }
-            return {
-              'id': notif['id']?.toString() ?? 'unknown',
-              'title': notif['title'] ?? 'Notification',
-              'message': notif['description'] ?? notif['message'] ?? '',
-              'type': notif['type'] ?? notif['notification_type'] ?? 'info',
-              'timestamp': timestamp,
-              'isRead': notif['isRead'] ?? notif['is_read'] ?? false,
-              'icon': notif['icon'] ?? 'notifications',
-              'iconColor':
-                  notif['iconColor'] ?? notif['icon_color'] ?? '#3498DB',
-              'timeAgo': notif['time'] ?? '',
-            };
-          }).toList();
+          _notifications = notificationsData.map(_parseNotification).toList();
+          _nextCursor = response.headers['x-next-cursor'];
           _isLoading = false;
         });
       } else {
@@ -86,6 +59,70 @@ class _NotificationsViewState extends State<NotificationsView> {
     }
   }
 
+  // The API pages most recent first; X-Next-Cursor is set while older pages remain
+  Future<http.Response> _getPage(String? cursor) {
+    return http
+        .get(
+          Uri.parse(
+            '${ApiConfig.baseUrl}/api/notifications/${widget.userId}/',
+          ).replace(queryParameters: cursor == null ? null : {'cursor': cursor}),
+          headers: {'Accept': 'application/json'},
+        )
+        .timeout(Duration(seconds: 5));
+  }
+
+  Future<void> _loadMoreNotifications() async {
+    final cursor = _nextCursor;
+    if (cursor == null || _isLoadingMore) return;
+    setState(() {
+      _isLoadingMore = true;
+    });
+
+    try {
+      final response = await _getPage(cursor);
+      if (response.statusCode == 200 && cursor == _nextCursor) {
+        final List<dynamic> notificationsData = json.decode(response.body);
+        setState(() {
+          _notifications.addAll(notificationsData.map(_parseNotification));
+          _nextCursor = response.headers['x-next-cursor'];
+        });
+      } else {
+        print('Failed to fetch older notifications: ${response.statusCode}');
+      }
+    } catch (e) {
+      print('Error fetching older notifications: $e');
+    } finally {
+      setState(() {
+        _isLoadingMore = false;
+      });
+    }
+  }
+
+  Map<String, dynamic> _parseNotification(dynamic notif) {
+    DateTime timestamp;
+    try {
+      timestamp = DateTime.parse(
+        notif['createdAt'] ??
+            notif['created_at'] ??
+            DateTime.now().toIso8601String(),
+      ).toLocal();
+    } catch (e) {
+      timestamp = DateTime.now();
+    }
+    return {
+      'id': notif['id']?.toString() ?? 'unknown',
+      'title': notif['title'] ?? 'Notification',
+      'message': notif['description'] ?? notif['message'] ?? '',
+      'type': notif['type'] ?? notif['notification_type'] ?? 'info',
+      'timestamp': timestamp,
+      'isRead': notif['isRead'] ?? notif['is_read'] ?? false,
+      'icon': notif['icon'] ?? 'notifications',
+      'iconColor': notif['iconColor'] ?? notif['icon_color'] ?? '#3498DB',
+      // The API sends only createdAt so unchanged pages keep their ETag
+      'timeAgo': _formatTimestamp(timestamp),
+    };
+  }
+
   Future<void> _refreshNotifications() async {
     setState(() {
       _isRefreshing = true;
@@ -140,6 +177,7 @@ class _NotificationsViewState extends State<NotificationsView> {
 
     setState(() {
       _notifications = defaultNotifications;
+      _nextCursor = null;
       _isLoading = false;
     });
   }
@@ -335,8 +373,25 @@ class _NotificationsViewState extends State<NotificationsView> {
                           : ListView.builder(
                               physics: AlwaysScrollableScrollPhysics(),
                               padding: EdgeInsets.all(16),
-                              itemCount: _notifications.length,
+                              itemCount:
+                                  _notifications.length +
+                                  (_nextCursor != null ? 1 : 0),
                               itemBuilder: (context, index) {
+                                if (index == _notifications.length) {
+                                  // Reached the end of the loaded pages
+                                  WidgetsBinding.instance.addPostFrameCallback(
+                                    (_) => _loadMoreNotifications(),
+                                  );
+                                  return Padding(
+                                    padding: EdgeInsets.symmetric(vertical: 16),
+                                    child: Center(
+                                      child: SpinKitFadingCircle(
+                                        color: primaryColor,
+                                        size: 30.0,
+                                      ),
+                                    ),
+                                  );
+                                }
                                 final notification = _notifications[index];
                                 return _buildNotificationCard(
                                   notification,